@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+AI Level-of-Detail Scheduler for Asteroids Game
+Runs each ship's decision logic at a rate set by how close its nearest threat is
+
+Ships in close combat think every tick; ships further away think every 2, 4
+or IDLE_INTERVAL ticks. Every ship gets a fixed phase offset when it is first
+seen, so ships sharing an interval think on different ticks and the AI load
+per tick stays flat instead of spiking every IDLE_INTERVAL ticks. Between
+thinks a ship coasts on its last decision: the turn and thrust it applied on
+its last think are applied again.
+
+An optional per-tick time budget caps the AI work: once it is spent, the
+remaining due ships are deferred to the next tick. Deferred ships stay
+overdue, and overdue ships (then closer ships) go first, so nobody starves.
+
+Usage:
+    import game_pygame as game
+    game.ai_scheduler = AIScheduler(budget_ms=4.0)   # None restores full-rate AI
+"""
+
+import math
+import time
+
+# (threat distance below which, think interval in ticks), nearest first
+LOD_BANDS = ((300.0, 1), (500.0, 2), (800.0, 4))
+IDLE_INTERVAL = 8
+
+
+class AIScheduler:
+    """Decides which ships think on a tick, and coasts the others"""
+    def __init__(self, budget_ms=None, bands=LOD_BANDS, idle_interval=IDLE_INTERVAL):
+        self.budget_ms = budget_ms
+        self.bands = bands
+        self.idle_interval = idle_interval
+        self._states = {}
+        self._next_phase = 0
+        self._tick = None
+        self._spent = 0.0
+
+        # Statistics of the last tick
+        self.thinks = 0
+        self.coasts = 0
+        self.deferred = 0
+        self.ai_ms = 0.0
+
+    def interval(self, distance):
+        """Think interval for a nearest-threat distance"""
+        for limit, interval in self.bands:
+            if distance < limit:
+                return interval
+        return self.idle_interval
+
+    def _begin_tick(self, tick):
+        """Reset the per-tick budget and statistics"""
+        self._tick = tick
+        self._spent = 0.0
+        self.thinks = self.coasts = self.deferred = 0
+        self.ai_ms = 0.0
+        if tick % self.idle_interval == 0:
+            # Forget ships that left the world (the others keep their phases)
+            for ship in [ship for ship, state in self._states.items() if state[5] < tick - 1]:
+                del self._states[ship]
+
+    def run(self, tick, ships, distances, think):
+        """Run think(ship) for the ships due this tick, coast the rest
+
+        distances holds each ship's nearest-threat distance. Can be called
+        more than once per tick (e.g. AI ships, then enemies); the calls
+        share the tick's budget.
+        """
+        if tick != self._tick:
+            self._begin_tick(tick)
+        states = self._states
+
+        due = []
+        for ship, distance in zip(ships, distances):
+            state = states.get(ship)
+            if state is None:
+                # New ship: next phase slot, thinks on its first tick
+                # [ship, phase, last think tick, turn, thrust, last seen tick]
+                state = [ship, self._next_phase, tick - self.idle_interval - 1, 0.0, 0.0, tick]
+                self._next_phase += 1
+                states[ship] = state
+            state[5] = tick
+            interval = self.interval(distance)
+            waited = tick - state[2]
+            if (tick + state[1]) % interval == 0 or waited > interval:
+                due.append((-waited / interval, distance, state))
+            else:
+                self._coast(ship, state)
+        due.sort(key=lambda entry: entry[:2])
+
+        budget = self.budget_ms
+        for _, _, state in due:
+            ship = state[0]
+            if budget is not None and self._spent >= budget:
+                self.deferred += 1
+                self._coast(ship, state)
+                continue
+            start = time.perf_counter()
+            angle, velocity_x, velocity_y = ship.angle, ship.velocity_x, ship.velocity_y
+            think(ship)
+            # Remember the decision as a turn and thrust power to coast on
+            turn = (ship.angle - angle) / ship.rotation_speed
+            state[3] = max(-1.0, min(1.0, turn))
+            impulse = math.hypot(ship.velocity_x - velocity_x, ship.velocity_y - velocity_y)
+            state[4] = impulse / ship.thrust_power
+            state[2] = tick
+            self.thinks += 1
+            elapsed = (time.perf_counter() - start) * 1000.0
+            self._spent += elapsed
+            self.ai_ms += elapsed
+
+    def _coast(self, ship, state):
+        """Repeat the ship's last turn and thrust"""
+        self.coasts += 1
+        if state[3]:
+            ship.rotate(state[3])
+        if state[4]:
+            ship.thrust(state[4])
@@ -2,9 +2,15 @@
 ##// Designer Tuệ Hoàng, Eng. 
 ##// ============================================
 
+import base64
+import json
+import os
 import streamlit as st
 import streamlit.components.v1 as components
 
+# Trained MARL policy checkpoint (marl_system.py --checkpoint) embedded into the game page
+MARL_CHECKPOINT_PATH = os.environ.get('MARL_CHECKPOINT', 'marl_checkpoint')
+
 # Page configuration
 st.set_page_config(
     page_title="Asteroids Arcade Game",
@@ -399,6 +405,23 @@ with st.sidebar:
     st.markdown("**Hayden (14) and Hugo (10) — *Gaming Specialists***")
     st.caption("*With assistance from multi-LLM.*")
 
+# Inline the actor tensors of a checkpoint for marl_checkpoint.js
+def get_marl_checkpoint_js(path):
+    header_path = os.path.join(path, 'header.json')
+    if not os.path.exists(header_path):
+        return "const MARL_CHECKPOINT = null;\n"
+    with open(header_path, 'r') as f:
+        header = json.load(f)
+    # Only the weights and biases (network_tensors names), not the optimizer state
+    layers = len(header['networks']['actors']['layers']) - 1
+    names = [f"actors.{kind}{i}" for i in range(layers) for kind in 'wb']
+    tensors = {}
+    for name in names:
+        entry = header['tensors'][name]
+        with open(os.path.join(path, entry['file']), 'rb') as f:
+            tensors[name] = base64.b64encode(f.read()).decode('ascii')
+    return f"const MARL_CHECKPOINT = {json.dumps({'header': header, 'tensors': tensors})};\n"
+
 # Read the game files and combine them
 def get_game_html(num_ai_ships, num_enemy_ships, num_boss_ships, canvas_width, canvas_height, player_ship_active, ml_enabled, anchor_player_ship=False, ml_mode="parameters", marl_enabled=False, marl_training=False, use_3d=False, alpha_attack_enabled=False, anchor_alpha_ship=False, formation_type="arrowhead", auto_assign_roles=True, adaptive_formation=False, multi_target_mode="focus", escort_mode="none", tactical_sequences=True, formation_transitions=True, advanced_flanking=True):
     # Read CSS
@@ -428,6 +451,9 @@ def get_game_html(num_ai_ships, num_enemy_ships, num_boss_ships, canvas_width, c
                 marl_js += f.read() + "\n"
             with open('marl_system.js', 'r') as f:
                 marl_js += f.read() + "\n"
+            with open('marl_checkpoint.js', 'r') as f:
+                marl_js += f.read() + "\n"
+            marl_js += get_marl_checkpoint_js(MARL_CHECKPOINT_PATH)
             with open('marl_integration.js', 'r') as f:
                 marl_js += f.read() + "\n"
         except FileNotFoundError as e:
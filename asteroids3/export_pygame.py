@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Offline Frame Exporter for Asteroids Game
+Renders a headless battle as fast as possible to a PNG sequence or raw RGB video
+
+Examples:
+    python3 export_pygame.py --seconds 600 --every 4 --size 600x300 --output frames/
+    python3 export_pygame.py --seconds 60 --format raw --output - --size 960x480 | \\
+        ffmpeg -f rawvideo -pix_fmt rgb24 -s 960x480 -r 60 -i - battle.mp4
+"""
+
+import os
+
+# Render offscreen: no window, no audio device
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import queue
+import sys
+import threading
+import time
+import pygame
+import game_pygame as game
+from menu_pygame import Menu
+from render_pygame import Camera, draw_frame
+
+# Colors
+YELLOW = (255, 255, 0)
+
+
+class FrameWriter:
+    """Background writers for rendered frames
+
+    Frames are handed over as raw RGB bytes through a bounded queue, so
+    rendering runs ahead of the disk by at most queue_size frames and
+    blocks (instead of growing memory) when the writers fall behind.
+    PNG frames are numbered files and can be encoded by several threads;
+    a raw stream keeps frame order and always has a single writer.
+    """
+    def __init__(self, output, size, fmt='png', queue_size=64, writers=1):
+        self.output = output
+        self.size = size
+        self.format = fmt
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.written = 0
+        self.error = None
+        self.stream = None
+        if fmt == 'png':
+            os.makedirs(output, exist_ok=True)
+        else:
+            writers = 1
+            self.stream = sys.__stdout__.buffer if output == '-' else open(output, 'wb')
+        self.threads = [threading.Thread(target=self._run, name=f"frame-writer-{i}", daemon=True)
+                        for i in range(writers)]
+
+    def start(self):
+        """Start the writer threads"""
+        for thread in self.threads:
+            thread.start()
+
+    def put(self, index, data):
+        """Queue a frame (blocks while the queue is full)"""
+        if self.error:
+            raise self.error
+        self.frames.put((index, data))
+
+    def close(self):
+        """Flush remaining frames and stop the writers"""
+        for _ in self.threads:
+            self.frames.put(None)
+        for thread in self.threads:
+            thread.join()
+        if self.stream is not None:
+            self.stream.flush()
+            if self.stream is not sys.__stdout__.buffer:
+                self.stream.close()
+        if self.error:
+            raise self.error
+
+    def _run(self):
+        """Writer loop"""
+        while True:
+            item = self.frames.get()
+            if item is None:
+                return
+            if self.error:
+                # Keep draining so the render loop never blocks on a dead writer
+                continue
+            index, data = item
+            try:
+                if self.stream is not None:
+                    self.stream.write(data)
+                else:
+                    surface = pygame.image.frombytes(data, self.size, 'RGB')
+                    pygame.image.save(surface, os.path.join(self.output, f"frame_{index:06d}.png"))
+                self.written += 1
+            except Exception as e:  # reported to the render loop on the next put/close
+                self.error = e
+
+
+def export(ticks, output, fmt='png', every=1, size=None, settings=None, seed=None,
+           camera_mode='fixed', hud=True, queue_size=64, writers=1, log=print):
+    """Simulate `ticks` ticks headlessly and export every `every`-th frame
+
+    `size` is the output resolution (defaults to the world size); the
+    camera view of the world is scaled to it. Returns export statistics.
+    """
+    pygame.display.set_mode((1, 1))
+    game.apply_settings(settings or Menu(game.SCREEN_WIDTH, game.SCREEN_HEIGHT).get_settings())
+    game.reset_world(seed)
+
+    world_size = (game.WORLD_WIDTH, game.WORLD_HEIGHT)
+    size = tuple(size or world_size)
+    canvas = pygame.Surface(world_size)
+    output_surface = pygame.Surface(size) if size != world_size else canvas
+    camera = Camera(camera_mode)
+    font = pygame.font.Font(None, 36) if hud else None
+
+    writer = FrameWriter(output, size, fmt, queue_size, writers)
+    writer.start()
+    frames = 0
+    sim_time = render_time = 0.0
+    start = time.perf_counter()
+    try:
+        for t in range(ticks):
+            step_start = time.perf_counter()
+            game.step_world()
+            sim_time += time.perf_counter() - step_start
+            if t % every:
+                continue
+
+            render_start = time.perf_counter()
+            frame = game.capture_world()
+            draw_frame(canvas, frame, None, camera.viewport(frame, *world_size))
+            if font:
+                canvas.blit(font.render(f"Score: {frame.score}  Tick: {frame.tick}", True, YELLOW), (10, 10))
+            if output_surface is not canvas:
+                pygame.transform.smoothscale(canvas, size, output_surface)
+            data = pygame.image.tobytes(output_surface, 'RGB')
+            render_time += time.perf_counter() - render_start
+
+            writer.put(frames, data)
+            frames += 1
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+
+    stats = {
+        'ticks': ticks,
+        'frames': frames,
+        'seconds': elapsed,
+        'sim_seconds': sim_time,
+        'render_seconds': render_time,
+        'realtime_factor': (ticks / game.FPS) / elapsed if elapsed > 0 else float('inf'),
+    }
+    log(f"Exported {frames} frames ({ticks} ticks) in {elapsed:.1f}s: "
+        f"{stats['realtime_factor']:.1f}x real time "
+        f"(sim {sim_time:.1f}s, render {render_time:.1f}s)")
+    return stats
+
+
+def parse_size(value):
+    """Parse WIDTHxHEIGHT"""
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Export a headless Asteroids battle as frames")
+    parser.add_argument('--output', '-o', default='frames', help="PNG directory, raw file, or - for stdout")
+    parser.add_argument('--format', choices=['png', 'raw'], default='png')
+    duration = parser.add_mutually_exclusive_group()
+    duration.add_argument('--seconds', type=float, default=60.0, help="Game time to simulate")
+    duration.add_argument('--ticks', type=int, help="Ticks to simulate")
+    parser.add_argument('--every', type=int, default=1, help="Export every k-th tick")
+    parser.add_argument('--size', type=parse_size, help="Output resolution, e.g. 960x480")
+    parser.add_argument('--world', type=parse_size, help="World size, e.g. 2400x1200")
+    parser.add_argument('--camera', choices=['fixed', 'player', 'alpha'], default='fixed')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--ai-ships', type=int)
+    parser.add_argument('--enemies', type=int)
+    parser.add_argument('--bosses', type=int)
+    parser.add_argument('--no-player', action='store_true', help="AI-only battle")
+    parser.add_argument('--no-hud', action='store_true')
+    parser.add_argument('--queue-size', type=int, default=64)
+    parser.add_argument('--writers', type=int, default=2, help="PNG encoder threads")
+    args = parser.parse_args()
+
+    settings = Menu(game.SCREEN_WIDTH, game.SCREEN_HEIGHT).get_settings()
+    if args.ai_ships is not None:
+        settings['num_ai_ships'] = args.ai_ships
+    if args.enemies is not None:
+        settings['num_enemy_ships'] = args.enemies
+    if args.bosses is not None:
+        settings['num_boss_ships'] = args.bosses
+    if args.no_player:
+        settings['player_ship_active'] = False
+    if args.world:
+        settings['world_width'], settings['world_height'] = args.world
+
+    ticks = args.ticks if args.ticks is not None else int(args.seconds * game.FPS)
+    if args.output == '-':
+        # Keep stdout clean for raw video when piping (game messages go to stderr)
+        sys.stdout = sys.stderr
+    export(ticks, args.output, args.format, max(1, args.every), args.size, settings, args.seed,
+           args.camera, not args.no_hud, args.queue_size, max(1, args.writers))
+
+
+if __name__ == "__main__":
+    main()
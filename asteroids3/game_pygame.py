@@ -13,12 +13,29 @@ Hayden and Hugo, Game Designers
 """
 
 import pygame
+import json
 import math
+import operator
+import os
 import random
+import struct
 import sys
+import threading
+import time
+from array import array
+from itertools import chain
 from typing import List, Optional, Tuple, Dict
 import numpy as np
+from ai_scheduler_pygame import AIScheduler
 from menu_pygame import Menu
+from ml_pygame import (BEHAVIORS, ML_INFERENCE_INTERVAL, NO_PRIORITY_RULES, NO_THREAT_BAND,
+                       MLParameterTuner, extract_features)
+from render_pygame import (ENEMY_COLORS, Camera, Presenter, QualityGovernor, SnapshotBuffer,
+                           capture_frame, draw_frame, draw_ships)
+from telemetry_pygame import (ENEMY_ENTITIES, ENTITY_AI, ENTITY_ASTEROID, ENTITY_ENEMY_BULLET,
+                              ENTITY_NONE, ENTITY_PLAYER, EVENT_ALPHA, EVENT_BLOCK,
+                              EVENT_BOSS_PHASE, EVENT_FORMATION, EVENT_GAME_OVER, EVENT_HIT,
+                              EVENT_KILL, EVENT_SHIELD, EVENT_TELEPORT, TelemetryWriter)
 
 # Initialize Pygame
 pygame.init()
@@ -29,6 +46,10 @@ SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 600
 FPS = 60
 
+# World size (independent of the window; the camera shows part of it)
+WORLD_WIDTH = 1200
+WORLD_HEIGHT = 600
+
 # Colors
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
@@ -46,6 +67,11 @@ score = 0
 player_ship_active = True
 anchor_player_ship = False
 anchor_alpha_ship = False
+tick = 0
+
+# Player ship and its fire cooldown
+ship = None
+shoot_cooldown = 0
 
 # Game objects
 asteroids = []
@@ -71,12 +97,44 @@ ml_enabled = False
 ml_mode = "parameters"
 marl_enabled = False
 marl_training = False
+threaded_simulation = False
+recorder = None  # Replay recorder fed by step_world (see replay_pygame)
+telemetry_events = None  # Event queue of the telemetry writer, None when disabled
+training_collector = None  # TrainingDataCollector, None when not collecting
+ai_scheduler = None  # AIScheduler (ai_scheduler_pygame), None runs every AI every tick
+ai_policy = None  # (agents, 21) observations -> (agents, 4) actor outputs for the AI ships (marl_inference)
+policy_observations = None  # ObservationBuilder for ai_policy
+ml_tuner = MLParameterTuner()  # Phase 5.1 ML parameters and 5.2 priorities of the AI ships (ml_pygame)
+ML_PARAMETER_MODES = ('parameters', 'both', 'full')
+ML_PRIORITY_MODES = ('priorities', 'both', 'full')
+BULLET_THREAT_SCALE = 4.0  # Bullet distance multiplier when rating an enemy's threat level
+
+# Player input bits (one per control, packed per tick)
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_THRUST = 4
+INPUT_BACKWARD = 8
+INPUT_FIRE = 16
+INPUT_HYPERSPACE = 32
+INPUT_SHIELD = 64
+
+PLAYER_KEYS = {
+    pygame.K_LEFT: INPUT_LEFT,
+    pygame.K_RIGHT: INPUT_RIGHT,
+    pygame.K_UP: INPUT_THRUST,
+    pygame.K_DOWN: INPUT_BACKWARD,
+    pygame.K_SPACE: INPUT_FIRE,
+    pygame.K_h: INPUT_HYPERSPACE,
+    pygame.K_f: INPUT_SHIELD,
+}
 
 class Ship:
     """Player ship class"""
+    render_kind = 'player'
+    
     def __init__(self, x=None, y=None):
-        self.x = x if x is not None else SCREEN_WIDTH / 2
-        self.y = y if y is not None else SCREEN_HEIGHT / 2
+        self.x = x if x is not None else WORLD_WIDTH / 2
+        self.y = y if y is not None else WORLD_HEIGHT / 2
         self.angle = 0  # Rotation angle in radians
         self.velocity_x = 0.0
         self.velocity_y = 0.0
@@ -132,8 +190,8 @@ class Ship:
         # ANCHOR PLAYER SHIP: Keep player ship at center when anchored
         if anchor_player_ship:
             # Force position to center
-            self.x = SCREEN_WIDTH / 2
-            self.y = SCREEN_HEIGHT / 2
+            self.x = WORLD_WIDTH / 2
+            self.y = WORLD_HEIGHT / 2
             # Reset velocity to prevent drift
             self.velocity_x = 0
             self.velocity_y = 0
@@ -144,18 +202,18 @@ class Ship:
             
             # Wrap around screen edges
             if self.x < 0:
-                self.x = SCREEN_WIDTH
-            elif self.x > SCREEN_WIDTH:
+                self.x = WORLD_WIDTH
+            elif self.x > WORLD_WIDTH:
                 self.x = 0
             if self.y < 0:
-                self.y = SCREEN_HEIGHT
-            elif self.y > SCREEN_HEIGHT:
+                self.y = WORLD_HEIGHT
+            elif self.y > WORLD_HEIGHT:
                 self.y = 0
     
     def hyperspace(self):
         """Teleport to random location"""
-        self.x = random.random() * SCREEN_WIDTH
-        self.y = random.random() * SCREEN_HEIGHT
+        self.x = random.random() * WORLD_WIDTH
+        self.y = random.random() * WORLD_HEIGHT
         # Small chance of self-destruction (10% chance)
         if random.random() < 0.1:
             self.velocity_x = 0
@@ -163,26 +221,7 @@ class Ship:
     
     def draw(self, screen):
         """Draw the ship on the screen"""
-        # Ship is a triangle pointing in the direction of angle
-        # Calculate triangle points
-        nose_x = self.x + math.cos(self.angle) * self.size
-        nose_y = self.y + math.sin(self.angle) * self.size
-        
-        left_x = self.x - math.cos(self.angle - 2.5) * self.size * 0.6
-        left_y = self.y - math.sin(self.angle - 2.5) * self.size * 0.6
-        
-        right_x = self.x - math.cos(self.angle + 2.5) * self.size * 0.6
-        right_y = self.y - math.sin(self.angle + 2.5) * self.size * 0.6
-        
-        # Draw ship triangle
-        points = [(nose_x, nose_y), (left_x, left_y), (right_x, right_y)]
-        pygame.draw.polygon(screen, GREEN, points)
-        pygame.draw.polygon(screen, WHITE, points, 2)  # Outline
-        
-        # Draw shield if active
-        if self.shield_active:
-            pygame.draw.circle(screen, GREEN, (int(self.x), int(self.y)), 
-                             self.shield_radius, 2)
+        draw_ships(screen, [self])
     
     def get_position(self):
         """Get position for collision detection"""
@@ -192,12 +231,27 @@ class Ship:
             'radius': self.radius
         }
 
+# Shield of externally controlled AI ships (AIShip.apply_action)
+AI_SHIELD_DURATION = 60
+AI_SHIELD_COOLDOWN = 300
+
+# Role specialization multipliers
+AI_ROLE_ABILITIES = {
+    'scout': {'speed': 1.3, 'detection': 1.5, 'health': 0.9},
+    'tank': {'speed': 0.8, 'detection': 0.9, 'health': 1.5, 'shield': 1.3},
+    'support': {'speed': 1.0, 'detection': 1.2, 'health': 1.1, 'healing': 1.5},
+    'dps': {'speed': 1.1, 'detection': 1.0, 'health': 0.9, 'damage': 1.5, 'fireRate': 1.3},
+    'interceptor': {'speed': 1.4, 'detection': 1.3, 'health': 0.95}
+}
+
 class AIShip(Ship):
     """AI-controlled ship that extends Ship"""
+    render_kind = 'ai'
+    
     def __init__(self, x=None, y=None):
         super().__init__(x, y)
-        self.x = x if x is not None else SCREEN_WIDTH * 0.25
-        self.y = y if y is not None else SCREEN_HEIGHT * 0.25
+        self.x = x if x is not None else WORLD_WIDTH * 0.25
+        self.y = y if y is not None else WORLD_HEIGHT * 0.25
         self.angle = math.pi / 2  # Start facing up
         self.detection_radius = 100
         self.avoidance_force = 0.3
@@ -211,6 +265,9 @@ class AIShip(Ship):
         self.rapid_fire_cooldown = 3
         self.enemy_detection_radius = 300
         self.enemy_firing_range = 250
+        self.ml_threat_band = NO_THREAT_BAND  # Threat band of the last ML parameter update
+        self.ml_priority_rules = NO_PRIORITY_RULES  # Rule code of the ML priority weights
+        self.ml_behavior = None  # Behaviour picked by ML priority weights, None for the fixed priorities
         
         # Flocking parameters
         self.flock_radius = 150
@@ -241,13 +298,7 @@ class AIShip(Ship):
         
         # Role specialization
         self.role = None
-        self.role_abilities = {
-            'scout': {'speed': 1.3, 'detection': 1.5, 'health': 0.9},
-            'tank': {'speed': 0.8, 'detection': 0.9, 'health': 1.5, 'shield': 1.3},
-            'support': {'speed': 1.0, 'detection': 1.2, 'health': 1.1, 'healing': 1.5},
-            'dps': {'speed': 1.1, 'detection': 1.0, 'health': 0.9, 'damage': 1.5, 'fireRate': 1.3},
-            'interceptor': {'speed': 1.4, 'detection': 1.3, 'health': 0.95}
-        }
+        self.role_abilities = AI_ROLE_ABILITIES  # Shared, read-only
     
     def normalize_angle(self, angle):
         """Normalize angle to -π to π"""
@@ -295,8 +346,20 @@ class AIShip(Ship):
     
     def make_decision(self, asteroids_list, enemy_ships_list, ai_ships_list, player_ship):
         """Make AI decision for movement and firing"""
+        self.update_timers()
+        self.think(asteroids_list, enemy_ships_list, ai_ships_list, player_ship)
+    
+    def update_timers(self):
+        """Per-tick cooldowns (run even when think is skipped)"""
+        self.shoot_cooldown = max(0, self.shoot_cooldown - 1)
+    
+    def think(self, asteroids_list, enemy_ships_list, ai_ships_list, player_ship):
+        """Decide movement and firing"""
         global anchor_alpha_ship
         
+        # Behaviour picked by ML priority weights (None: the fixed priorities below)
+        behavior = self.ml_behavior
+        
         # ANCHOR ALPHA SHIP: Skip movement if anchored
         if self.is_alpha and anchor_alpha_ship:
             # Still allow rotation and firing, but no thrust
@@ -308,8 +371,12 @@ class AIShip(Ship):
             # Find nearest enemy
             nearest_enemy = self.find_nearest_enemy(enemy_ships_list)
             
+            if behavior is None:
+                behavior = ('avoid_asteroids' if nearest_asteroid else
+                            'fire_at_enemies' if nearest_enemy else 'random_nav')
+            
             # Priority 1: Avoid asteroids
-            if nearest_asteroid:
+            if behavior == 'avoid_asteroids' and nearest_asteroid:
                 dx = nearest_asteroid.x - self.x
                 dy = nearest_asteroid.y - self.y
                 distance = math.sqrt(dx ** 2 + dy ** 2)
@@ -331,7 +398,7 @@ class AIShip(Ship):
                         self.thrust(0.5)
             
             # Priority 2: Attack enemies
-            elif nearest_enemy:
+            elif behavior == 'fire_at_enemies' and nearest_enemy:
                 dx = nearest_enemy.x - self.x
                 dy = nearest_enemy.y - self.y
                 distance = math.sqrt(dx ** 2 + dy ** 2)
@@ -350,6 +417,13 @@ class AIShip(Ship):
                 if not (self.is_alpha and anchor_alpha_ship):
                     self.thrust(0.7)
             
+            # Line up a shot at the asteroid ahead (ML priorities only)
+            elif behavior == 'fire_at_asteroids' and nearest_asteroid:
+                angle_to_asteroid = math.atan2(nearest_asteroid.y - self.y, nearest_asteroid.x - self.x)
+                angle_diff = self.normalize_angle(angle_to_asteroid - self.angle)
+                if abs(angle_diff) > 0.1:
+                    self.rotate(1 if angle_diff > 0 else -1)
+            
             # Priority 3: Random navigation
             elif random.random() < self.thrust_frequency:
                 if not (self.is_alpha and anchor_alpha_ship):
@@ -358,11 +432,8 @@ class AIShip(Ship):
                 if random.random() < 0.1:
                     self.rotate(1 if random.random() < 0.5 else -1)
         
-        # Firing logic
-        self.shoot_cooldown = max(0, self.shoot_cooldown - 1)
-        
-        # Fire at enemies
-        if nearest_enemy and self.shoot_cooldown <= 0:
+        # Fire at enemies (unless asteroids were given priority)
+        if nearest_enemy and self.shoot_cooldown <= 0 and behavior != 'fire_at_asteroids':
             dx = nearest_enemy.x - self.x
             dy = nearest_enemy.y - self.y
             distance = math.sqrt(dx ** 2 + dy ** 2)
@@ -395,14 +466,46 @@ class AIShip(Ship):
                     bullets.append(Bullet(bullet_x, bullet_y, self.angle, YELLOW))
                     self.shoot_cooldown = self.rapid_fire_cooldown
     
+    def apply_action(self, rotation, thrust, fire, shield):
+        """Act on an external (e.g. MARL policy) action instead of make_decision
+
+        rotation is -1, 0 or 1; thrust, fire and shield are on/off. The shield
+        lasts AI_SHIELD_DURATION ticks and then needs AI_SHIELD_COOLDOWN ticks.
+        """
+        if rotation:
+            self.rotate(rotation)
+        if thrust and not (self.is_alpha and anchor_alpha_ship):
+            self.thrust()
+        
+        self.shoot_cooldown = max(0, self.shoot_cooldown - 1)
+        if fire and self.shoot_cooldown <= 0:
+            bullet_x = self.x + math.cos(self.angle) * self.size
+            bullet_y = self.y + math.sin(self.angle) * self.size
+            bullets.append(Bullet(bullet_x, bullet_y, self.angle, YELLOW))
+            self.shoot_cooldown = self.rapid_fire_cooldown
+        
+        if self.shield_duration > 0:
+            self.shield_duration -= 1
+        else:
+            self.shield_active = False
+        if self.shield_cooldown > 0:
+            self.shield_cooldown -= 1
+        if shield and self.shield_cooldown <= 0 and not self.shield_active:
+            if telemetry_events is not None:
+                telemetry_events.append((EVENT_SHIELD, tick, ENTITY_AI, ENTITY_NONE,
+                                         self.x, self.y, AI_SHIELD_DURATION))
+            self.shield_active = True
+            self.shield_duration = AI_SHIELD_DURATION
+            self.shield_cooldown = AI_SHIELD_COOLDOWN
+    
     def update(self):
         """Update AI ship (override parent)"""
         global anchor_alpha_ship
         
         # ANCHOR ALPHA SHIP: Keep alpha ship at center when anchored
         if self.is_alpha and anchor_alpha_ship:
-            self.x = SCREEN_WIDTH / 2
-            self.y = SCREEN_HEIGHT / 2
+            self.x = WORLD_WIDTH / 2
+            self.y = WORLD_HEIGHT / 2
             self.velocity_x = 0
             self.velocity_y = 0
         else:
@@ -411,38 +514,115 @@ class AIShip(Ship):
     
     def draw(self, screen):
         """Draw AI ship (yellow color)"""
-        # Ship is a triangle pointing in the direction of angle
-        nose_x = self.x + math.cos(self.angle) * self.size
-        nose_y = self.y + math.sin(self.angle) * self.size
-        
-        left_x = self.x - math.cos(self.angle - 2.5) * self.size * 0.6
-        left_y = self.y - math.sin(self.angle - 2.5) * self.size * 0.6
-        
-        right_x = self.x - math.cos(self.angle + 2.5) * self.size * 0.6
-        right_y = self.y - math.sin(self.angle + 2.5) * self.size * 0.6
-        
-        # Draw ship triangle (yellow for AI ships)
-        points = [(nose_x, nose_y), (left_x, left_y), (right_x, right_y)]
-        pygame.draw.polygon(screen, YELLOW, points)
-        pygame.draw.polygon(screen, ORANGE, points, 2)  # Outline
-        
-        # Draw shield if active
-        if self.shield_active:
-            pygame.draw.circle(screen, YELLOW, (int(self.x), int(self.y)), 
-                             self.shield_radius, 2)
-        
-        # Draw health bar
-        if self.health < self.max_health:
-            bar_width = 30
-            bar_height = 4
-            bar_x = self.x - bar_width / 2
-            bar_y = self.y - self.size - 10
-            
-            # Background
-            pygame.draw.rect(screen, RED, (bar_x, bar_y, bar_width, bar_height))
-            # Health
-            health_width = bar_width * (self.health / self.max_health)
-            pygame.draw.rect(screen, GREEN, (bar_x, bar_y, health_width, bar_height))
+        draw_ships(screen, [self])
+    
+    @property
+    def ai_phase(self):
+        """AI phase from health: 1 healthy, 2 damaged, 3 critical"""
+        health_percent = max(0.0, min(1.0, self.health / self.max_health))
+        if health_percent > 0.66:
+            return 1
+        elif health_percent > 0.33:
+            return 2
+        return 3
+
+# ML training data (columns of TrainingDataCollector shards)
+FEATURE_NAMES = ('health', 'phase', 'shield_active', 'velocity', 'asteroid_count',
+                 'nearest_asteroid_distance', 'enemy_count', 'nearest_enemy_distance', 'ally_count',
+                 'threat_level', 'flock_density', 'has_nearby_enemies')
+PARAMETER_NAMES = ('detection_radius', 'firing_range', 'flock_weight', 'thrust_frequency',
+                   'enemy_firing_range')
+SHIP_STATE_NAMES = ('x', 'y', 'angle', 'velocity_x', 'velocity_y', 'health', 'phase')
+
+class TrainingDataCollector:
+    """Columnar recorder of AI ship features, parameters and state for ML tuning
+
+    Samples go into preallocated NumPy shard buffers; a full shard is written
+    as a compressed .npz on a background thread and listed in manifest.json,
+    so a million samples load with a few np.load calls.
+    """
+    def __init__(self, path, shard_size=65536):
+        self.path = path
+        self.shard_size = shard_size
+        os.makedirs(path, exist_ok=True)
+        manifest_path = os.path.join(path, 'manifest.json')
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {'version': 1, 'features': FEATURE_NAMES, 'parameters': PARAMETER_NAMES,
+                             'ship_state': SHIP_STATE_NAMES, 'rows': 0, 'shards': []}
+        self.writer = None
+        self._allocate()
+    
+    def _allocate(self):
+        """Fresh shard buffers"""
+        self.rows = 0
+        self.tick = np.zeros(self.shard_size, dtype=np.int64)
+        self.ship = np.zeros(self.shard_size, dtype=np.int16)
+        self.features = np.zeros((self.shard_size, len(FEATURE_NAMES)), dtype=np.float32)
+        self.parameters = np.zeros((self.shard_size, len(PARAMETER_NAMES)), dtype=np.float32)
+        self.ship_state = np.zeros((self.shard_size, len(SHIP_STATE_NAMES)), dtype=np.float32)
+    
+    def collect(self, tick, ai_ships_list, asteroids_list, enemy_ships_list):
+        """Record one sample per AI ship"""
+        features = extract_features(ai_ships_list, asteroids_list, enemy_ships_list)
+        for index, ai_ship in enumerate(ai_ships_list):
+            row = self.rows
+            self.tick[row] = tick
+            self.ship[row] = index
+            self.features[row] = features[index]
+            self.parameters[row] = (ai_ship.detection_radius, ai_ship.firing_range, ai_ship.flock_weight,
+                                    ai_ship.thrust_frequency, ai_ship.enemy_firing_range)
+            self.ship_state[row] = (ai_ship.x, ai_ship.y, ai_ship.angle, ai_ship.velocity_x,
+                                    ai_ship.velocity_y, ai_ship.health, ai_ship.ai_phase)
+            self.rows += 1
+            if self.rows == self.shard_size:
+                self.flush()
+    
+    def flush(self):
+        """Write the current (possibly partial) shard in the background"""
+        if self.rows == 0:
+            return
+        columns = {'tick': self.tick, 'ship': self.ship, 'features': self.features,
+                   'parameters': self.parameters, 'ship_state': self.ship_state}
+        columns = {name: column[:self.rows] for name, column in columns.items()}
+        name = f"samples-{len(self.manifest['shards']):05d}.npz"
+        self.manifest['shards'].append({'file': name, 'rows': self.rows})
+        self.manifest['rows'] += self.rows
+        if self.writer is not None:
+            self.writer.join()
+        self.writer = threading.Thread(target=self._write, args=(name, columns, dict(self.manifest, shards=list(self.manifest['shards']))),
+                                       name="training-data", daemon=True)
+        self.writer.start()
+        self._allocate()
+    
+    def _write(self, name, columns, manifest):
+        """Write one shard, then the manifest that lists it"""
+        np.savez_compressed(os.path.join(self.path, name), **columns)
+        manifest_path = os.path.join(self.path, 'manifest.json')
+        with open(manifest_path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(manifest_path + '.tmp', manifest_path)
+    
+    def close(self):
+        """Write remaining samples and wait for the writer"""
+        self.flush()
+        if self.writer is not None:
+            self.writer.join()
+
+def load_training_data(path):
+    """Load all shards listed in a collector's manifest as concatenated columns"""
+    with open(os.path.join(path, 'manifest.json')) as f:
+        manifest = json.load(f)
+    parts = {'tick': [], 'ship': [], 'features': [], 'parameters': [], 'ship_state': []}
+    for shard in manifest['shards']:
+        with np.load(os.path.join(path, shard['file'])) as data:
+            for name in parts:
+                parts[name].append(data[name])
+    columns = {name: np.concatenate(arrays) if arrays else np.zeros(0) for name, arrays in parts.items()}
+    columns['manifest'] = manifest
+    return columns
 
 class EnemyBullet:
     """Enemy bullet class (red bullets)"""
@@ -465,12 +645,12 @@ class EnemyBullet:
         
         # Wrap around screen edges
         if self.x < 0:
-            self.x = SCREEN_WIDTH
-        elif self.x > SCREEN_WIDTH:
+            self.x = WORLD_WIDTH
+        elif self.x > WORLD_WIDTH:
             self.x = 0
         if self.y < 0:
-            self.y = SCREEN_HEIGHT
-        elif self.y > SCREEN_HEIGHT:
+            self.y = WORLD_HEIGHT
+        elif self.y > WORLD_HEIGHT:
             self.y = 0
     
     def is_alive(self):
@@ -498,17 +678,17 @@ class EnemyShip:
         if x is None or y is None:
             side = random.randint(0, 3)
             if side == 0:  # Top
-                self.x = random.random() * SCREEN_WIDTH
+                self.x = random.random() * WORLD_WIDTH
                 self.y = 0
             elif side == 1:  # Right
-                self.x = SCREEN_WIDTH
-                self.y = random.random() * SCREEN_HEIGHT
+                self.x = WORLD_WIDTH
+                self.y = random.random() * WORLD_HEIGHT
             elif side == 2:  # Bottom
-                self.x = random.random() * SCREEN_WIDTH
-                self.y = SCREEN_HEIGHT
+                self.x = random.random() * WORLD_WIDTH
+                self.y = WORLD_HEIGHT
             else:  # Left
                 self.x = 0
-                self.y = random.random() * SCREEN_HEIGHT
+                self.y = random.random() * WORLD_HEIGHT
         else:
             self.x = x
             self.y = y
@@ -570,6 +750,11 @@ class EnemyShip:
             self.erratic_movement_timer = 0
             self.phase_transition_timer = 0
     
+    @property
+    def render_kind(self):
+        """Render style of this ship (its type)"""
+        return self.type
+    
     def get_max_health(self):
         """Get max health based on type"""
         if self.type == 'basic':
@@ -602,13 +787,7 @@ class EnemyShip:
     
     def get_color(self):
         """Get color based on type"""
-        if self.type == 'basic':
-            return (255, 68, 68)  # Red
-        elif self.type == 'advanced':
-            return (170, 68, 255)  # Purple
-        elif self.type == 'boss':
-            return (255, 0, 0)  # Bright red
-        return (255, 68, 68)
+        return ENEMY_COLORS.get(self.type, ENEMY_COLORS['basic'])
     
     def normalize_angle(self, angle):
         """Normalize angle to -π to π"""
@@ -700,8 +879,8 @@ class EnemyShip:
         predicted_x = target['ship'].x + target['ship'].velocity_x * time_to_reach
         predicted_y = target['ship'].y + target['ship'].velocity_y * time_to_reach
         # Wrap coordinates
-        predicted_x = ((predicted_x % SCREEN_WIDTH) + SCREEN_WIDTH) % SCREEN_WIDTH
-        predicted_y = ((predicted_y % SCREEN_HEIGHT) + SCREEN_HEIGHT) % SCREEN_HEIGHT
+        predicted_x = ((predicted_x % WORLD_WIDTH) + WORLD_WIDTH) % WORLD_WIDTH
+        predicted_y = ((predicted_y % WORLD_HEIGHT) + WORLD_HEIGHT) % WORLD_HEIGHT
         return {
             'x': predicted_x,
             'y': predicted_y,
@@ -850,6 +1029,9 @@ class EnemyShip:
         
         # Phase transition effects
         if old_phase != self.boss_phase:
+            if telemetry_events is not None:
+                telemetry_events.append((EVENT_BOSS_PHASE, tick, ENTITY_NONE, ENEMY_ENTITIES[self.type],
+                                         self.x, self.y, self.boss_phase))
             self.phase_transition_timer = 60
             self.shield_active = True
             self.shield_duration = 30
@@ -893,6 +1075,9 @@ class EnemyShip:
         if self.shield_cooldown <= 0 and not self.shield_active:
             shield_chance = 0.01 if self.type == 'advanced' else 0.005
             if random.random() < shield_chance:
+                if telemetry_events is not None:
+                    telemetry_events.append((EVENT_SHIELD, tick, ENEMY_ENTITIES[self.type], ENTITY_NONE,
+                                             self.x, self.y, 60))
                 self.shield_active = True
                 self.shield_duration = 60
                 self.shield_cooldown = self.shield_cooldown_max
@@ -909,6 +1094,9 @@ class EnemyShip:
         if self.shield_cooldown > 0:
             self.shield_cooldown -= 1
         elif self.boss_phase >= 2 and not self.shield_active and random.random() < 0.01:
+            if telemetry_events is not None:
+                telemetry_events.append((EVENT_SHIELD, tick, ENEMY_ENTITIES[self.type], ENTITY_NONE,
+                                         self.x, self.y, 90))
             self.shield_active = True
             self.shield_duration = 90
             self.shield_cooldown = 300
@@ -918,9 +1106,12 @@ class EnemyShip:
         if self.type != 'boss' or self.teleport_cooldown > 0:
             return False
         if self.boss_phase == 3 and self.health <= 1 and random.random() < 0.02:
-            self.x = random.random() * SCREEN_WIDTH
-            self.y = random.random() * SCREEN_HEIGHT
+            self.x = random.random() * WORLD_WIDTH
+            self.y = random.random() * WORLD_HEIGHT
             self.teleport_cooldown = 180
+            if telemetry_events is not None:
+                telemetry_events.append((EVENT_TELEPORT, tick, ENEMY_ENTITIES[self.type], ENTITY_NONE,
+                                         self.x, self.y, 0))
             return True
         return False
     
@@ -987,10 +1178,17 @@ class EnemyShip:
     
     def make_decision(self, asteroids, enemy_ships, ai_ships, player_ship, bullets, enemy_bullets):
         """Make AI decision for enemy ship"""
+        self.update_timers(enemy_bullets)
+        self.think(asteroids, enemy_ships, ai_ships, player_ship, bullets, enemy_bullets)
+    
+    def update_timers(self, enemy_bullets):
+        """Per-tick cooldowns, burst fire, shields and phases (run even when think is skipped)"""
         if self.fire_cooldown > 0:
             self.fire_cooldown -= 1
         if self.type == 'boss' and self.teleport_cooldown > 0:
             self.teleport_cooldown -= 1
+        if self.type == 'boss' and self.phase_transition_timer > 0:
+            self.phase_transition_timer -= 1
         
         # Update burst fire
         if self.burst_fire_active:
@@ -1006,6 +1204,10 @@ class EnemyShip:
         if self.type == 'boss':
             self.update_boss_attack_pattern()
             self.update_boss_shield()
+    
+    def think(self, asteroids, enemy_ships, ai_ships, player_ship, bullets, enemy_bullets):
+        """Decide target, movement and firing"""
+        if self.type == 'boss':
             self.apply_erratic_movement()
             if self.boss_teleport():
                 return  # Teleported, skip movement
@@ -1073,72 +1275,17 @@ class EnemyShip:
         
         # Wrap around screen edges
         if self.x < 0:
-            self.x = SCREEN_WIDTH
-        elif self.x > SCREEN_WIDTH:
+            self.x = WORLD_WIDTH
+        elif self.x > WORLD_WIDTH:
             self.x = 0
         if self.y < 0:
-            self.y = SCREEN_HEIGHT
-        elif self.y > SCREEN_HEIGHT:
+            self.y = WORLD_HEIGHT
+        elif self.y > WORLD_HEIGHT:
             self.y = 0
     
     def draw(self, screen):
         """Draw enemy ship"""
-        # Draw shield if active
-        if self.shield_active:
-            if self.type == 'boss':
-                shield_radius = self.size + 10
-                pygame.draw.circle(screen, YELLOW, (int(self.x), int(self.y)), 
-                                 int(shield_radius), 3)
-            else:
-                shield_radius = self.shield_radius
-                pygame.draw.circle(screen, RED, (int(self.x), int(self.y)), 
-                                 int(shield_radius), 2)
-        
-        # Phase transition effect for boss
-        if self.type == 'boss' and self.phase_transition_timer > 0:
-            pygame.draw.circle(screen, WHITE, (int(self.x), int(self.y)), 
-                             int(self.size + 15), 4)
-            self.phase_transition_timer -= 1
-        
-        # Draw ship (triangle)
-        nose_x = self.x + math.cos(self.angle) * self.size
-        nose_y = self.y + math.sin(self.angle) * self.size
-        
-        left_x = self.x - math.cos(self.angle - 2.5) * self.size * 0.6
-        left_y = self.y - math.sin(self.angle - 2.5) * self.size * 0.6
-        
-        right_x = self.x - math.cos(self.angle + 2.5) * self.size * 0.6
-        right_y = self.y + math.sin(self.angle + 2.5) * self.size * 0.6
-        
-        points = [(nose_x, nose_y), (left_x, left_y), (right_x, right_y)]
-        
-        if self.type == 'boss':
-            # Boss: Hexagonal shape
-            hex_points = []
-            for i in range(6):
-                angle_hex = (i * math.pi) / 3 + self.angle
-                hex_x = self.x + math.cos(angle_hex) * self.size
-                hex_y = self.y + math.sin(angle_hex) * self.size
-                hex_points.append((hex_x, hex_y))
-            pygame.draw.polygon(screen, self.color, hex_points)
-            pygame.draw.polygon(screen, WHITE, hex_points, 2)
-        else:
-            pygame.draw.polygon(screen, self.color, points)
-            pygame.draw.polygon(screen, WHITE, points, 2)
-        
-        # Draw health bar
-        if self.health < self.max_health:
-            bar_width = 30
-            bar_height = 4
-            bar_x = self.x - bar_width / 2
-            bar_y = self.y - self.size - 10
-            
-            # Background
-            pygame.draw.rect(screen, RED, (bar_x, bar_y, bar_width, bar_height))
-            # Health
-            health_width = bar_width * (self.health / self.max_health)
-            health_color = GREEN if self.health > self.max_health * 0.5 else YELLOW
-            pygame.draw.rect(screen, health_color, (bar_x, bar_y, health_width, bar_height))
+        draw_ships(screen, [self])
     
     def get_position(self):
         """Get position for collision detection"""
@@ -1156,17 +1303,17 @@ class Asteroid:
             # Spawn at edge of screen
             side = random.randint(0, 3)
             if side == 0:  # Top
-                self.x = random.random() * SCREEN_WIDTH
+                self.x = random.random() * WORLD_WIDTH
                 self.y = 0
             elif side == 1:  # Right
-                self.x = SCREEN_WIDTH
-                self.y = random.random() * SCREEN_HEIGHT
+                self.x = WORLD_WIDTH
+                self.y = random.random() * WORLD_HEIGHT
             elif side == 2:  # Bottom
-                self.x = random.random() * SCREEN_WIDTH
-                self.y = SCREEN_HEIGHT
+                self.x = random.random() * WORLD_WIDTH
+                self.y = WORLD_HEIGHT
             else:  # Left
                 self.x = 0
-                self.y = random.random() * SCREEN_HEIGHT
+                self.y = random.random() * WORLD_HEIGHT
         else:
             self.x = x
             self.y = y
@@ -1204,12 +1351,12 @@ class Asteroid:
         
         # Wrap around screen edges
         if self.x < -self.size:
-            self.x = SCREEN_WIDTH + self.size
-        elif self.x > SCREEN_WIDTH + self.size:
+            self.x = WORLD_WIDTH + self.size
+        elif self.x > WORLD_WIDTH + self.size:
             self.x = -self.size
         if self.y < -self.size:
-            self.y = SCREEN_HEIGHT + self.size
-        elif self.y > SCREEN_HEIGHT + self.size:
+            self.y = WORLD_HEIGHT + self.size
+        elif self.y > WORLD_HEIGHT + self.size:
             self.y = -self.size
     
     def draw(self, screen):
@@ -1254,12 +1401,12 @@ class Bullet:
         
         # Wrap around screen edges
         if self.x < 0:
-            self.x = SCREEN_WIDTH
-        elif self.x > SCREEN_WIDTH:
+            self.x = WORLD_WIDTH
+        elif self.x > WORLD_WIDTH:
             self.x = 0
         if self.y < 0:
-            self.y = SCREEN_HEIGHT
-        elif self.y > SCREEN_HEIGHT:
+            self.y = WORLD_HEIGHT
+        elif self.y > WORLD_HEIGHT:
             self.y = 0
     
     def is_alive(self):
@@ -1311,38 +1458,733 @@ def init_game():
     
     score = 0
 
-def main():
-    """Main game loop"""
-    global game_running, score, player_ship_active, num_ai_ships, ai_ships, bullets, asteroids, enemy_ships, enemy_bullets
-    global anchor_player_ship, anchor_alpha_ship, num_enemy_ships, num_boss_ships
-    global SCREEN_WIDTH, SCREEN_HEIGHT
+def apply_settings(settings):
+    """Apply gameplay settings (a Menu.get_settings() dict) to the world"""
+    global num_ai_ships, num_enemy_ships, num_boss_ships, player_ship_active
+    global anchor_player_ship, anchor_alpha_ship, WORLD_WIDTH, WORLD_HEIGHT
+    global alpha_attack_enabled, formation_type, auto_assign_roles, adaptive_formation_enabled
+    global multi_target_mode, escort_mode, tactical_sequences_enabled
+    global formation_transitions_enabled, advanced_flanking_enabled
+    global ml_enabled, ml_mode, marl_enabled, marl_training
+    
+    num_ai_ships = settings['num_ai_ships']
+    num_enemy_ships = settings['num_enemy_ships']
+    num_boss_ships = settings['num_boss_ships']
+    player_ship_active = settings['player_ship_active']
+    anchor_player_ship = settings['anchor_player_ship']
+    anchor_alpha_ship = settings['anchor_alpha_ship']
+    WORLD_WIDTH = settings['world_width']
+    WORLD_HEIGHT = settings['world_height']
+    alpha_attack_enabled = settings['alpha_attack_enabled']
+    if telemetry_events is not None and settings['formation_type'] != formation_type:
+        telemetry_events.append((EVENT_FORMATION, tick, ENTITY_NONE, ENTITY_AI, 0.0, 0.0,
+                                 FORMATION_TYPES.index(settings['formation_type'])))
+    formation_type = settings['formation_type']
+    auto_assign_roles = settings['auto_assign_roles']
+    adaptive_formation_enabled = settings['adaptive_formation']
+    multi_target_mode = settings['multi_target_mode']
+    escort_mode = settings['escort_mode']
+    tactical_sequences_enabled = settings['tactical_sequences']
+    formation_transitions_enabled = settings['formation_transitions']
+    advanced_flanking_enabled = settings['advanced_flanking']
+    ml_enabled = settings['ml_enabled']
+    ml_mode = settings['ml_mode']
+    marl_enabled = settings['marl_enabled']
+    marl_training = settings['marl_training']
+    ml_tuner.configure(ai_ships, ml_enabled and ml_mode in ML_PARAMETER_MODES,
+                       ml_enabled and ml_mode in ML_PRIORITY_MODES)
+
+def apply_ai_lod(settings):
+    """Enable or disable AI level of detail from the menu settings
+
+    Kept out of apply_settings: scheduling depends on wall-clock time, so
+    it is never used while recording or replaying.
+    """
+    global ai_scheduler
+    if not settings['ai_lod'] or recorder is not None:
+        ai_scheduler = None
+        return
+    if ai_scheduler is None:
+        ai_scheduler = AIScheduler()
+    ai_scheduler.budget_ms = settings['ai_budget_ms'] or None
+
+def reset_world(seed=None):
+    """Start a new game: player ship, asteroids, enemies and AI ships"""
+    global ship, shoot_cooldown, ai_ships, tick
+    
+    if seed is not None:
+        random.seed(seed)
+    ship = Ship()
+    init_game()
+    
+    # Initialize AI ships
+    ai_ships = []
+    for i in range(num_ai_ships):
+        ai_ship = AIShip()
+        if i == 0:
+            ai_ship.is_alpha = True
+        ai_ships.append(ai_ship)
+    
+    shoot_cooldown = 0
+    tick = 0
+
+def read_player_input(keys_pressed):
+    """Pack the held player keys into input bits"""
+    player_input = 0
+    for key, bit in PLAYER_KEYS.items():
+        if keys_pressed.get(key, False):
+            player_input |= bit
+    return player_input
+
+def nearest_threat_distances(ships, *groups):
+    """Distance from each ship to the nearest object of the groups (inf if there are none)"""
+    threats = [(obj.x, obj.y) for group in groups for obj in group]
+    if not threats:
+        return np.full(len(ships), np.inf)
+    offsets = np.array([(s.x, s.y) for s in ships])[:, None, :] - np.array(threats)[None, :, :]
+    return np.sqrt(np.einsum('ijk,ijk->ij', offsets, offsets).min(axis=1))
+
+def policy_actions(policy):
+    """Actions of every AI ship from one policy call over all their observations"""
+    global policy_observations
+    from marl_environment import ROTATIONS, ObservationBuilder, policy_to_actions
+    if policy_observations is None or policy_observations.num_agents != len(ai_ships):
+        policy_observations = ObservationBuilder(len(ai_ships))
+    observations = policy_observations.build(ai_ships, asteroids, enemy_ships)
+    actions = policy_to_actions(policy(observations)).tolist()
+    return {ai_ship: (ROTATIONS[rotation], thrust, fire, shield)
+            for ai_ship, (rotation, thrust, fire, shield) in zip(ai_ships, actions)}
+
+def step_world(player_input=0, ai_actions=None):
+    """Advance the world by one tick
+
+    ai_actions maps AI ships to external (rotation, thrust, fire, shield)
+    actions; ships without one use their built-in AI. External actions
+    are not part of replay recordings.
+    """
+    global score, ai_ships, bullets, asteroids, enemy_ships, enemy_bullets
+    global ship, shoot_cooldown, tick
+    
+    if recorder is not None:
+        recorder.record(tick, player_input, snapshot)
+        step_start = time.perf_counter()
+    tick += 1
+    
+    # Handle input
+    if player_ship_active:
+        if player_input & INPUT_LEFT:
+            ship.rotate(-1)
+        if player_input & INPUT_RIGHT:
+            ship.rotate(1)
+        if player_input & INPUT_THRUST:
+            ship.thrust()
+        if player_input & INPUT_BACKWARD:
+            ship.move_backward()
+        if player_input & INPUT_FIRE and shoot_cooldown <= 0:
+            # Fire bullet
+            bullet_x = ship.x + math.cos(ship.angle) * ship.size
+            bullet_y = ship.y + math.sin(ship.angle) * ship.size
+            bullets.append(Bullet(bullet_x, bullet_y, ship.angle))
+            shoot_cooldown = 10
+        if player_input & INPUT_HYPERSPACE:
+            ship.hyperspace()
+        if player_input & INPUT_SHIELD:
+            if telemetry_events is not None and not ship.shield_active:
+                telemetry_events.append((EVENT_SHIELD, tick, ENTITY_PLAYER, ENTITY_NONE, ship.x, ship.y, 0))
+            ship.shield_active = True
+        else:
+            ship.shield_active = False
+    
+    if shoot_cooldown > 0:
+        shoot_cooldown -= 1
+
+    # Update game objects
+    if player_ship_active:
+        ship.update()
+
+    # Update AI ships count based on settings
+    while len(ai_ships) < num_ai_ships:
+        ai_ship = AIShip()
+        if len(ai_ships) == 0:
+            ai_ship.is_alpha = True
+            if telemetry_events is not None:
+                telemetry_events.append((EVENT_ALPHA, tick, ENTITY_AI, ENTITY_NONE, ai_ship.x, ai_ship.y, 0))
+        ai_ships.append(ai_ship)
+    while len(ai_ships) > num_ai_ships:
+        ai_ships.pop()
+
+    # Update enemy ships count based on settings
+    basic_enemies = [e for e in enemy_ships if e.type == 'basic']
+    advanced_enemies = [e for e in enemy_ships if e.type == 'advanced']
+    boss_enemies = [e for e in enemy_ships if e.type == 'boss']
+
+    total_enemies = len(basic_enemies) + len(advanced_enemies)
+    while total_enemies < num_enemy_ships:
+        enemy_type = 'advanced' if random.random() < 0.3 else 'basic'
+        enemy_ships.append(EnemyShip(ship_type=enemy_type))
+        total_enemies += 1
+
+    while total_enemies > num_enemy_ships:
+        if basic_enemies:
+            enemy_ships.remove(basic_enemies.pop())
+        elif advanced_enemies:
+            enemy_ships.remove(advanced_enemies.pop())
+        total_enemies -= 1
+
+    while len(boss_enemies) < num_boss_ships:
+        enemy_ships.append(EnemyShip(ship_type='boss'))
+        boss_enemies.append(enemy_ships[-1])
+
+    while len(boss_enemies) > num_boss_ships:
+        enemy_ships.remove(boss_enemies.pop())
+
+    # Phase 5.1/5.2: ML-tuned AI ship parameters and behaviours
+    if ml_enabled:
+        ml_tuner.update(tick, ai_ships, asteroids, enemy_ships)
+
+    # Sample ML training data (every ML_INFERENCE_INTERVAL ticks, like game.js)
+    if training_collector is not None and tick % ML_INFERENCE_INTERVAL == 0:
+        training_collector.collect(tick, ai_ships, asteroids, enemy_ships)
+
+    # AI ships driven by a MARL policy (local or served); never while
+    # recording, since replays only hold the player's input
+    if ai_policy is not None and recorder is None and not ai_actions and ai_ships:
+        ai_actions = policy_actions(ai_policy)
+
+    # Update AI ships
+    if ai_scheduler is None:
+        for ai_ship in ai_ships:
+            action = ai_actions.get(ai_ship) if ai_actions else None
+            if action is not None:
+                ai_ship.apply_action(*action)
+            else:
+                ai_ship.make_decision(asteroids, enemy_ships, ai_ships, ship if player_ship_active else None)
+            ai_ship.update()
+    else:
+        # Level of detail: only ships due this tick think, the others coast
+        player = ship if player_ship_active else None
+        scheduled = []
+        for ai_ship in ai_ships:
+            action = ai_actions.get(ai_ship) if ai_actions else None
+            if action is not None:
+                ai_ship.apply_action(*action)
+            else:
+                ai_ship.update_timers()
+                scheduled.append(ai_ship)
+        if scheduled:
+            ai_scheduler.run(tick, scheduled, nearest_threat_distances(scheduled, enemy_ships, asteroids),
+                             lambda s: s.think(asteroids, enemy_ships, ai_ships, player))
+        for ai_ship in ai_ships:
+            ai_ship.update()
+
+    # Update asteroids
+    for asteroid in asteroids:
+        asteroid.update()
+
+    # Update enemy ships
+    if ai_scheduler is None:
+        for enemy_ship in enemy_ships[:]:
+            enemy_ship.make_decision(asteroids, enemy_ships, ai_ships, 
+                                   ship if player_ship_active else None, 
+                                   bullets, enemy_bullets)
+            enemy_ship.update()
+    elif enemy_ships:
+        player = ship if player_ship_active else None
+        scheduled = enemy_ships[:]
+        for enemy_ship in scheduled:
+            enemy_ship.update_timers(enemy_bullets)
+        targets = ai_ships + [player] if player is not None else ai_ships
+        # Bullets only matter once they are near the evasion radius
+        distances = np.minimum(nearest_threat_distances(scheduled, targets),
+                               nearest_threat_distances(scheduled, bullets) * BULLET_THREAT_SCALE)
+        ai_scheduler.run(tick, scheduled, distances,
+                         lambda s: s.think(asteroids, enemy_ships, ai_ships, player, bullets, enemy_bullets))
+        for enemy_ship in scheduled:
+            enemy_ship.update()
+
+    # Update bullets
+    bullets = [b for b in bullets if b.is_alive()]
+    for bullet in bullets:
+        bullet.update()
+
+    # Update enemy bullets
+    enemy_bullets = [b for b in enemy_bullets if b.is_alive()]
+    for bullet in enemy_bullets:
+        bullet.update()
+
+    # Check bullet-asteroid collisions
+    for bullet in bullets[:]:
+        for asteroid in asteroids[:]:
+            if check_collision(bullet, asteroid):
+                bullets.remove(bullet)
+                asteroids.remove(asteroid)
+                score += 100
+                if telemetry_events is not None:
+                    telemetry_events.append((EVENT_KILL, tick, ENTITY_NONE, ENTITY_ASTEROID,
+                                             asteroid.x, asteroid.y, 100))
+                break
+
+    # Check bullet-enemy ship collisions
+    for bullet in bullets[:]:
+        for enemy_ship in enemy_ships[:]:
+            if check_collision(bullet, enemy_ship):
+                bullets.remove(bullet)
+                enemy_ship.health -= 1
+                if enemy_ship.health <= 0:
+                    # Award points based on enemy type
+                    if enemy_ship.type == 'boss':
+                        points = 500
+                    elif enemy_ship.type == 'advanced':
+                        points = 200
+                    else:
+                        points = 100
+                    score += points
+                    enemy_ships.remove(enemy_ship)
+                    if telemetry_events is not None:
+                        telemetry_events.append((EVENT_KILL, tick, ENTITY_NONE, ENEMY_ENTITIES[enemy_ship.type],
+                                                 enemy_ship.x, enemy_ship.y, points))
+                elif telemetry_events is not None:
+                    telemetry_events.append((EVENT_HIT, tick, ENTITY_NONE, ENEMY_ENTITIES[enemy_ship.type],
+                                             enemy_ship.x, enemy_ship.y, enemy_ship.health))
+                break
+
+    # Check AI bullet-enemy ship collisions
+    for ai_ship in ai_ships:
+        # AI ships fire bullets that are in the bullets array
+        pass  # Already handled above
+
+    # Check enemy bullet-player ship collisions
+    if player_ship_active:
+        for bullet in enemy_bullets[:]:
+            if check_collision(bullet, ship):
+                if not ship.shield_active:
+                    report_game_over(ENTITY_ENEMY_BULLET)
+                    init_game()
+                    ship = Ship()
+                    break
+                else:
+                    enemy_bullets.remove(bullet)
+                    if telemetry_events is not None:
+                        telemetry_events.append((EVENT_BLOCK, tick, ENTITY_ENEMY_BULLET, ENTITY_PLAYER,
+                                                 ship.x, ship.y, 0))
+
+    # Check enemy bullet-AI ship collisions
+    for bullet in enemy_bullets[:]:
+        for ai_ship in ai_ships[:]:
+            if check_collision(bullet, ai_ship):
+                enemy_bullets.remove(bullet)
+                if not ai_ship.shield_active:
+                    ai_ship.health -= 1
+                    if ai_ship.health <= 0:
+                        ai_ships.remove(ai_ship)
+                    if telemetry_events is not None:
+                        telemetry_events.append((EVENT_KILL if ai_ship.health <= 0 else EVENT_HIT, tick,
+                                                 ENTITY_ENEMY_BULLET, ENTITY_AI, ai_ship.x, ai_ship.y,
+                                                 ai_ship.health))
+                elif telemetry_events is not None:
+                    telemetry_events.append((EVENT_BLOCK, tick, ENTITY_ENEMY_BULLET, ENTITY_AI,
+                                             ai_ship.x, ai_ship.y, ai_ship.health))
+                break
+
+    # Check ship-asteroid collisions
+    if player_ship_active:
+        for asteroid in asteroids:
+            if check_collision(ship, asteroid):
+                if not ship.shield_active:
+                    report_game_over(ENTITY_ASTEROID)
+                    init_game()
+                    ship = Ship()
+                    break
+
+    # Check enemy ship-player ship collisions
+    if player_ship_active:
+        for enemy_ship in enemy_ships:
+            if check_collision(ship, enemy_ship):
+                if not ship.shield_active:
+                    report_game_over(ENEMY_ENTITIES[enemy_ship.type])
+                    init_game()
+                    ship = Ship()
+                    break
+
+    if recorder is not None:
+        recorder.sim_time += time.perf_counter() - step_start
+
+def report_game_over(cause):
+    """Record the player's death (the telemetry writer prints it when enabled)"""
+    if telemetry_events is not None:
+        telemetry_events.append((EVENT_GAME_OVER, tick, cause, ENTITY_PLAYER, ship.x, ship.y, score))
+    else:
+        print(f"Game Over! Final Score: {score}")
+
+def capture_world():
+    """Capture an immutable render snapshot of the current world"""
+    ships = enemy_ships + ai_ships + ([ship] if player_ship_active else [])
+    player_position = (ship.x, ship.y) if player_ship_active else None
+    alpha = next((ai_ship for ai_ship in ai_ships if ai_ship.is_alpha), None)
+    alpha_position = (alpha.x, alpha.y) if alpha else None
+    return capture_frame(tick, score, ships, asteroids, bullets, enemy_bullets,
+                         (WORLD_WIDTH, WORLD_HEIGHT), player_position, alpha_position)
+
+# World snapshots: every entity field packed with precompiled structs.
+# A layout lists (attribute, kind) where kind is a struct code, 'rgb' for a
+# color tuple, or a tuple of the strings the attribute can hold. Reference
+# fields (AIShip.alpha_ship, EnemyShip.target, ...) are never reassigned
+# after __init__ and are restored to their defaults.
+FORMATION_TYPES = ('arrowhead', 'line', 'circle', 'diamond', 'wedge')
+ENEMY_TYPES = ('basic', 'advanced', 'boss')
+BEHAVIOR_STATES = ('pursuit', 'attack', 'evade', 'retreat')
+ATTACK_PATTERNS = ('normal', 'spread', 'rapid', 'circular')
+ML_BEHAVIORS = (None,) + BEHAVIORS  # None: the fixed priority cascade
+
+class _Memo(dict):
+    """Dict that computes and keeps missing values (a game only uses a handful of colors)"""
+    def __init__(self, compute):
+        super().__init__()
+        self.compute = compute
+
+    def __missing__(self, key):
+        value = self[key] = self.compute(key)
+        return value
+
+RGB_CODES = _Memo(lambda c: (c[0] << 16) | (c[1] << 8) | c[2])
+RGB_COLORS = _Memo(lambda v: ((v >> 16) & 255, (v >> 8) & 255, v & 255))
+
+class StateLayout:
+    """Packs the fields of one entity class into a fixed-size record"""
+    def __init__(self, cls, fields, defaults=None):
+        self.cls = cls
+        self.names = [name for name, _ in fields]
+        self.get = operator.attrgetter(*self.names)
+        self.defaults = defaults or {}
+        self.encoders = []
+        self.decoders = []
+        codes = []
+        for i, (name, kind) in enumerate(fields):
+            if isinstance(kind, tuple):
+                codes.append('B')
+                self.encoders.append((i, {value: n for n, value in enumerate(kind)}.__getitem__))
+                self.decoders.append((i, kind.__getitem__))
+            elif kind == 'rgb':
+                codes.append('I')
+                self.encoders.append((i, RGB_CODES.__getitem__))
+                self.decoders.append((i, RGB_COLORS.__getitem__))
+            else:
+                codes.append(kind)
+        self.codes = ''.join(codes)
+        self.struct = struct.Struct('<' + self.codes)
+        self.size = self.struct.size
+        self.arrays = {1: self.struct}
+    
+    def array_struct(self, count):
+        """Struct for `count` consecutive records"""
+        packer = self.arrays.get(count)
+        if packer is None:
+            packer = self.arrays[count] = struct.Struct('<' + self.codes * count)
+        return packer
+    
+    def pack(self, obj):
+        """Encode obj as bytes"""
+        values = self.get(obj)
+        if self.encoders:
+            values = list(values)
+            for i, encode in self.encoders:
+                values[i] = encode(values[i])
+        return self.struct.pack(*values)
+    
+    def unpack(self, data, offset):
+        """Decode a record at offset into a new instance"""
+        values = self.struct.unpack_from(data, offset)
+        if self.decoders:
+            values = list(values)
+            for i, decode in self.decoders:
+                values[i] = decode(values[i])
+        obj = self.cls.__new__(self.cls)
+        state = obj.__dict__
+        state.update(zip(self.names, values))
+        if self.defaults:
+            state.update(self.defaults)
+        return obj
+    
+    def pack_many(self, objs):
+        """Encode a list of objects as consecutive records in one struct call"""
+        if not objs:
+            return b''
+        values = list(chain.from_iterable(map(self.get, objs)))
+        width = len(self.names)
+        for i, encode in self.encoders:
+            values[i::width] = map(encode, values[i::width])
+        return self.array_struct(len(objs)).pack(*values)
+    
+    def unpack_many(self, data, offset, count):
+        """Decode `count` consecutive records at offset into a list of new instances"""
+        if not count:
+            return []
+        values = list(self.array_struct(count).unpack_from(data, offset))
+        width = len(self.names)
+        for i, decode in self.decoders:
+            values[i::width] = map(decode, values[i::width])
+        cls, new, names, defaults = self.cls, self.cls.__new__, self.names, self.defaults
+        objs = []
+        for row in zip(*[iter(values)] * width):
+            obj = new(cls)
+            state = obj.__dict__
+            state.update(zip(names, row))
+            if defaults:
+                state.update(defaults)
+            objs.append(obj)
+        return objs
+
+SHIP_FIELDS = [('x', 'd'), ('y', 'd'), ('angle', 'd'), ('velocity_x', 'd'), ('velocity_y', 'd'),
+               ('rotation_speed', 'd'), ('thrust_power', 'd'), ('friction', 'd'),
+               ('max_velocity', 'd'), ('size', 'i'), ('radius', 'i'), ('shield_active', '?'),
+               ('shield_radius', 'i'), ('shield_force', 'd')]
+BULLET_FIELDS = [('x', 'd'), ('y', 'd'), ('angle', 'd'), ('speed', 'd'), ('velocity_x', 'd'),
+                 ('velocity_y', 'd'), ('radius', 'i'), ('lifetime', 'i'), ('color', 'rgb')]
+ENEMY_FIELDS = [('type', ENEMY_TYPES), ('x', 'd'), ('y', 'd'), ('velocity_x', 'd'),
+                ('velocity_y', 'd'), ('angle', 'd'), ('rotation_speed', 'd'),
+                ('thrust_power', 'd'), ('friction', 'd'), ('max_velocity', 'd'), ('health', 'i'),
+                ('max_health', 'i'), ('fire_cooldown', 'i'), ('fire_rate', 'i'),
+                ('bullet_speed', 'd'), ('attack_range', 'd'), ('detection_radius', 'd'),
+                ('evasion_radius', 'd'), ('behavior_state', BEHAVIOR_STATES), ('flank_angle', 'd'),
+                ('size', 'i'), ('radius', 'd'), ('color', 'rgb'), ('target_angle', 'd'),
+                ('target_score', 'd'), ('burst_fire_active', '?'), ('burst_fire_timer', 'i'),
+                ('burst_fire_count', 'i'), ('burst_fire_base_angle', 'd'),
+                ('burst_fire_spread', 'd'), ('shield_active', '?'), ('shield_cooldown', 'i'),
+                ('shield_duration', 'i')]
+ENEMY_DEFAULTS = {'target': None, 'predicted_position': None, 'cover_asteroid': None}
+
+SHIP_LAYOUT = StateLayout(Ship, SHIP_FIELDS)
+AI_SHIP_LAYOUT = StateLayout(AIShip, SHIP_FIELDS + [
+    ('detection_radius', 'd'), ('avoidance_force', 'd'), ('thrust_frequency', 'd'),
+    ('target_angle', 'd'), ('shoot_cooldown', 'i'), ('firing_range', 'd'),
+    ('imminent_threat_distance', 'd'), ('collision_angle_threshold', 'd'),
+    ('min_asteroid_size', 'd'), ('rapid_fire_cooldown', 'i'), ('enemy_detection_radius', 'd'),
+    ('enemy_firing_range', 'd'), ('flock_radius', 'd'), ('separation_distance', 'd'),
+    ('alignment_radius', 'd'), ('cohesion_radius', 'd'), ('flock_weight', 'd'),
+    ('max_health', 'i'), ('health', 'i'), ('shield_cooldown', 'i'), ('shield_duration', 'i'),
+    ('is_alpha', '?'), ('formation_angle', 'd'), ('formation_distance', 'd'),
+    ('formation_spread', 'd'), ('alpha_attack_cooldown', 'i'), ('alpha_attack_cooldown_max', 'i'),
+    ('formation_type', FORMATION_TYPES), ('ml_threat_band', 'i'), ('ml_priority_rules', 'i'),
+    ('ml_behavior', ML_BEHAVIORS)],
+    defaults={'alpha_ship': None, 'formation_position': None, 'alpha_attack_target': None,
+              'role': None, 'role_abilities': AI_ROLE_ABILITIES})
+ASTEROID_LAYOUT = StateLayout(Asteroid, [
+    ('x', 'd'), ('y', 'd'), ('velocity_x', 'd'), ('velocity_y', 'd'), ('size', 'd'),
+    ('radius', 'd'), ('rotation', 'd'), ('rotation_speed', 'd')])
+BULLET_LAYOUT = StateLayout(Bullet, BULLET_FIELDS)
+ENEMY_BULLET_LAYOUT = StateLayout(EnemyBullet, BULLET_FIELDS)
+ENEMY_LAYOUTS = [
+    StateLayout(EnemyShip, ENEMY_FIELDS + [
+        ('shield_radius', 'i'), ('shield_force', 'd'), ('shield_cooldown_max', 'i')],
+        ENEMY_DEFAULTS),
+    None,
+    StateLayout(EnemyShip, ENEMY_FIELDS + [
+        ('boss_phase', 'i'), ('teleport_cooldown', 'i'), ('attack_pattern', ATTACK_PATTERNS),
+        ('attack_pattern_timer', 'i'), ('rapid_fire_burst', 'i'), ('rapid_fire_burst_count', 'i'),
+        ('erratic_movement_timer', 'i'), ('phase_transition_timer', 'i')],
+        ENEMY_DEFAULTS),
+]
+ENEMY_LAYOUTS[1] = ENEMY_LAYOUTS[0]  # Advanced ships share the basic layout
+
+# tick, score, shoot_cooldown, has gauss_next, gauss_next, has ship, then counts of
+# asteroids, asteroid vertices, bullets, enemy bullets, AI ships and enemy ships
+SNAPSHOT_HEADER = struct.Struct('<qqi?d?6I')
+RNG_STATE = struct.Struct('<625I')
+
+def snapshot():
+    """Encode the full simulation state (entities, score, RNG) as bytes"""
+    rng_version, rng_state, gauss_next = random.getstate()
+    vertex_counts = array('i', [len(asteroid.vertices) for asteroid in asteroids])
+    parts = [
+        SNAPSHOT_HEADER.pack(tick, score, shoot_cooldown, gauss_next is not None, gauss_next or 0.0,
+                             ship is not None, len(asteroids), sum(vertex_counts), len(bullets),
+                             len(enemy_bullets), len(ai_ships), len(enemy_ships)),
+        RNG_STATE.pack(*rng_state),
+    ]
+    if ship is not None:
+        parts.append(SHIP_LAYOUT.pack(ship))
+    parts.append(ASTEROID_LAYOUT.pack_many(asteroids))
+    parts.append(vertex_counts.tobytes())
+    parts.append(array('d', chain.from_iterable(chain.from_iterable(
+        asteroid.vertices for asteroid in asteroids))).tobytes())
+    parts.append(BULLET_LAYOUT.pack_many(bullets))
+    parts.append(ENEMY_BULLET_LAYOUT.pack_many(enemy_bullets))
+    parts.append(AI_SHIP_LAYOUT.pack_many(ai_ships))
+    parts.extend(ENEMY_LAYOUTS[ENEMY_TYPES.index(enemy_ship.type)].pack(enemy_ship)
+                 for enemy_ship in enemy_ships)
+    return b''.join(parts)
+
+def restore(data):
+    """Restore simulation state encoded by snapshot()"""
+    global tick, score, shoot_cooldown, ship, asteroids, bullets, enemy_bullets
+    global ai_ships, enemy_ships
+    
+    (tick, score, shoot_cooldown, has_gauss, gauss_next, has_ship, num_asteroids, num_vertices,
+     num_bullets, num_enemy_bullets, num_ai, num_enemies) = SNAPSHOT_HEADER.unpack_from(data, 0)
+    offset = SNAPSHOT_HEADER.size
+    random.setstate((3, RNG_STATE.unpack_from(data, offset), gauss_next if has_gauss else None))
+    offset += RNG_STATE.size
+    
+    ship = None
+    if has_ship:
+        ship = SHIP_LAYOUT.unpack(data, offset)
+        offset += SHIP_LAYOUT.size
+    
+    asteroids = ASTEROID_LAYOUT.unpack_many(data, offset, num_asteroids)
+    offset += ASTEROID_LAYOUT.size * num_asteroids
+    counts = array('i')
+    counts.frombytes(data[offset:offset + 4 * num_asteroids])
+    offset += 4 * num_asteroids
+    coords = array('d')
+    coords.frombytes(data[offset:offset + 8 * 2 * num_vertices])
+    offset += 8 * 2 * num_vertices
+    start = 0
+    for asteroid, count in zip(asteroids, counts):
+        it = iter(coords[start:start + 2 * count])
+        asteroid.vertices = list(zip(it, it))
+        start += 2 * count
+    
+    bullets = BULLET_LAYOUT.unpack_many(data, offset, num_bullets)
+    offset += BULLET_LAYOUT.size * num_bullets
+    enemy_bullets = ENEMY_BULLET_LAYOUT.unpack_many(data, offset, num_enemy_bullets)
+    offset += ENEMY_BULLET_LAYOUT.size * num_enemy_bullets
+    ai_ships = AI_SHIP_LAYOUT.unpack_many(data, offset, num_ai)
+    offset += AI_SHIP_LAYOUT.size * num_ai
+    enemy_ships = []
+    for _ in range(num_enemies):
+        layout = ENEMY_LAYOUTS[data[offset]]
+        enemy_ships.append(layout.unpack(data, offset))
+        offset += layout.size
+
+class SimulationThread(threading.Thread):
+    """Runs step_world at a fixed tick rate and publishes render snapshots"""
+    def __init__(self, snapshots, tick_rate=FPS):
+        super().__init__(name="simulation", daemon=True)
+        self.snapshots = snapshots
+        self.tick_rate = tick_rate
+        self.player_input = 0
+        # Profiling: average tick cost and measured tick rate
+        self.tick_ms = 0.0
+        self.ticks_per_second = 0.0
+        self._running = threading.Event()
+        self._running.set()
+        self._tick_lock = threading.Lock()
+        self._stopped = False
+    
+    def pause(self):
+        """Pause the simulation and wait for the tick in flight to finish"""
+        self._running.clear()
+        with self._tick_lock:
+            pass
     
-    # Initialize screen
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    def resume(self):
+        """Resume the simulation"""
+        self._running.set()
+    
+    def stop(self):
+        """Stop the simulation thread"""
+        self._stopped = True
+        self._running.set()
+        self.join()
+    
+    def run(self):
+        """Simulation loop"""
+        period = 1.0 / self.tick_rate
+        next_tick = time.perf_counter()
+        window_start = next_tick
+        window_ticks = 0
+        while not self._stopped:
+            if not self._running.is_set():
+                self._running.wait()
+                next_tick = window_start = time.perf_counter()
+                window_ticks = 0
+                continue
+            with self._tick_lock:
+                if not self._running.is_set():
+                    continue
+                start = time.perf_counter()
+                step_world(self.player_input)
+                self.snapshots.publish(capture_world())
+                elapsed = time.perf_counter() - start
+            self.tick_ms = self.tick_ms * 0.9 + elapsed * 100.0
+            window_ticks += 1
+            now = time.perf_counter()
+            if now - window_start >= 1.0:
+                self.ticks_per_second = window_ticks / (now - window_start)
+                window_start = now
+                window_ticks = 0
+            next_tick += period
+            delay = next_tick - now
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -5 * period:
+                # Too far behind: drop the backlog instead of spiralling
+                next_tick = now
+
+def main(record_path=None, telemetry_path=None, telemetry_format='jsonl', training_data_path=None,
+         policy_server=None):
+    """Main game loop (records a replay, telemetry or ML training data when paths are given)
+
+    policy_server is the socket of a marl_inference server to drive the AI ships.
+    It cannot be combined with record_path: replays do not hold policy actions.
+    """
+    if record_path and policy_server:
+        raise ValueError("a replay cannot be recorded while a policy server drives the AI ships")
+    global game_running, SCREEN_WIDTH, SCREEN_HEIGHT, threaded_simulation, recorder
+    global telemetry_events, training_collector, ai_policy
+    
+    # Initialize screen (frames are drawn on the presenter's surface)
+    window = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
     pygame.display.set_caption("ASTEROIDS - Python Edition | Press ESC or M for Menu")
     clock = pygame.time.Clock()
+    presenter = Presenter(window)
+    canvas_size = (SCREEN_WIDTH, SCREEN_HEIGHT)
     
     # Initialize menu
     menu = Menu(SCREEN_WIDTH, SCREEN_HEIGHT)
     
-    # Initialize game
-    ship = Ship()
-    init_game()
-    
-    # Initialize AI ships
-    if num_ai_ships > 0:
-        ai_ships = []
-        for i in range(num_ai_ships):
-            ai_ship = AIShip()
-            if i == 0:
-                ai_ship.is_alpha = True
-            ai_ships.append(ai_ship)
+    # Game event telemetry, written in the background
+    telemetry = None
+    if telemetry_path:
+        telemetry = TelemetryWriter(telemetry_path, telemetry_format)
+        telemetry_events = telemetry.events
+        telemetry.start()
+    
+    # ML training data collection
+    if training_data_path:
+        training_collector = TrainingDataCollector(training_data_path)
+    
+    # AI ships driven by a served MARL policy
+    if policy_server:
+        from marl_inference import PolicyClient
+        ai_policy = PolicyClient(policy_server)
+    
+    # Initialize game from the menu settings
+    settings = menu.get_settings()
+    apply_settings(settings)
+    if record_path:
+        from replay_pygame import ReplayRecorder
+        seed = random.randrange(2 ** 32)
+        reset_world(seed)
+        recorder = ReplayRecorder(record_path, seed, settings)
+    else:
+        reset_world()
+    apply_ai_lod(settings)
     
     # Keyboard state
     keys_pressed = {}
     keys_just_pressed = {}
     
-    shoot_cooldown = 0
+    # Render snapshots (published by the simulation thread when threaded)
+    snapshots = SnapshotBuffer()
+    simulation = None
+    draw_ms = 0.0
+    
+    # Render quality governor (sheds optional visuals over the frame budget)
+    governor = QualityGovernor(budget_ms=1000.0 / FPS)
+    
+    # Camera over the world (fixed, or following the player or alpha ship)
+    camera = Camera()
     
     # Main game loop
     while game_running:
@@ -1351,6 +2193,10 @@ def main():
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 game_running = False
+            elif event.type == pygame.VIDEORESIZE:
+                # Window resized by the user: only the presentation scale changes
+                SCREEN_WIDTH, SCREEN_HEIGHT = event.w, event.h
+                presenter.resize(pygame.display.get_surface())
             elif event.type == pygame.KEYDOWN:
                 # Toggle menu with ESC or M (prevent ESC from exiting)
                 if event.key in [pygame.K_ESCAPE, pygame.K_m]:
@@ -1370,6 +2216,10 @@ def main():
         
         # Handle menu input
         if menu.visible:
+            # Settings below change world globals, so hold the simulation
+            if simulation is not None:
+                simulation.pause()
+            
             # Use just_pressed for menu navigation (one action per key press)
             menu_keys = {}
             for key in keys_just_pressed:
@@ -1382,237 +2232,109 @@ def main():
             
             # Update game settings from menu
             settings = menu.get_settings()
-            num_ai_ships = settings['num_ai_ships']
-            num_enemy_ships = settings['num_enemy_ships']
-            num_boss_ships = settings['num_boss_ships']
-            player_ship_active = settings['player_ship_active']
-            anchor_player_ship = settings['anchor_player_ship']
-            anchor_alpha_ship = settings['anchor_alpha_ship']
+            apply_settings(settings)
+            if recorder is not None:
+                recorder.settings(tick, settings)
+            apply_ai_lod(settings)
+            threaded_simulation = settings['threaded_simulation']
+            governor.policy = settings['render_quality']
+            camera.mode = settings['camera_mode']
+            presenter.set_mode(settings['render_resolution'])
             
-            # Update screen size if changed
+            # Update screen size if the canvas setting changed
             new_width = settings['canvas_width']
             new_height = settings['canvas_height']
-            if new_width != SCREEN_WIDTH or new_height != SCREEN_HEIGHT:
+            if (new_width, new_height) != canvas_size:
+                canvas_size = (new_width, new_height)
                 SCREEN_WIDTH = new_width
                 SCREEN_HEIGHT = new_height
-                screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-                menu.screen_width = SCREEN_WIDTH
-                menu.screen_height = SCREEN_HEIGHT
+                presenter.resize(pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE))
             
             # Skip game updates when menu is open
+            screen = presenter.surface
+            menu.screen_width, menu.screen_height = screen.get_size()
             menu.draw(screen)
-            pygame.display.flip()
+            presenter.present()
             clock.tick(FPS)
             continue
         
-        # Handle input
-        if player_ship_active:
-            if keys_pressed.get(pygame.K_LEFT, False):
-                ship.rotate(-1)
-            if keys_pressed.get(pygame.K_RIGHT, False):
-                ship.rotate(1)
-            if keys_pressed.get(pygame.K_UP, False):
-                ship.thrust()
-            if keys_pressed.get(pygame.K_DOWN, False):
-                ship.move_backward()
-            if keys_pressed.get(pygame.K_SPACE, False) and shoot_cooldown <= 0:
-                # Fire bullet
-                bullet_x = ship.x + math.cos(ship.angle) * ship.size
-                bullet_y = ship.y + math.sin(ship.angle) * ship.size
-                bullets.append(Bullet(bullet_x, bullet_y, ship.angle))
-                shoot_cooldown = 10
-            if keys_pressed.get(pygame.K_h, False):
-                ship.hyperspace()
-            if keys_pressed.get(pygame.K_f, False):
-                ship.shield_active = True
-            else:
-                ship.shield_active = False
-        
-        if shoot_cooldown > 0:
-            shoot_cooldown -= 1
-        
-        # Update game objects
-        if player_ship_active:
-            ship.update()
-        
-        # Update AI ships count based on settings
-        while len(ai_ships) < num_ai_ships:
-            ai_ship = AIShip()
-            if len(ai_ships) == 0:
-                ai_ship.is_alpha = True
-            ai_ships.append(ai_ship)
-        while len(ai_ships) > num_ai_ships:
-            ai_ships.pop()
-        
-        # Update enemy ships count based on settings
-        basic_enemies = [e for e in enemy_ships if e.type == 'basic']
-        advanced_enemies = [e for e in enemy_ships if e.type == 'advanced']
-        boss_enemies = [e for e in enemy_ships if e.type == 'boss']
-        
-        total_enemies = len(basic_enemies) + len(advanced_enemies)
-        while total_enemies < num_enemy_ships:
-            enemy_type = 'advanced' if random.random() < 0.3 else 'basic'
-            enemy_ships.append(EnemyShip(ship_type=enemy_type))
-            total_enemies += 1
-        
-        while total_enemies > num_enemy_ships:
-            if basic_enemies:
-                enemy_ships.remove(basic_enemies.pop())
-            elif advanced_enemies:
-                enemy_ships.remove(advanced_enemies.pop())
-            total_enemies -= 1
-        
-        while len(boss_enemies) < num_boss_ships:
-            enemy_ships.append(EnemyShip(ship_type='boss'))
-            boss_enemies.append(enemy_ships[-1])
-        
-        while len(boss_enemies) > num_boss_ships:
-            enemy_ships.remove(boss_enemies.pop())
-        
-        # Update AI ships
-        for ai_ship in ai_ships:
-            ai_ship.make_decision(asteroids, enemy_ships, ai_ships, ship if player_ship_active else None)
-            ai_ship.update()
-        
-        # Update asteroids
-        for asteroid in asteroids:
-            asteroid.update()
-        
-        # Update enemy ships
-        for enemy_ship in enemy_ships[:]:
-            enemy_ship.make_decision(asteroids, enemy_ships, ai_ships, 
-                                   ship if player_ship_active else None, 
-                                   bullets, enemy_bullets)
-            enemy_ship.update()
-        
-        # Update bullets
-        bullets = [b for b in bullets if b.is_alive()]
-        for bullet in bullets:
-            bullet.update()
-        
-        # Update enemy bullets
-        enemy_bullets = [b for b in enemy_bullets if b.is_alive()]
-        for bullet in enemy_bullets:
-            bullet.update()
-        
-        # Check bullet-asteroid collisions
-        for bullet in bullets[:]:
-            for asteroid in asteroids[:]:
-                if check_collision(bullet, asteroid):
-                    bullets.remove(bullet)
-                    asteroids.remove(asteroid)
-                    score += 100
-                    break
-        
-        # Check bullet-enemy ship collisions
-        for bullet in bullets[:]:
-            for enemy_ship in enemy_ships[:]:
-                if check_collision(bullet, enemy_ship):
-                    bullets.remove(bullet)
-                    enemy_ship.health -= 1
-                    if enemy_ship.health <= 0:
-                        # Award points based on enemy type
-                        if enemy_ship.type == 'boss':
-                            score += 500
-                        elif enemy_ship.type == 'advanced':
-                            score += 200
-                        else:
-                            score += 100
-                        enemy_ships.remove(enemy_ship)
-                    break
-        
-        # Check AI bullet-enemy ship collisions
-        for ai_ship in ai_ships:
-            # AI ships fire bullets that are in the bullets array
-            pass  # Already handled above
-        
-        # Check enemy bullet-player ship collisions
-        if player_ship_active:
-            for bullet in enemy_bullets[:]:
-                if check_collision(bullet, ship):
-                    if not ship.shield_active:
-                        print(f"Game Over! Final Score: {score}")
-                        init_game()
-                        ship = Ship()
-                        break
-                    else:
-                        enemy_bullets.remove(bullet)
-        
-        # Check enemy bullet-AI ship collisions
-        for bullet in enemy_bullets[:]:
-            for ai_ship in ai_ships[:]:
-                if check_collision(bullet, ai_ship):
-                    enemy_bullets.remove(bullet)
-                    if not ai_ship.shield_active:
-                        ai_ship.health -= 1
-                        if ai_ship.health <= 0:
-                            ai_ships.remove(ai_ship)
-                    break
-        
-        # Check ship-asteroid collisions
-        if player_ship_active:
-            for asteroid in asteroids:
-                if check_collision(ship, asteroid):
-                    if not ship.shield_active:
-                        print(f"Game Over! Final Score: {score}")
-                        init_game()
-                        ship = Ship()
-                        break
-        
-        # Check enemy ship-player ship collisions
-        if player_ship_active:
-            for enemy_ship in enemy_ships:
-                if check_collision(ship, enemy_ship):
-                    if not ship.shield_active:
-                        print(f"Game Over! Final Score: {score}")
-                        init_game()
-                        ship = Ship()
-                        break
+        player_input = read_player_input(keys_pressed)
+        
+        if threaded_simulation:
+            # Simulation runs on its own thread, render the latest snapshot
+            if simulation is None:
+                snapshots.publish(capture_world())
+                simulation = SimulationThread(snapshots)
+                simulation.start()
+            simulation.player_input = player_input
+            simulation.resume()
+            frame = snapshots.latest()
+        else:
+            if simulation is not None:
+                simulation.stop()
+                simulation = None
+            step_world(player_input)
+            frame = capture_world()
         
         # Draw everything
-        screen.fill(BLACK)
-        
-        # Draw asteroids
-        for asteroid in asteroids:
-            asteroid.draw(screen)
-        
-        # Draw bullets
-        for bullet in bullets:
-            bullet.draw(screen)
-        
-        # Draw enemy bullets
-        for bullet in enemy_bullets:
-            bullet.draw(screen)
-        
-        # Draw enemy ships
-        for enemy_ship in enemy_ships:
-            enemy_ship.draw(screen)
-        
-        # Draw AI ships
-        for ai_ship in ai_ships:
-            ai_ship.draw(screen)
-        
-        # Draw ship
-        if player_ship_active:
-            ship.draw(screen)
+        draw_start = time.perf_counter()
+        screen = presenter.surface
+        view = camera.viewport(frame, *screen.get_size())
+        draw_frame(screen, frame, governor, view)
         
         # Draw score
         font = pygame.font.Font(None, 36)
-        score_text = font.render(f"Score: {score}", True, YELLOW)
+        score_text = font.render(f"Score: {frame.score}", True, YELLOW)
         screen.blit(score_text, (10, 10))
         
+        # Draw render quality level
+        stats_font = pygame.font.Font(None, 24)
+        quality_text = stats_font.render(f"Quality: {governor.level} ({governor.name})", True, LIGHT_GRAY)
+        screen.blit(quality_text, (10, 45))
+        
+        # Draw simulation and render timings
+        if simulation is not None:
+            stats_text = stats_font.render(
+                f"Sim: {simulation.ticks_per_second:.0f} ticks/s, {simulation.tick_ms:.1f} ms | "
+                f"Draw: {draw_ms:.1f} ms", True, LIGHT_GRAY)
+            screen.blit(stats_text, (10, 70))
+        
+        # Draw AI level of detail statistics
+        if ai_scheduler is not None:
+            lod_text = stats_font.render(
+                f"AI: {ai_scheduler.thinks} thinking, {ai_scheduler.coasts} coasting, "
+                f"{ai_scheduler.deferred} deferred, {ai_scheduler.ai_ms:.1f} ms", True, LIGHT_GRAY)
+            screen.blit(lod_text, (10, 95))
+        
         # Draw menu hint
         if not menu.visible:
             hint_font = pygame.font.Font(None, 24)
             hint_text = hint_font.render("Press ESC or M for Menu | Close Window to Exit", True, LIGHT_GRAY)
-            screen.blit(hint_text, (10, SCREEN_HEIGHT - 25))
+            screen.blit(hint_text, (10, screen.get_height() - 25))
         
-        pygame.display.flip()
+        draw_ms = draw_ms * 0.9 + (time.perf_counter() - draw_start) * 100.0
+        presenter.present()
         clock.tick(FPS)
-    
+        
+        # Frame work time, excluding the frame cap delay
+        governor.record(clock.get_rawtime())
+    
+    if simulation is not None:
+        simulation.stop()
+    if recorder is not None:
+        recorder.close()
+        print(f"Replay saved to {recorder.path}")
+    if ai_policy is not None:
+        ai_policy.close()
+    if training_collector is not None:
+        training_collector.close()
+        print(f"Training data: {training_collector.manifest['rows']} samples in {training_collector.path}")
+    if telemetry is not None:
+        telemetry_events = None
+        telemetry.stop()
+        print(f"Telemetry: {telemetry.written} events written to {telemetry.path}")
     pygame.quit()
     sys.exit()
 
 if __name__ == "__main__":
     main()
-
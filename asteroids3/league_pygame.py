@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+AI League for Asteroids Game
+Ranks AI variants by Elo from headless battles played over a process pool
+
+A variant is a named configuration of the AI ships: menu setting overrides
+(ML mode, formation, escort mode, ...), AIShip attribute overrides, and
+optionally a MARL policy checkpoint driving the ships. AI ships never play
+each other directly, so a match is a paired comparison: every variant plays
+the same scenario from the same seed, and on each seed every pair of
+variants that played it is scored as a win, draw or loss (higher score,
+then more surviving ships, then more ship health). A seed played by every
+variant therefore yields all pairings at the cost of one episode per
+variant.
+
+Schedules:
+    round-robin   every variant plays every seed
+    swiss         Swiss-style rounds: after each round the table is ranked,
+                  and only variants whose rating interval still overlaps a
+                  neighbour's play the next round's seeds
+
+Ratings are a Bradley-Terry maximum likelihood fit on the Elo scale (draws
+count half) with 95% confidence intervals, refitted from all results as
+they stream in. Every episode result is appended to episodes.jsonl in the
+league directory, keyed by a fingerprint of the variant and scenario, so an
+interrupted league resumes where it stopped, and changing one variant only
+replays that variant.
+
+Usage:
+    python3 league_pygame.py league/ --seeds 200 --workers 8
+    python3 league_pygame.py league/ --variants variants.json --schedule swiss
+    python3 league_pygame.py league/ --table       # print the standings only
+
+variants.json is a list of {"name": ..., "settings": {...}, "ship": {...},
+"policy": "policy.ckpt", "precision": "int8"}; everything but the name is
+optional. Without it the league ranks DEFAULT_VARIANTS.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import time
+import numpy as np
+
+FORMAT = 'asteroids-league'
+VERSION = 1
+LEAGUE = 'league.json'
+EPISODES = 'episodes.jsonl'
+
+# Battle every variant plays (no player ship, AI ships are not respawned)
+DEFAULT_SCENARIO = {'ai_ships': 4, 'enemies': 4, 'bosses': 1, 'ticks': 3600,
+                    'world_width': 1200, 'world_height': 600}
+
+DEFAULT_VARIANTS = [
+    {'name': 'rule-based'},
+    {'name': 'ml-parameters', 'settings': {'ml_enabled': True, 'ml_mode': 'parameters'}},
+    {'name': 'ml-priorities', 'settings': {'ml_enabled': True, 'ml_mode': 'priorities'}},
+    {'name': 'ml-both', 'settings': {'ml_enabled': True, 'ml_mode': 'both'}},
+    {'name': 'marl-untrained', 'policy': ''},
+]
+
+ELO_SCALE = 400 / math.log(10)  # Elo points per natural-log odds unit
+ELO_BASE = 1500
+PRIOR_SD = 2.0  # Gaussian prior on ratings (log odds), keeps unbeaten records finite
+Z_95 = 1.96
+
+DEFAULT_OPTIONS = {'variants': DEFAULT_VARIANTS, 'scenario': DEFAULT_SCENARIO, 'schedule': 'round-robin',
+                   'seeds': 100, 'seeds_per_round': 10, 'first_seed': 0}
+
+
+def fingerprint(variant, scenario):
+    """Key of a variant's episodes: changes when the variant or scenario does"""
+    config = {key: value for key, value in variant.items() if key != 'name'}
+    text = json.dumps([config, scenario], sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+# Episode worker (one game world per process)
+
+_game = None
+_policies = {}
+
+
+def _init_worker():
+    """Import the engine headless"""
+    global _game
+    # SDL would otherwise turn SIGTERM into a quit event and Pool.terminate() would hang
+    os.environ.setdefault('SDL_NO_SIGNAL_HANDLERS', '1')
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    import game_pygame
+    _game = game_pygame
+
+
+def _policy(path, num_agents, precision='float32'):
+    """LocalPolicy of a checkpoint ('' for untrained actors), loaded once per process"""
+    key = (path, num_agents, precision)
+    if key not in _policies:
+        from marl_inference import LocalPolicy, load_actors
+        _policies[key] = LocalPolicy(load_actors(path, num_agents, precision))
+    return _policies[key]
+
+
+def run_episode(variant, seed, scenario=DEFAULT_SCENARIO):
+    """Play one battle of a variant, returns its result dict"""
+    if _game is None:
+        _init_worker()
+    game = _game
+    from menu_pygame import Menu
+    settings = Menu(game.SCREEN_WIDTH, game.SCREEN_HEIGHT).get_settings()
+    settings.update(variant.get('settings', {}))
+    settings.update(num_ai_ships=scenario['ai_ships'], num_enemy_ships=scenario['enemies'],
+                    num_boss_ships=scenario['bosses'], player_ship_active=False,
+                    world_width=scenario['world_width'], world_height=scenario['world_height'])
+    game.apply_settings(settings)
+    game.ai_scheduler = None
+    policy = variant.get('policy')
+    game.ai_policy = (_policy(policy, scenario['ai_ships'], variant.get('precision', 'float32'))
+                      if policy is not None else None)
+    game.reset_world(seed)
+    for ai_ship in game.ai_ships:
+        for name, value in variant.get('ship', {}).items():
+            setattr(ai_ship, name, value)
+
+    ticks = 0
+    while ticks < scenario['ticks'] and game.ai_ships:
+        game.step_world()
+        # No respawns: lost ships stay lost
+        game.num_ai_ships = len(game.ai_ships)
+        ticks += 1
+    game.ai_policy = None
+    return {'score': game.score, 'survivors': len(game.ai_ships),
+            'health': sum(max(ai_ship.health, 0) for ai_ship in game.ai_ships), 'ticks': ticks}
+
+
+def _play(task):
+    """Pool task: (key, name, variant, seed, scenario) -> result line"""
+    key, name, variant, seed, scenario = task
+    start = time.perf_counter()
+    result = run_episode(variant, seed, scenario)
+    result.update(key=key, variant=name, seed=seed, seconds=round(time.perf_counter() - start, 3))
+    return result
+
+
+# Ratings
+
+def match_table(results, names):
+    """(points, games) matrices of the pairwise matches in results
+
+    results maps (variant name, seed) to an episode result; points[i, j]
+    is what variant i scored against variant j.
+    """
+    index = {name: i for i, name in enumerate(names)}
+    by_seed = {}
+    for (name, seed), result in results.items():
+        if name in index:
+            by_seed.setdefault(seed, []).append((index[name], result))
+    n = len(names)
+    points = np.zeros((n, n))
+    games = np.zeros((n, n))
+    for entries in by_seed.values():
+        if len(entries) < 2:
+            continue
+        rows = np.array([i for i, _ in entries])
+        keys = np.array([(r['score'], r['survivors'], r['health']) for _, r in entries], dtype=np.float64)
+        # Lexicographic comparison of every pair at once
+        better = np.zeros((len(rows), len(rows)), dtype=bool)
+        equal = np.ones_like(better)
+        for column in range(keys.shape[1]):
+            a, b = keys[:, column, None], keys[None, :, column]
+            better |= equal & (a > b)
+            equal &= a == b
+        played = ~np.eye(len(rows), dtype=bool)
+        points[np.ix_(rows, rows)] += np.where(played, better + 0.5 * equal, 0.0)
+        games[np.ix_(rows, rows)] += played
+    return points, games
+
+
+def fit_ratings(points, games, iterations=50):
+    """Bradley-Terry ratings (Elo) and 95% half-widths by Newton's method"""
+    n = len(points)
+    ratings = np.zeros(n)
+    precision = 1.0 / PRIOR_SD ** 2
+    hessian = -precision * np.eye(n)
+    for _ in range(iterations):
+        p = 1.0 / (1.0 + np.exp(ratings[None, :] - ratings[:, None]))
+        gradient = (points - games * p).sum(axis=1) - precision * ratings
+        weight = games * p * (1.0 - p)
+        hessian = weight - np.diag(weight.sum(axis=1) + precision)
+        step = np.linalg.solve(hessian, gradient)
+        ratings -= step
+        if np.abs(step).max() < 1e-9:
+            break
+    # Ratings are only defined relative to each other: take the covariance about their mean
+    centering = np.eye(n) - 1.0 / n
+    variance = np.diag(centering @ np.linalg.inv(-hessian) @ centering)
+    ratings -= ratings.mean()
+    return ELO_BASE + ELO_SCALE * ratings, Z_95 * ELO_SCALE * np.sqrt(variance)
+
+
+def standings(results, names):
+    """Table rows sorted by rating: name, elo, interval, points, games, episodes, means"""
+    points, games = match_table(results, names)
+    elo, interval = fit_ratings(points, games)
+    rows = []
+    for i, name in enumerate(names):
+        episodes = [r for (variant, _), r in results.items() if variant == name]
+        rows.append({'name': name, 'elo': elo[i], 'interval': interval[i], 'points': points[i].sum(),
+                     'games': int(games[i].sum()), 'episodes': len(episodes),
+                     'mean_score': np.mean([r['score'] for r in episodes]) if episodes else 0.0,
+                     'mean_survivors': np.mean([r['survivors'] for r in episodes]) if episodes else 0.0})
+    return sorted(rows, key=lambda row: -row['elo'])
+
+
+def format_table(rows):
+    """Standings as text"""
+    lines = [f"{'#':>3} {'variant':<24} {'Elo':>6} {'95%':>6} {'points':>9} {'games':>7} "
+             f"{'episodes':>8} {'score':>8} {'alive':>6}"]
+    for rank, row in enumerate(rows, 1):
+        lines.append(f"{rank:>3} {row['name']:<24} {row['elo']:>6.0f} {row['interval']:>6.0f} "
+                     f"{row['points']:>9.1f} {row['games']:>7} {row['episodes']:>8} "
+                     f"{row['mean_score']:>8.0f} {row['mean_survivors']:>6.2f}")
+    return '\n'.join(lines)
+
+
+def contenders(rows):
+    """Names whose rating interval overlaps the next or previous variant's"""
+    names = set()
+    for upper, lower in zip(rows, rows[1:]):
+        if upper['elo'] - upper['interval'] <= lower['elo'] + lower['interval']:
+            names.update((upper['name'], lower['name']))
+    return names
+
+
+class League:
+    """A league directory: configuration plus the append-only episode log"""
+    def __init__(self, path, variants=None, scenario=None, **options):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        config_path = os.path.join(path, LEAGUE)
+        if os.path.exists(config_path):
+            with open(config_path) as f:
+                config = json.load(f)
+            if config.get('format') != FORMAT:
+                raise ValueError(f"{path} is not a league directory")
+        else:
+            config = {'format': FORMAT, 'version': VERSION}
+        # Arguments given override the stored configuration; the rest is resumed
+        overrides = dict(options, variants=variants, scenario=scenario)
+        config.update({key: value for key, value in overrides.items() if value is not None})
+        for key, value in DEFAULT_OPTIONS.items():
+            config.setdefault(key, value)
+        names = [variant['name'] for variant in config['variants']]
+        if len(set(names)) != len(names):
+            raise ValueError("Variant names must be unique")
+        with open(config_path + '.tmp', 'w') as f:
+            json.dump(config, f, indent=1)
+        os.replace(config_path + '.tmp', config_path)
+
+        self.config = config
+        self.variants = config['variants']
+        self.scenario = config['scenario']
+        self.names = names
+        self.keys = {variant['name']: fingerprint(variant, self.scenario) for variant in self.variants}
+
+        # Results of the current variant configurations, by (name, seed)
+        self.results = {}
+        episodes_path = os.path.join(path, EPISODES)
+        if os.path.exists(episodes_path):
+            by_key = {key: name for name, key in self.keys.items()}
+            with open(episodes_path) as f:
+                for line in f:
+                    try:
+                        result = json.loads(line)
+                    except ValueError:
+                        continue  # Line cut short by an interrupted run
+                    name = by_key.get(result['key'])
+                    if name is not None:
+                        self.results[(name, result['seed'])] = result
+        self._log = open(episodes_path, 'a', buffering=1)
+
+    def seeds(self, round_index=None):
+        """Seeds of the whole league, or of one Swiss round"""
+        first = self.config['first_seed']
+        if round_index is None:
+            return range(first, first + self.config['seeds'])
+        per_round = self.config['seeds_per_round']
+        start = first + round_index * per_round
+        return range(start, min(start + per_round, first + self.config['seeds']))
+
+    def tasks(self, names, seeds):
+        """Episodes of names x seeds not played yet"""
+        variants = {variant['name']: variant for variant in self.variants}
+        return [(self.keys[name], name, variants[name], seed, self.scenario)
+                for seed in seeds for name in names if (name, seed) not in self.results]
+
+    def record(self, result):
+        """Add an episode result and append it to the log"""
+        self.results[(result['variant'], result['seed'])] = result
+        self._log.write(json.dumps(result) + '\n')
+
+    def standings(self):
+        """Current table rows (see standings())"""
+        return standings(self.results, self.names)
+
+    def close(self):
+        """Close the episode log"""
+        self._log.close()
+
+
+def run_league(league, workers=None, report_every=30.0):
+    """Play the league's outstanding episodes, printing the table as results arrive"""
+    workers = workers or os.cpu_count()
+    context = multiprocessing.get_context('spawn')
+    start = time.perf_counter()
+    played = 0
+    last_report = start
+
+    def play(pool, tasks):
+        nonlocal played, last_report
+        for result in pool.imap_unordered(_play, tasks):
+            league.record(result)
+            played += 1
+            now = time.perf_counter()
+            if report_every is not None and now - last_report >= report_every:
+                last_report = now
+                rate = played / (now - start)
+                print(f"\n{played} episodes, {rate * 3600:.0f}/h\n{format_table(league.standings())}", flush=True)
+
+    with context.Pool(workers, initializer=_init_worker) as pool:
+        if league.config['schedule'] == 'round-robin':
+            play(pool, league.tasks(league.names, league.seeds()))
+        else:
+            names = league.names
+            rounds = math.ceil(league.config['seeds'] / league.config['seeds_per_round'])
+            for round_index in range(rounds):
+                if round_index:
+                    names = [name for name in league.names if name in contenders(league.standings())]
+                    print(f"Round {round_index + 1}/{rounds}: {len(names)} variants in contention", flush=True)
+                    if not names:
+                        break
+                play(pool, league.tasks(names, league.seeds(round_index)))
+    return played
+
+
+def main():
+    """Command line league runner"""
+    parser = argparse.ArgumentParser(description="Rank AI variants by Elo from headless battles")
+    parser.add_argument('path', help="League directory (created, or resumed)")
+    parser.add_argument('--variants', help="JSON list of variants (default: stored, or DEFAULT_VARIANTS)")
+    parser.add_argument('--schedule', choices=('round-robin', 'swiss'), help="Default round-robin")
+    parser.add_argument('--seeds', type=int, help="Seeds per variant (at most, for swiss), default 100")
+    parser.add_argument('--seeds-per-round', type=int, help="Seeds per swiss round, default 10")
+    parser.add_argument('--first-seed', type=int)
+    parser.add_argument('--workers', type=int, default=None, help="Processes (default: one per CPU)")
+    parser.add_argument('--ticks', type=int, help="Episode length (default 3600, one game minute)")
+    parser.add_argument('--ai-ships', type=int)
+    parser.add_argument('--enemies', type=int)
+    parser.add_argument('--bosses', type=int)
+    parser.add_argument('--report-every', type=float, default=30.0, help="Seconds between tables")
+    parser.add_argument('--table', action='store_true', help="Print the standings without playing")
+    args = parser.parse_args()
+
+    variants = None
+    if args.variants:
+        with open(args.variants) as f:
+            variants = json.load(f)
+    scenario = None
+    overrides = {'ticks': args.ticks, 'ai_ships': args.ai_ships, 'enemies': args.enemies, 'bosses': args.bosses}
+    if any(value is not None for value in overrides.values()):
+        stored = os.path.join(args.path, LEAGUE)
+        scenario = dict(DEFAULT_SCENARIO)
+        if os.path.exists(stored):
+            with open(stored) as f:
+                scenario.update(json.load(f).get('scenario', {}))
+        scenario.update({key: value for key, value in overrides.items() if value is not None})
+
+    league = League(args.path, variants, scenario, schedule=args.schedule, seeds=args.seeds,
+                    seeds_per_round=args.seeds_per_round, first_seed=args.first_seed)
+    try:
+        if not args.table:
+            resumed = len(league.results)
+            print(f"{len(league.names)} variants, {resumed} episodes already played", flush=True)
+            try:
+                played = run_league(league, args.workers, args.report_every)
+            except KeyboardInterrupt:
+                print("\nInterrupted: results so far are saved, run again to resume")
+                played = len(league.results) - resumed
+            print(f"\n{played} episodes played")
+        print(format_table(league.standings()))
+    finally:
+        league.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+// ============================================
+// Designer Tuệ Hoàng, Eng. 
+// ============================================
+
+// MARL Policy Checkpoints
+// Loads checkpoints written by marl_checkpoint.py (header.json + raw float32 blobs)
+// into the network layout of MARLSystem.createSimpleNetwork
+
+const MARL_CHECKPOINT_FORMAT = 'asteroids-marl-checkpoint';
+const MARL_CHECKPOINT_VERSION = 1;
+
+// Check that a header is a checkpoint this loader understands
+function checkCheckpointHeader(header) {
+    if (!header || header.format !== MARL_CHECKPOINT_FORMAT) {
+        throw new Error('Not a MARL checkpoint');
+    }
+    if (header.version > MARL_CHECKPOINT_VERSION) {
+        throw new Error(`Checkpoint version ${header.version} is newer than this loader (${MARL_CHECKPOINT_VERSION})`);
+    }
+}
+
+// Decode a base64 string (embedded blob) into a Float32Array
+function decodeFloat32Base64(data) {
+    const bytes = atob(data);
+    const buffer = new ArrayBuffer(bytes.length);
+    const view = new Uint8Array(buffer);
+    for (let i = 0; i < bytes.length; i++) {
+        view[i] = bytes.charCodeAt(i);
+    }
+    return new Float32Array(buffer);
+}
+
+// Checkpoint embedded in the page by app.py: { header, tensors: { name: base64 } }
+function decodeEmbeddedCheckpoint(embedded) {
+    checkCheckpointHeader(embedded.header);
+    const tensors = {};
+    Object.keys(embedded.tensors).forEach(name => {
+        tensors[name] = decodeFloat32Base64(embedded.tensors[name]);
+    });
+    return { header: embedded.header, tensors };
+}
+
+// Weight and bias tensor names of a network (name.w0, name.b0, ...), without optimizer state
+function networkTensorNames(header, name) {
+    const names = [];
+    for (let l = 0; l < header.networks[name].layers.length - 1; l++) {
+        names.push(`${name}.w${l}`, `${name}.b${l}`);
+    }
+    return names;
+}
+
+// Fetch the float32 weights and biases of the given networks from a served checkpoint directory
+async function fetchCheckpoint(baseUrl, networks = ['actors']) {
+    const header = await (await fetch(`${baseUrl}/header.json`)).json();
+    checkCheckpointHeader(header);
+    const tensors = {};
+    const names = networks.flatMap(network => networkTensorNames(header, network)).filter(name =>
+        header.tensors[name] && header.tensors[name].dtype === 'float32');
+    await Promise.all(names.map(async name => {
+        const response = await fetch(`${baseUrl}/${header.tensors[name].file}`);
+        tensors[name] = new Float32Array(await response.arrayBuffer());
+    }));
+    return { header, tensors };
+}
+
+// Split a stacked network (weights of shape agents x inputs x outputs) into per-agent networks
+function checkpointNetworks(checkpoint, name) {
+    const info = checkpoint.header.networks[name];
+    const layerSizes = info.layers;
+    const numAgents = checkpoint.header.tensors[`${name}.w0`].shape[0];
+    const networks = [];
+
+    for (let agent = 0; agent < numAgents; agent++) {
+        const network = {
+            layers: [],
+            inputSize: layerSizes[0],
+            outputSize: layerSizes[layerSizes.length - 1]
+        };
+        for (let l = 0; l < layerSizes.length - 1; l++) {
+            const rows = layerSizes[l];
+            const cols = layerSizes[l + 1];
+            const w = checkpoint.tensors[`${name}.w${l}`];
+            const b = checkpoint.tensors[`${name}.b${l}`];
+            const offset = agent * rows * cols;
+            const weights = [];
+            for (let i = 0; i < rows; i++) {
+                weights[i] = Array.from(w.subarray(offset + i * cols, offset + (i + 1) * cols));
+            }
+            network.layers.push({
+                weights,
+                biases: Array.from(b.subarray(agent * cols, (agent + 1) * cols))
+            });
+        }
+        networks.push(network);
+    }
+    return networks;
+}
+
+// Use the actors of a checkpoint as the MARLSystem policies
+MARLSystem.prototype.loadCheckpoint = function(checkpoint) {
+    const actors = checkpointNetworks(checkpoint, 'actors');
+    for (let i = 0; i < this.numAgents; i++) {
+        // Extra agents reuse the last trained policy
+        this.actors[i] = actors[Math.min(i, actors.length - 1)];
+        this.copyWeights(this.actors[i], this.targetActors[i]);
+    }
+    this.episodeCount = checkpoint.header.metadata.episodes || 0;
+    console.log(`[MARL] Checkpoint loaded: ${actors.length} actors, ${this.episodeCount} episodes`);
+    return true;
+};
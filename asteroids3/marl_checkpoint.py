@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Policy Checkpoints for Multi-Agent Reinforcement Learning
+Versioned directory of raw tensor blobs plus a small JSON header
+
+Replaces the localStorage JSON of MARLSystem.saveModel (marl_system.js). A
+checkpoint is a directory:
+
+    header.json                 format, version, architecture, tensor index, metadata
+    actors.w0-1a2b3c4d.f32      raw little-endian tensors, one file each
+    ...
+
+Blob names carry the CRC-32 of their contents, so a save writes only the
+tensors that changed, and the header (replaced atomically, written last)
+always points at a complete set of blobs. Loading memory-maps the blobs
+lazily. marl_checkpoint.js reads the same format in the browser build.
+
+Usage:
+    python3 marl_checkpoint.py policy.ckpt       # print checkpoint contents
+"""
+
+import argparse
+import json
+import os
+import zlib
+import numpy as np
+from marl_network import StackedMLP
+
+FORMAT = 'asteroids-marl-checkpoint'
+VERSION = 1
+HEADER = 'header.json'
+
+# Blob extension per dtype (always little-endian)
+EXTENSIONS = {'float32': 'f32', 'float64': 'f64', 'int64': 'i64', 'float16': 'f16', 'int8': 'i8'}
+
+
+def network_tensors(name, network):
+    """Tensors of a StackedMLP: name.w0, name.w1, ..., name.b0, ..."""
+    tensors = {f"{name}.w{i}": w for i, w in enumerate(network.weights)}
+    tensors.update({f"{name}.b{i}": b for i, b in enumerate(network.biases)})
+    return tensors
+
+
+def network_info(network):
+    """Architecture entry of a StackedMLP for the header"""
+    return {'layers': list(network.layer_sizes), 'output': network.output}
+
+
+def save_checkpoint(path, tensors, networks=None, metadata=None):
+    """Write a checkpoint, reusing the blobs of tensors that did not change
+
+    tensors maps names to arrays; networks maps network names to
+    network_info() entries. Returns the names of the tensors written.
+    """
+    os.makedirs(path, exist_ok=True)
+    previous = {}
+    header_path = os.path.join(path, HEADER)
+    if os.path.exists(header_path):
+        with open(header_path) as f:
+            previous = json.load(f).get('tensors', {})
+
+    index = {}
+    written = []
+    for name, array in tensors.items():
+        array = np.asarray(array)
+        dtype = array.dtype.name
+        if dtype not in EXTENSIONS:
+            raise ValueError(f"Tensor {name} has unsupported dtype {dtype}")
+        array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+        crc = zlib.crc32(memoryview(array).cast('B'))
+        entry = {'file': f"{name}-{crc:08x}.{EXTENSIONS[dtype]}", 'shape': list(array.shape),
+                 'dtype': dtype, 'crc32': crc}
+        index[name] = entry
+        old = previous.get(name)
+        if old == entry and os.path.exists(os.path.join(path, entry['file'])):
+            continue
+        blob_path = os.path.join(path, entry['file'])
+        with open(blob_path + '.tmp', 'wb') as f:
+            f.write(memoryview(array).cast('B'))
+        os.replace(blob_path + '.tmp', blob_path)
+        written.append(name)
+
+    header = {'format': FORMAT, 'version': VERSION, 'networks': networks or {},
+              'tensors': index, 'metadata': metadata or {}}
+    with open(header_path + '.tmp', 'w') as f:
+        json.dump(header, f, indent=1)
+    os.replace(header_path + '.tmp', header_path)
+
+    # Blobs no longer referenced by the header
+    current = {entry['file'] for entry in index.values()}
+    for filename in os.listdir(path):
+        if filename.rsplit('.', 1)[-1] in EXTENSIONS.values() and filename not in current:
+            os.remove(os.path.join(path, filename))
+    return written
+
+
+class Checkpoint:
+    """Read access to a checkpoint; tensors are memory-mapped on first use"""
+    def __init__(self, path, mmap=True):
+        self.path = path
+        self.mmap = mmap
+        with open(os.path.join(path, HEADER)) as f:
+            self.header = json.load(f)
+        if self.header.get('format') != FORMAT:
+            raise ValueError(f"{path} is not a MARL checkpoint")
+        if self.header['version'] > VERSION:
+            raise ValueError(f"{path} is checkpoint version {self.header['version']}, "
+                             f"this reader supports up to {VERSION}")
+        self.networks = self.header['networks']
+        self.metadata = self.header['metadata']
+        self._tensors = {}
+
+    def __contains__(self, name):
+        return name in self.header['tensors']
+
+    def __getitem__(self, name):
+        tensor = self._tensors.get(name)
+        if tensor is None:
+            entry = self.header['tensors'][name]
+            filename = os.path.join(self.path, entry['file'])
+            dtype = np.dtype(entry['dtype']).newbyteorder('<')
+            shape = tuple(entry['shape'])
+            if self.mmap and all(shape):
+                tensor = np.memmap(filename, dtype=dtype, mode='r', shape=shape)
+            else:
+                tensor = np.fromfile(filename, dtype=dtype).reshape(shape)
+            self._tensors[name] = tensor
+        return tensor
+
+    def names(self):
+        """All tensor names"""
+        return list(self.header['tensors'])
+
+    def network(self, name):
+        """StackedMLP over the (read-only, memory-mapped) checkpoint tensors"""
+        info = self.networks[name]
+        count = len(info['layers']) - 1
+        return StackedMLP.from_parameters([self[f"{name}.w{i}"] for i in range(count)],
+                                          [self[f"{name}.b{i}"] for i in range(count)], info['output'])
+
+
+def main():
+    """Print the contents of a checkpoint"""
+    parser = argparse.ArgumentParser(description="Inspect a MARL policy checkpoint")
+    parser.add_argument('path')
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.path, HEADER)):
+        raise SystemExit(f"{args.path}: no checkpoint")
+    checkpoint = Checkpoint(args.path)
+    print(f"{args.path}: version {checkpoint.header['version']}, {len(checkpoint.names())} tensors")
+    for name, info in checkpoint.networks.items():
+        print(f"  {name}: layers {info['layers']}, {info['output']} output")
+    for key, value in checkpoint.metadata.items():
+        print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
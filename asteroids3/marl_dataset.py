@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Behaviour-Cloning Datasets for Multi-Agent Reinforcement Learning
+(observation, action) pairs of the rule-based AI ships, for bootstrapping actors
+
+Worker processes play headless battles with randomized scenarios (AI ship,
+enemy and boss counts, world size, ML mode). The rule-based AI stays the
+expert: ExpertRecorder takes the place of the AI scheduler in step_world,
+lets every ship think every tick, and records each AI ship's 21-feature
+MARL observation (marl_environment.ObservationBuilder) together with the
+decision it took, as the discrete (rotation, thrust, fire, shield) action
+of the MARL action space. The rule-based AI never raises its shield, so
+shield is always 0.
+
+Generation appends samples to a raw spool; finishing the dataset drops
+duplicate rows (by a 64-bit row hash), shuffles, and writes shards:
+
+    manifest.json           row counts and shard list
+    shard-00000.npz         observations (n, 21) float32, actions (n, 4) int8
+    ...
+
+Usage:
+    python3 marl_dataset.py bc/ --samples 2000000 --workers 8
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import time
+import numpy as np
+
+from marl_environment import ACTION_NVEC, OBSERVATION_NAMES, OBSERVATION_SIZE, ObservationBuilder
+
+FORMAT = 'asteroids-bc-dataset'
+VERSION = 1
+MANIFEST = 'manifest.json'
+SPOOL = 'spool'
+ACTION_NAMES = ('rotation', 'thrust', 'fire', 'shield')
+
+# Randomized scenarios: inclusive count ranges and world sizes
+AI_SHIPS = (1, 8)
+ENEMIES = (0, 8)
+BOSSES = (0, 2)
+WORLD_SIZES = ((1200, 600), (1800, 900), (2400, 1200))
+ML_MODES = (None, 'parameters', 'priorities', 'both')
+EPISODE_TICKS = 1800
+CHUNK_SAMPLES = 50000  # Samples a worker gathers per task
+
+# Odd 64-bit multipliers of the row hash, one per 32-bit word of a row
+_HASH_MULTIPLIERS = (np.random.default_rng(0x5eed).integers(1, 2 ** 63, OBSERVATION_SIZE + 1, dtype=np.uint64)
+                     * np.uint64(2) + np.uint64(1))
+
+
+class ExpertRecorder:
+    """Drop-in for game_pygame.ai_scheduler that records the AI ships' decisions
+
+    Every ship thinks every tick. An AI ship's action is read off the
+    change its think() made: the sign of the turn, whether its velocity
+    changed (thrust), and whether its fire cooldown was reset (fire).
+    Observations are built for all AI ships before any of them acts.
+    """
+    def __init__(self, game):
+        self.game = game
+        self.builders = {}
+        self.observations = []
+        self.actions = []
+
+    def run(self, tick, ships, distances, think):
+        """Think for every ship; record AI ships (enemies only think)"""
+        if not ships or not isinstance(ships[0], self.game.AIShip):
+            for ship in ships:
+                think(ship)
+            return
+        builder = self.builders.get(len(ships))
+        if builder is None:
+            builder = self.builders[len(ships)] = ObservationBuilder(len(ships))
+        self.observations.append(builder.build(ships, self.game.asteroids, self.game.enemy_ships).copy())
+        actions = np.zeros((len(ships), len(ACTION_NVEC)), dtype=np.int8)
+        for row, ship in enumerate(ships):
+            angle, velocity_x, velocity_y, cooldown = ship.angle, ship.velocity_x, ship.velocity_y, ship.shoot_cooldown
+            think(ship)
+            actions[row, 0] = 1 + (ship.angle > angle) - (ship.angle < angle)
+            actions[row, 1] = ship.velocity_x != velocity_x or ship.velocity_y != velocity_y
+            actions[row, 2] = ship.shoot_cooldown > cooldown
+        self.actions.append(actions)
+
+    def take(self):
+        """Recorded (observations, actions) since the last take"""
+        if not self.observations:
+            return np.zeros((0, OBSERVATION_SIZE), np.float32), np.zeros((0, len(ACTION_NVEC)), np.int8)
+        observations, actions = np.concatenate(self.observations), np.concatenate(self.actions)
+        self.observations, self.actions = [], []
+        return observations, actions
+
+
+def random_scenario(rng):
+    """Menu setting overrides of one randomized battle"""
+    width, height = WORLD_SIZES[rng.integers(len(WORLD_SIZES))]
+    ml_mode = ML_MODES[rng.integers(len(ML_MODES))]
+    return {'num_ai_ships': int(rng.integers(AI_SHIPS[0], AI_SHIPS[1] + 1)),
+            'num_enemy_ships': int(rng.integers(ENEMIES[0], ENEMIES[1] + 1)),
+            'num_boss_ships': int(rng.integers(BOSSES[0], BOSSES[1] + 1)),
+            'world_width': width, 'world_height': height,
+            'ml_enabled': ml_mode is not None, 'ml_mode': ml_mode or 'parameters',
+            'player_ship_active': False}
+
+
+def row_hashes(observations, actions):
+    """64-bit hash of every (observation, action) row"""
+    words = np.empty((len(observations), OBSERVATION_SIZE + 1), dtype=np.uint32)
+    words[:, :OBSERVATION_SIZE] = observations.view(np.uint32)
+    words[:, OBSERVATION_SIZE] = np.ascontiguousarray(actions).view(np.uint32)[:, 0]
+    with np.errstate(over='ignore'):
+        return (words.astype(np.uint64) * _HASH_MULTIPLIERS).sum(axis=1, dtype=np.uint64)
+
+
+_game = None
+
+
+def _init_worker():
+    """Import the engine headless"""
+    global _game
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    os.environ.setdefault('SDL_NO_SIGNAL_HANDLERS', '1')
+    import game_pygame
+    _game = game_pygame
+
+
+def generate(seed, samples=CHUNK_SAMPLES, episode_ticks=EPISODE_TICKS):
+    """Play randomized battles for `samples` samples, returns (observations, actions, episodes)
+
+    seed is anything np.random.default_rng accepts (e.g. a tuple of ints).
+    """
+    if _game is None:
+        _init_worker()
+    game = _game
+    from menu_pygame import Menu
+    rng = np.random.default_rng(seed)
+    recorder = ExpertRecorder(game)
+    observations, actions = [], []
+    count = episodes = 0
+    while count < samples:
+        settings = Menu(game.SCREEN_WIDTH, game.SCREEN_HEIGHT).get_settings()
+        settings.update(random_scenario(rng))
+        game.apply_settings(settings)
+        game.ai_policy = None
+        game.ai_scheduler = recorder
+        game.reset_world(int(rng.integers(2 ** 31)))
+        for _ in range(episode_ticks):
+            game.step_world()
+            if len(recorder.actions) >= 256:
+                chunk = recorder.take()
+                observations.append(chunk[0])
+                actions.append(chunk[1])
+                count += len(chunk[0])
+                if count >= samples:
+                    break
+        episodes += 1
+    game.ai_scheduler = None
+    chunk = recorder.take()
+    observations.append(chunk[0])
+    actions.append(chunk[1])
+    return np.concatenate(observations)[:samples], np.concatenate(actions)[:samples], episodes
+
+
+def _generate(task):
+    """Pool task: (seed, samples, episode_ticks)"""
+    return generate(*task)
+
+
+class DatasetBuilder:
+    """Spools generated samples, then deduplicates, shuffles and shards them"""
+    def __init__(self, path):
+        self.path = path
+        self.spool = os.path.join(path, SPOOL)
+        os.makedirs(self.spool, exist_ok=True)
+        row_sizes = {'observations.f32': 4 * OBSERVATION_SIZE, 'actions.i8': len(ACTION_NVEC), 'hashes.u64': 8}
+        self._files = {name: open(os.path.join(self.spool, name), 'ab') for name in row_sizes}
+        # A build interrupted mid-append resumes from the last row all three files hold
+        self.rows = min(os.path.getsize(os.path.join(self.spool, name)) // size for name, size in row_sizes.items())
+        for name, size in row_sizes.items():
+            self._files[name].truncate(self.rows * size)
+
+    def append(self, observations, actions):
+        """Add generated rows to the spool"""
+        self._files['observations.f32'].write(np.ascontiguousarray(observations, dtype='<f4').tobytes())
+        self._files['actions.i8'].write(np.ascontiguousarray(actions, dtype=np.int8).tobytes())
+        self._files['hashes.u64'].write(row_hashes(observations, actions).astype('<u8').tobytes())
+        self.rows += len(observations)
+
+    def finish(self, shard_size=262144, seed=0):
+        """Write the deduplicated, shuffled shards and the manifest; returns the manifest"""
+        for f in self._files.values():
+            f.close()
+        rows = self.rows
+        hashes = np.fromfile(os.path.join(self.spool, 'hashes.u64'), dtype='<u8', count=rows)
+        _, keep = np.unique(hashes, return_index=True)
+        del hashes
+        order = keep[np.random.default_rng(seed).permutation(len(keep))]
+        observations = np.memmap(os.path.join(self.spool, 'observations.f32'), dtype='<f4', mode='r',
+                                 shape=(rows, OBSERVATION_SIZE))
+        actions = np.memmap(os.path.join(self.spool, 'actions.i8'), dtype=np.int8, mode='r',
+                            shape=(rows, len(ACTION_NVEC)))
+
+        manifest = {'format': FORMAT, 'version': VERSION, 'observations': list(OBSERVATION_NAMES),
+                    'actions': list(ACTION_NAMES), 'action_nvec': list(ACTION_NVEC),
+                    'generated': int(rows), 'rows': int(len(order)), 'shards': []}
+        for start in range(0, len(order), shard_size):
+            # Shard rows are gathered in file order (sequential reads), then shuffled in memory
+            rows_in_shard = order[start:start + shard_size]
+            ascending = np.sort(rows_in_shard)
+            shuffle = np.argsort(np.argsort(rows_in_shard))
+            name = f"shard-{len(manifest['shards']):05d}.npz"
+            np.savez(os.path.join(self.path, name), observations=observations[ascending][shuffle],
+                     actions=actions[ascending][shuffle])
+            manifest['shards'].append({'file': name, 'rows': int(len(rows_in_shard))})
+        del observations, actions
+        with open(os.path.join(self.path, MANIFEST + '.tmp'), 'w') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(os.path.join(self.path, MANIFEST + '.tmp'), os.path.join(self.path, MANIFEST))
+        shutil.rmtree(self.spool)
+        return manifest
+
+
+def load_dataset(path):
+    """All shards of a dataset as (observations, actions)"""
+    with open(os.path.join(path, MANIFEST)) as f:
+        manifest = json.load(f)
+    observations, actions = [], []
+    for shard in manifest['shards']:
+        with np.load(os.path.join(path, shard['file'])) as data:
+            observations.append(data['observations'])
+            actions.append(data['actions'])
+    if not observations:
+        return np.zeros((0, OBSERVATION_SIZE), np.float32), np.zeros((0, len(ACTION_NVEC)), np.int8)
+    return np.concatenate(observations), np.concatenate(actions)
+
+
+def build(path, samples, workers=None, seed=0, shard_size=262144, chunk_samples=CHUNK_SAMPLES,
+          episode_ticks=EPISODE_TICKS, report_every=10.0):
+    """Generate `samples` expert samples (before deduplication) into a dataset directory, returns the manifest"""
+    builder = DatasetBuilder(path)
+    workers = workers or os.cpu_count()
+    # Seeds also depend on the rows already spooled, so a resumed build plays new battles
+    remaining = max(0, samples - builder.rows)
+    tasks = [((seed, builder.rows, i), min(chunk_samples, remaining - i * chunk_samples), episode_ticks)
+             for i in range(-(-remaining // chunk_samples))]
+    context = multiprocessing.get_context('spawn')
+    start = last_report = time.perf_counter()
+    generated = episodes = 0
+    with context.Pool(workers, initializer=_init_worker) as pool:
+        for observations, actions, chunk_episodes in pool.imap_unordered(_generate, tasks):
+            builder.append(observations, actions)
+            generated += len(observations)
+            episodes += chunk_episodes
+            now = time.perf_counter()
+            if now - last_report >= report_every:
+                last_report = now
+                print(f"{builder.rows:,} samples, {generated / (now - start):,.0f} samples/s, "
+                      f"{episodes} episodes", flush=True)
+    elapsed = time.perf_counter() - start
+    print(f"Generated {generated:,} samples in {elapsed:.1f} s ({generated / max(elapsed, 1e-9):,.0f} samples/s)")
+    manifest = builder.finish(shard_size, seed)
+    print(f"{manifest['rows']:,} unique samples ({manifest['generated'] - manifest['rows']:,} duplicates dropped) "
+          f"in {len(manifest['shards'])} shards, {time.perf_counter() - start - elapsed:.1f} s to shuffle and write")
+    return manifest
+
+
+def main():
+    """Command line dataset builder"""
+    parser = argparse.ArgumentParser(description="Behaviour-cloning dataset from the rule-based AI ships")
+    parser.add_argument('path', help="Dataset directory")
+    parser.add_argument('--samples', type=int, default=1000000)
+    parser.add_argument('--workers', type=int, default=None, help="Processes (default: one per CPU)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--shard-size', type=int, default=262144)
+    parser.add_argument('--episode-ticks', type=int, default=EPISODE_TICKS)
+    args = parser.parse_args()
+
+    if os.path.exists(os.path.join(args.path, MANIFEST)):
+        raise SystemExit(f"{args.path} already holds a dataset")
+    try:
+        build(args.path, args.samples, args.workers, args.seed, args.shard_size, episode_ticks=args.episode_ticks)
+    except KeyboardInterrupt:
+        raise SystemExit("\nInterrupted: the spooled samples are kept, run again to continue")
+
+
+if __name__ == "__main__":
+    main()
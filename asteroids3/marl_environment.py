@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+Multi-Agent Reinforcement Learning Environment
+Gymnasium-style multi-agent environment over the pygame engine
+
+Python counterpart of marl_environment.js. Each AIShip is an agent; agents
+are slots holding an AIShip (or None once the ship is gone, like the null
+observations of getObservation). Observations and rewards are computed for
+all agents at once.
+
+    env = AsteroidsMARLEnv(num_agents=3)
+    observations, info = env.reset(seed=1)                  # (agents, 21)
+    observations, rewards, terminated, truncated, info = env.step(actions)
+
+Actions are (agents, 4) integers from the MARLSystem.actionSpace of
+marl_system.js: rotation index into (-1, 0, 1), thrust, fire and shield
+(0/1). The game world is module state of game_pygame, so there is one
+AsteroidsMARLEnv per process; VectorAsteroidsMARLEnv runs one per worker
+process. gymnasium is optional: with it installed the environment is a
+gymnasium.Env with declared spaces.
+
+Usage:
+    python3 marl_environment.py --benchmark --envs 1 4      # environment steps per second
+"""
+
+import argparse
+import math
+import multiprocessing
+import os
+import time
+import numpy as np
+
+try:
+    import gymnasium
+    from gymnasium import spaces
+except ImportError:  # Plain reset()/step() API without declared spaces
+    gymnasium = None
+
+# Observation layout of MARLEnvironment.getObservation (marl_environment.js)
+OBSERVATION_NAMES = (
+    'x', 'y', 'angle', 'velocity_x', 'velocity_y', 'health', 'phase', 'shield_active',
+    'nearest_asteroid_distance', 'nearest_asteroid_angle', 'nearest_asteroid_size',
+    'nearest_enemy_distance', 'nearest_enemy_angle', 'nearest_enemy_health',
+    'nearest_ally_distance', 'nearest_ally_angle', 'nearest_ally_health',
+    'asteroid_count', 'enemy_count', 'ally_count', 'average_ally_health',
+)
+OBSERVATION_SIZE = len(OBSERVATION_NAMES)
+
+# Own state (x, y, angle, velocity_x, velocity_y, health, ai_phase, shield_active)
+# normalized as scale * value + offset: positions over [-1000, 1000] -> [-1, 1],
+# velocities over [-10, 10], health over [0, 3], phase 1-3 -> 0-1
+OWN_STATE_SCALE = np.array([1 / 1000, 1 / 1000, 1 / (2 * math.pi), 1 / 20, 1 / 20, 1 / 3, 1 / 2, 1],
+                           dtype=np.float32)
+OWN_STATE_OFFSET = np.array([0, 0, 0, 0.5, 0.5, 0, -0.5, 0], dtype=np.float32)
+DEAD_STATE = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1, False)
+
+# Nearest asteroid, enemy and ally features (columns 8-16): distance range,
+# scale of the third value (size or health) and the values when there is none
+NEAREST_RANGE = np.array([200.0, 400.0, 300.0])
+NEAREST_VALUE_SCALE = np.array([1 / 50, 1 / 5, 1 / 3])
+NEAREST_ABSENT = np.array([[1.0, 0.0, 0.0], [1.0, 0.0, 0.0], [1.0, 0.0, 1.0]], dtype=np.float32)
+
+# Rewards of MARLEnvironment.calculateRewards
+SURVIVAL_REWARD = 0.1
+DAMAGE_PENALTY = -10.0
+DEATH_PENALTY = -100.0
+FORMATION_RADIUS = 100.0
+FORMATION_REWARD = 0.5  # Per nearby ally, up to 2
+FLOCKING_REWARD = 0.2  # Per nearby ally, up to 3
+PROTECTION_REWARD = 5.0
+PROTECTION_RANGE = (20.0, 80.0)
+SCORE_REWARD = 2.0  # Per point scored, shared by all agents
+MAX_HEALTH = 3
+
+# Action space of MARLSystem.actionSpace: rotation, thrust, fire, shield
+ROTATIONS = (-1, 0, 1)
+ACTION_NVEC = (len(ROTATIONS), 2, 2, 2)
+MAX_EPISODE_STEPS = 1000
+
+
+class ObservationBuilder:
+    """Builds the (agents, 21) observation matrix in a single vectorized pass
+
+    Asteroids, enemies and allies go into one entity array, so a single
+    agent x entity squared-distance matrix serves all three nearest-entity
+    searches (one argmin per entity group) instead of a scan per agent.
+    Observations are written into one preallocated float32 array that is
+    returned by every build(); rows of empty agent slots are zero. The
+    working arrays are preallocated too (the entity-sized ones grow with
+    the largest world seen) and filled with out= ufuncs, so a build only
+    allocates when converting the game objects' attributes to arrays.
+    """
+    def __init__(self, num_agents):
+        self.num_agents = num_agents
+        self.observations = np.zeros((num_agents, OBSERVATION_SIZE), dtype=np.float32)
+        self._nearest = self.observations[:, 8:17].reshape(num_agents, 3, 3)
+        self._own = np.zeros((num_agents, 8))
+        self._alive = np.zeros(num_agents, dtype=bool)
+        self._dead = np.zeros(num_agents, dtype=bool)
+        self._health = np.zeros(num_agents)
+        self._index = np.zeros((num_agents, 3), dtype=np.intp)
+        self._flat_index = np.zeros((num_agents, 3), dtype=np.intp)
+        self._found = np.zeros((num_agents, 3), dtype=bool)
+        self._valid = np.zeros((num_agents, 3), dtype=bool)
+        self._gathered = np.zeros((num_agents, 3))
+        self._gathered_x = np.zeros((num_agents, 3))
+        self._capacity = 0
+        self._reserve(num_agents + 64)
+
+    def _reserve(self, size):
+        """Grow the entity-sized working arrays to hold `size` entities"""
+        if size <= self._capacity:
+            return
+        capacity = max(size, 2 * self._capacity)
+        self._entities = np.zeros((capacity, 3))
+        self._dx = np.zeros((self.num_agents, capacity))
+        self._dy = np.zeros((self.num_agents, capacity))
+        self._distance_sq = np.zeros((self.num_agents, capacity))
+        self._scratch = np.zeros((self.num_agents, capacity))
+        # Flat offset of each agent row, for np.take on the full matrices
+        self._row_offsets = (np.arange(self.num_agents) * capacity)[:, None]
+        self._capacity = capacity
+
+    def build(self, agents, asteroids, enemies):
+        """Observations of agent slots (AIShip or None) against the world entities"""
+        obs = self.observations
+        own, alive, dead = self._own, self._alive, self._dead
+        own[:] = [(a.x, a.y, a.angle, a.velocity_x, a.velocity_y, a.health, a.ai_phase, a.shield_active)
+                  if a is not None else DEAD_STATE for a in agents]
+        alive[:] = [a is not None for a in agents]
+        np.logical_not(alive, out=dead)
+        np.multiply(own, OWN_STATE_SCALE, out=obs[:, :8], casting='unsafe')
+        obs[:, :8] += OWN_STATE_OFFSET
+
+        # Entity rows x, y, value: asteroids (size), enemies (health), then all agent slots (health)
+        num_asteroids = len(asteroids)
+        num_others = num_asteroids + len(enemies)
+        size = num_others + self.num_agents
+        self._reserve(size)
+        entities = self._entities[:size]
+        if num_others:
+            entities[:num_others] = ([(a.x, a.y, a.size) for a in asteroids] +
+                                     [(e.x, e.y, e.health) for e in enemies])
+        entities[num_others:, :2] = own[:, :2]
+        entities[num_others:, 2] = own[:, 5]
+        dx = self._dx[:, :size]
+        dy = self._dy[:, :size]
+        distance_sq = self._distance_sq[:, :size]
+        np.subtract(entities[:, 0], own[:, 0, None], out=dx)
+        np.subtract(entities[:, 1], own[:, 1, None], out=dy)
+        np.multiply(dx, dx, out=distance_sq)
+        distance_sq += np.multiply(dy, dy, out=self._scratch[:, :size])
+        # An agent is not its own ally, and empty slots are nobody's
+        np.fill_diagonal(distance_sq[:, num_others:], np.inf)
+        np.copyto(distance_sq[:, num_others:], np.inf, where=dead)
+
+        bounds = (0, num_asteroids, num_others, size)
+        nearest = self._index
+        for group in range(3):
+            start, end = bounds[group], bounds[group + 1]
+            if end > start:
+                np.argmin(distance_sq[:, start:end], axis=1, out=nearest[:, group])
+                nearest[:, group] += start
+            else:
+                nearest[:, group] = -1
+        flat_index = np.add(nearest, self._row_offsets, out=self._flat_index)
+        gathered, gathered_x = self._gathered, self._gathered_x
+        found = self._found
+        np.take(self._distance_sq, flat_index, out=gathered)
+        np.isfinite(gathered, out=found)
+        found &= np.greater_equal(nearest, 0, out=self._valid)
+        features = self._nearest
+        np.sqrt(gathered, out=gathered)
+        gathered /= NEAREST_RANGE
+        features[:, :, 0] = gathered
+        np.take(self._dy, flat_index, out=gathered)
+        np.take(self._dx, flat_index, out=gathered_x)
+        np.arctan2(gathered, gathered_x, out=gathered)
+        gathered /= 2 * math.pi
+        features[:, :, 1] = gathered
+        np.take(entities[:, 2], nearest, out=gathered)
+        gathered *= NEAREST_VALUE_SCALE
+        features[:, :, 2] = gathered
+        np.copyto(features, NEAREST_ABSENT, where=np.logical_not(found, out=found)[:, :, None])
+
+        # Global observations
+        ally_count = int(alive.sum()) - 1
+        obs[:, 17] = min(len(asteroids) / 10, 1.0)
+        obs[:, 18] = min(len(enemies) / 5, 1.0)
+        obs[:, 19] = min(ally_count / 5, 1.0)
+        health = self._health
+        health[:] = 0.0
+        np.copyto(health, own[:, 5], where=alive)
+        np.subtract(health.sum(), health, out=health)
+        health /= max(1, ally_count)
+        health /= 3
+        obs[:, 20] = health
+
+        obs[dead] = 0.0
+        return obs
+
+
+class RewardCalculator:
+    """Cooperative rewards for all agents as array expressions
+
+    Previous health and positions live in persistent per-slot arrays
+    (previousStates in marl_environment.js), updated in place every step.
+    """
+    def __init__(self, num_agents):
+        self.num_agents = num_agents
+        self.previous_health = np.zeros(num_agents)
+        self.previous_x = np.zeros(num_agents)
+        self.previous_y = np.zeros(num_agents)
+        self.rewards = np.zeros(num_agents, dtype=np.float32)
+        self.episode_rewards = np.zeros(num_agents)
+        self._self_mask = np.eye(num_agents, dtype=bool)
+        self._rows = np.arange(num_agents)
+
+    def reset(self, agents):
+        """Start an episode from the agents' current state"""
+        state = self._state(agents)
+        self.previous_x[:], self.previous_y[:], self.previous_health[:] = state[:, 0], state[:, 1], state[:, 2]
+        self.episode_rewards[:] = 0.0
+
+    def _state(self, agents):
+        """(x, y, health) per slot; empty slots are at health 0"""
+        return np.array([(a.x, a.y, a.health) if a is not None else (0.0, 0.0, 0.0) for a in agents],
+                        dtype=np.float64).reshape(-1, 3)
+
+    def compute(self, agents, enemies, previous_score, score):
+        """Rewards of one step (written into the reused rewards array)
+
+        Agent slots hold an AIShip, including one that died this step (its
+        health is 0 or less), or None.
+        """
+        state = self._state(agents)
+        x, y, health = state[:, 0], state[:, 1], state[:, 2]
+        present = np.array([a is not None for a in agents], dtype=bool)
+
+        # Individual rewards: survival, damage taken, death
+        reward = np.where(present, SURVIVAL_REWARD, 0.0)
+        reward += DAMAGE_PENALTY * (present & (health < self.previous_health))
+        reward += DEATH_PENALTY * (present & (health <= 0))
+
+        # Cooperative rewards from the agent x agent distance matrix
+        dx = x[None, :] - x[:, None]
+        dy = y[None, :] - y[:, None]
+        distance_sq = dx * dx + dy * dy
+        others = present[:, None] & present[None, :]
+        others[self._self_mask] = False
+        nearby = ((distance_sq < FORMATION_RADIUS ** 2) & others).sum(axis=1)
+        reward += FORMATION_REWARD * np.minimum(nearby, 2) + FLOCKING_REWARD * np.minimum(nearby, 3)
+
+        # Protection: near (but not on top of) the lowest-health ally while enemies are around
+        if enemies:
+            wounded = others & ((health > 0) & (health < MAX_HEALTH))[None, :]
+            ally_health = np.where(wounded, health[None, :], np.inf)
+            lowest = np.argmin(ally_health, axis=1)
+            rows = self._rows
+            ally_distance_sq = distance_sq[rows, lowest]
+            protecting = (np.isfinite(ally_health[rows, lowest]) &
+                          (ally_distance_sq > PROTECTION_RANGE[0] ** 2) &
+                          (ally_distance_sq < PROTECTION_RANGE[1] ** 2))
+            reward += PROTECTION_REWARD * protecting
+
+        self.episode_rewards += reward
+        # Score-based reward, shared among all agents
+        if score > previous_score:
+            reward += (score - previous_score) * SCORE_REWARD / self.num_agents
+
+        self.previous_x[:] = x
+        self.previous_y[:] = y
+        self.previous_health[:] = health
+        self.rewards[:] = reward
+        return self.rewards
+
+
+def policy_to_actions(outputs):
+    """Discrete actions from actor outputs in [0, 1] (see marl_system.py)"""
+    outputs = np.asarray(outputs)
+    actions = (outputs > 0.5).astype(np.int64)
+    actions[..., 0] = np.minimum((outputs[..., 0] * len(ROTATIONS)).astype(np.int64), len(ROTATIONS) - 1)
+    return actions
+
+
+class AsteroidsMARLEnv(gymnasium.Env if gymnasium else object):
+    """The game world as a multi-agent environment (one per process)
+
+    An episode ends (terminated) when every agent is destroyed, or when the
+    player ship dies and the game restarts; it is truncated after
+    max_episode_steps. Destroyed agents are not respawned within an
+    episode. Rewards are an array with one reward per agent.
+    """
+    _open = False
+
+    def __init__(self, num_agents=3, num_enemies=2, num_bosses=1, max_episode_steps=MAX_EPISODE_STEPS,
+                 player=False, world_size=None, settings=None):
+        if AsteroidsMARLEnv._open:
+            raise RuntimeError("game_pygame holds a single world: use one AsteroidsMARLEnv per process "
+                               "(VectorAsteroidsMARLEnv for several)")
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+        os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+        import game_pygame
+        from menu_pygame import Menu
+        AsteroidsMARLEnv._open = True
+
+        self.game = game_pygame
+        self.num_agents = num_agents
+        self.max_episode_steps = max_episode_steps
+        self.settings = dict(settings or Menu(game_pygame.SCREEN_WIDTH, game_pygame.SCREEN_HEIGHT).get_settings())
+        self.settings.update(num_ai_ships=num_agents, num_enemy_ships=num_enemies, num_boss_ships=num_bosses,
+                             player_ship_active=player, marl_enabled=True)
+        if world_size:
+            self.settings['world_width'], self.settings['world_height'] = world_size
+
+        self.observation_shape = (num_agents, OBSERVATION_SIZE)
+        self.action_nvec = np.array([ACTION_NVEC] * num_agents)
+        if gymnasium:
+            self.observation_space = spaces.Box(-np.inf, np.inf, self.observation_shape, dtype=np.float32)
+            self.action_space = spaces.MultiDiscrete(self.action_nvec)
+
+        self.observation_builder = ObservationBuilder(num_agents)
+        self.reward_calculator = RewardCalculator(num_agents)
+        self.agents = [None] * num_agents
+        self.episode_step = 0
+
+    def reset(self, seed=None, options=None):
+        """Start a new episode, returns (observations, info)"""
+        game = self.game
+        game.apply_settings(self.settings)
+        game.reset_world(seed)
+        self.agents = list(game.ai_ships)
+        self.episode_step = 0
+        self.reward_calculator.reset(self.agents)
+        observations = self.observation_builder.build(self.agents, game.asteroids, game.enemy_ships)
+        return observations.copy(), {'step': 0, 'alive_agents': self.num_agents}
+
+    def step(self, actions):
+        """Advance one tick with every live agent acting on its action row"""
+        game = self.game
+        actions = np.asarray(actions)
+        ai_actions = {}
+        for agent, (rotation, thrust, fire, shield) in zip(self.agents, actions.tolist()):
+            if agent is not None:
+                ai_actions[agent] = (ROTATIONS[rotation], thrust, fire, shield)
+
+        previous_score = game.score
+        game.step_world(0, ai_actions)
+        self.episode_step += 1
+
+        # Agents missing from the world were destroyed, or the game restarted
+        in_world = set(map(id, game.ai_ships))
+        lost = [i for i, agent in enumerate(self.agents) if agent is not None and id(agent) not in in_world]
+        world_reset = any(self.agents[i].health > 0 for i in lost)
+        rewards = self.reward_calculator.compute(self.agents, game.enemy_ships, previous_score, game.score)
+        for i in lost:
+            self.agents[i] = None
+        # No respawns within an episode
+        game.num_ai_ships = len(game.ai_ships)
+
+        alive = sum(agent is not None for agent in self.agents)
+        observations = self.observation_builder.build(self.agents, game.asteroids, game.enemy_ships)
+        terminated = alive == 0 or world_reset
+        truncated = not terminated and self.episode_step >= self.max_episode_steps
+        info = {'step': self.episode_step, 'alive_agents': alive, 'score': game.score,
+                'agent_dones': np.array([agent is None for agent in self.agents])}
+        return observations.copy(), rewards.copy(), terminated, truncated, info
+
+    def close(self):
+        """Release the process's world for another environment"""
+        AsteroidsMARLEnv._open = False
+
+
+def _worker(connection, env_kwargs):
+    """Vector environment worker: one AsteroidsMARLEnv driven over a pipe"""
+    env = AsteroidsMARLEnv(**env_kwargs)
+    try:
+        while True:
+            command, data = connection.recv()
+            if command == 'step':
+                observations, rewards, terminated, truncated, info = env.step(data)
+                if terminated or truncated:
+                    info['final_observation'] = observations
+                    observations, _ = env.reset()
+                connection.send((observations, rewards, terminated, truncated, info))
+            elif command == 'reset':
+                connection.send(env.reset(seed=data))
+            elif command == 'close':
+                break
+    finally:
+        env.close()
+        connection.close()
+
+
+class VectorAsteroidsMARLEnv:
+    """num_envs worlds stepped in parallel worker processes
+
+    Observations are batched to (envs, agents, 21) and rewards to (envs,
+    agents). Finished episodes reset automatically; the last observation of
+    the old episode is in info['final_observation'].
+    """
+    def __init__(self, num_envs, **env_kwargs):
+        self.num_envs = num_envs
+        self.num_agents = env_kwargs.get('num_agents', 3)
+        context = multiprocessing.get_context('spawn')
+        self.connections = []
+        self.processes = []
+        for i in range(num_envs):
+            parent, child = context.Pipe()
+            process = context.Process(target=_worker, args=(child, env_kwargs), name=f"marl-env-{i}", daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+
+    def reset(self, seed=None):
+        """Reset every world (world i gets seed + i), returns (observations, infos)"""
+        for i, connection in enumerate(self.connections):
+            connection.send(('reset', None if seed is None else seed + i))
+        results = [connection.recv() for connection in self.connections]
+        return np.stack([observations for observations, _ in results]), [info for _, info in results]
+
+    def step(self, actions):
+        """Step every world with its (agents, 4) action array"""
+        for connection, env_actions in zip(self.connections, actions):
+            connection.send(('step', env_actions))
+        results = [connection.recv() for connection in self.connections]
+        observations, rewards, terminated, truncated, infos = zip(*results)
+        return (np.stack(observations), np.stack(rewards), np.array(terminated), np.array(truncated),
+                list(infos))
+
+    def close(self):
+        """Stop the workers"""
+        for connection in self.connections:
+            try:
+                connection.send(('close', None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join(timeout=5)
+        for connection in self.connections:
+            connection.close()
+
+
+def benchmark(num_envs=1, num_agents=3, steps=2000, **env_kwargs):
+    """Environment throughput with random actions, returns environment steps per second"""
+    rng = np.random.default_rng(0)
+    if num_envs == 1:
+        env = AsteroidsMARLEnv(num_agents, **env_kwargs)
+        env.reset(seed=0)
+        start = time.perf_counter()
+        for _ in range(steps):
+            _, _, terminated, truncated, _ = env.step(rng.integers(0, ACTION_NVEC, (num_agents, 4)))
+            if terminated or truncated:
+                env.reset()
+        elapsed = time.perf_counter() - start
+        env.close()
+        return steps / elapsed
+
+    env = VectorAsteroidsMARLEnv(num_envs, num_agents=num_agents, **env_kwargs)
+    env.reset(seed=0)
+    iterations = max(1, steps // num_envs)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        env.step(rng.integers(0, ACTION_NVEC, (num_envs, num_agents, 4)))
+    elapsed = time.perf_counter() - start
+    env.close()
+    return iterations * num_envs / elapsed
+
+
+def main():
+    """Command line benchmark"""
+    parser = argparse.ArgumentParser(description="Asteroids multi-agent environment")
+    parser.add_argument('--benchmark', action='store_true', help="Measure environment steps per second")
+    parser.add_argument('--envs', type=int, nargs='+', default=[1, 4], help="Worlds (1 runs in-process)")
+    parser.add_argument('--agents', type=int, default=3)
+    parser.add_argument('--enemies', type=int, default=2)
+    parser.add_argument('--bosses', type=int, default=1)
+    parser.add_argument('--steps', type=int, default=2000)
+    args = parser.parse_args()
+
+    if not args.benchmark:
+        parser.print_help()
+        return
+    for num_envs in args.envs:
+        rate = benchmark(num_envs, args.agents, args.steps, num_enemies=args.enemies, num_bosses=args.bosses)
+        print(f"{num_envs} env(s), {args.agents} agents: {rate:8.0f} env steps/s "
+              f"({rate * args.agents:,.0f} agent steps/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Batched Policy Inference Server for Multi-Agent Reinforcement Learning
+One process evaluates the actor networks for many game processes
+
+Headless game workers each loading the policy and running a forward pass
+per tick spend most of that time on per-call overhead (a few tiny matmuls
+per layer). The server keeps one copy of the actors, listens on a Unix
+socket, and collects observation requests from every connected worker. A
+batch is evaluated when it reaches max_batch requests, when the oldest
+request has waited max_delay_ms, or as soon as every connected worker is
+waiting (nobody else can join the batch). All requests then go through a
+single StackedMLP.forward over (agents, batch, 21), and the outputs are
+scattered back.
+
+Messages are a '<II' header (rows, columns) followed by float32 rows: a
+request carries one observation row per agent slot (the ObservationBuilder
+matrix), the reply one actor output row per slot. Row i uses actor i, and
+rows beyond the last actor reuse it (as marl_checkpoint.js does), so any
+number of AI ships can be driven. A malformed request gets an error reply:
+a (message length, 0) header followed by the UTF-8 message.
+
+Game workers use PolicyClient, a drop-in for LocalPolicy: both map (agents,
+21) observations to (agents, 4) actor outputs, and either can be set as
+game_pygame.ai_policy to drive the AI ships.
+
+Usage:
+    python3 marl_inference.py --serve /tmp/policy.sock --checkpoint policy.ckpt
+    python3 marl_inference.py --benchmark --workers 8     # served vs per-process inference
+    python3 marl_inference.py --benchmark --precision int8 --checkpoint policy.ckpt
+"""
+
+import argparse
+import multiprocessing
+import os
+import selectors
+import socket
+import struct
+import tempfile
+import time
+from collections import deque
+import numpy as np
+from marl_network import OBSERVATION_SIZE, create_actors
+
+HEADER = struct.Struct('<II')  # rows, columns
+LATENCY_SAMPLES = 10000
+
+
+def _recv_exact(sock, size):
+    """Read exactly size bytes (ConnectionError if the peer closes)"""
+    data = bytearray(size)
+    view = memoryview(data)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if not count:
+            raise ConnectionError("policy server connection closed")
+        received += count
+    return data
+
+
+def actor_slots(rows, num_agents):
+    """(actor, batch column) of each observation row: extra rows go to the last actor"""
+    index = np.arange(rows)
+    last = num_agents - 1
+    return np.minimum(index, last), np.maximum(index - last, 0)
+
+
+def load_actors(checkpoint=None, num_agents=3, precision='float32'):
+    """Actors of a checkpoint, or freshly initialized actors, at a precision
+
+    int8 and float16 weights come from the checkpoint when marl_quantize.py
+    stored them, otherwise they are quantized on load. Either way they are
+    dequantized to a float32 StackedMLP, which runs at float32 speed.
+    """
+    if checkpoint:
+        from marl_checkpoint import Checkpoint
+        checkpoint = Checkpoint(checkpoint)
+        actors = checkpoint.network('actors')
+    else:
+        actors = create_actors(num_agents, np.random.default_rng(0))
+    if precision == 'float32':
+        return actors
+    from marl_quantize import QuantizedMLP
+    name = f"actors_{precision}"
+    if checkpoint and name in checkpoint.networks:
+        return QuantizedMLP.from_checkpoint(checkpoint, name).dequantize()
+    return QuantizedMLP.from_network(actors, precision).dequantize()
+
+
+class LocalPolicy:
+    """Per-process actor inference (one unbatched forward per call)"""
+    def __init__(self, actors):
+        self.actors = actors
+
+    def __call__(self, observations):
+        """Actor outputs (agents, 4) for observations (agents, 21)"""
+        observations = np.asarray(observations, dtype=np.float32)
+        actors, columns = actor_slots(len(observations), self.actors.num_agents)
+        width = columns[-1] + 1 if len(columns) else 1
+        inputs = np.zeros((self.actors.num_agents, width, OBSERVATION_SIZE), dtype=np.float32)
+        inputs[actors, columns] = observations
+        return self.actors.forward(inputs)[actors, columns]
+
+    def close(self):
+        """Nothing to release"""
+
+
+class PolicyClient:
+    """Actor inference through an InferenceServer (drop-in for LocalPolicy)"""
+    def __init__(self, path):
+        self.path = path
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+
+    def __call__(self, observations):
+        """Actor outputs (agents, 4) for observations (agents, 21)"""
+        observations = np.ascontiguousarray(observations, dtype=np.float32)
+        self.sock.sendall(HEADER.pack(*observations.shape) + observations.tobytes())
+        rows, columns = HEADER.unpack(_recv_exact(self.sock, HEADER.size))
+        if columns == 0:
+            raise ValueError(f"policy server: {_recv_exact(self.sock, rows).decode()}")
+        data = _recv_exact(self.sock, rows * columns * 4)
+        return np.frombuffer(data, dtype=np.float32).reshape(rows, columns)
+
+    def close(self):
+        """Disconnect from the server"""
+        self.sock.close()
+
+
+class _Connection:
+    """Server side of a worker connection: receive buffer and pending request"""
+    def __init__(self, sock):
+        self.sock = sock
+        self.buffer = bytearray()
+        self.waiting = False
+
+
+class InferenceServer:
+    """Unix socket server batching actor requests from many game workers"""
+    def __init__(self, path, actors, max_batch=64, max_delay_ms=2.0):
+        self.path = path
+        self.actors = actors
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000.0
+        self.selector = selectors.DefaultSelector()
+        self.connections = {}
+        self.pending = []  # (connection, observations, received time)
+
+        # Statistics
+        self.requests = 0
+        self.batches = 0
+        self.forward_seconds = 0.0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+        if os.path.exists(path):
+            os.unlink(path)
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(path)
+        self.listener.listen(128)
+        self.listener.setblocking(False)
+        self.selector.register(self.listener, selectors.EVENT_READ)
+
+    def _accept(self):
+        """New worker connection"""
+        sock, _ = self.listener.accept()
+        sock.setblocking(True)  # Only read when readable; replies are small
+        connection = _Connection(sock)
+        self.connections[sock] = connection
+        self.selector.register(sock, selectors.EVENT_READ, connection)
+
+    def _drop(self, connection):
+        """Worker disconnected"""
+        self.selector.unregister(connection.sock)
+        del self.connections[connection.sock]
+        connection.sock.close()
+        self.pending = [request for request in self.pending if request[0] is not connection]
+
+    def _read(self, connection):
+        """Receive data and queue complete requests"""
+        data = connection.sock.recv(65536)
+        if not data:
+            self._drop(connection)
+            return
+        buffer = connection.buffer
+        buffer += data
+        while len(buffer) >= HEADER.size:
+            rows, columns = HEADER.unpack_from(buffer)
+            end = HEADER.size + rows * columns * 4
+            if len(buffer) < end:
+                break
+            if columns != OBSERVATION_SIZE:
+                del buffer[:end]
+                message = f"request of {rows}x{columns} observations, expected {OBSERVATION_SIZE} columns"
+                try:
+                    connection.sock.sendall(HEADER.pack(len(message.encode()), 0) + message.encode())
+                except OSError:
+                    self._drop(connection)
+                    return
+                continue
+            observations = np.frombuffer(bytes(buffer[HEADER.size:end]), dtype=np.float32)
+            del buffer[:end]
+            self.pending.append((connection, observations.reshape(rows, columns), time.perf_counter()))
+            connection.waiting = True
+
+    def _flush(self):
+        """Evaluate all pending requests as one batch and reply"""
+        pending = self.pending[:self.max_batch]
+        self.pending = self.pending[self.max_batch:]
+        # Each request takes one batch column, plus one per row beyond the last actor
+        slots = []
+        width = 0
+        for _, observations, _ in pending:
+            actors, columns = actor_slots(len(observations), self.actors.num_agents)
+            slots.append((actors, columns + width))
+            width += columns[-1] + 1 if len(columns) else 1
+        inputs = np.zeros((self.actors.num_agents, width, OBSERVATION_SIZE), dtype=np.float32)
+        for (_, observations, _), (actors, columns) in zip(pending, slots):
+            inputs[actors, columns] = observations
+        start = time.perf_counter()
+        outputs = self.actors.forward(inputs)
+        self.forward_seconds += time.perf_counter() - start
+        for (connection, observations, received), (actors, columns) in zip(pending, slots):
+            reply = np.ascontiguousarray(outputs[actors, columns])
+            try:
+                connection.sock.sendall(HEADER.pack(*reply.shape) + reply.tobytes())
+            except OSError:
+                self._drop(connection)
+                continue
+            connection.waiting = False
+            self.latencies.append(time.perf_counter() - received)
+        self.requests += len(pending)
+        self.batches += 1
+
+    def serve(self, stop=None, report_every=None):
+        """Serve until stop (a threading/multiprocessing Event) is set
+
+        Prints report() every report_every seconds when given.
+        """
+        next_report = time.perf_counter() + report_every if report_every else None
+        while stop is None or not stop.is_set():
+            timeout = 0.1
+            if self.pending:
+                timeout = max(0.0, self.pending[0][2] + self.max_delay - time.perf_counter())
+            for key, _ in self.selector.select(timeout):
+                if key.fileobj is self.listener:
+                    self._accept()
+                elif key.data.sock in self.connections:
+                    self._read(key.data)
+            if self.pending:
+                full = len(self.pending) >= self.max_batch
+                everyone = all(connection.waiting for connection in self.connections.values())
+                overdue = time.perf_counter() - self.pending[0][2] >= self.max_delay
+                if full or everyone or overdue:
+                    self._flush()
+            if next_report is not None and time.perf_counter() >= next_report:
+                print(self.report())
+                next_report += report_every
+
+    def stats(self):
+        """Batching efficiency and queue latency percentiles"""
+        latencies = np.array(self.latencies) * 1000.0
+        mean_batch = self.requests / self.batches if self.batches else 0.0
+        stats = {'requests': self.requests, 'batches': self.batches, 'mean_batch': mean_batch,
+                 'efficiency': mean_batch / self.max_batch,
+                 'forward_us': self.forward_seconds / self.batches * 1e6 if self.batches else 0.0}
+        for q in (50, 90, 99):
+            stats[f"latency_p{q}_ms"] = float(np.percentile(latencies, q)) if len(latencies) else 0.0
+        return stats
+
+    def report(self):
+        """One-line statistics summary"""
+        s = self.stats()
+        return (f"{s['requests']} requests in {s['batches']} batches: mean batch {s['mean_batch']:.1f} "
+                f"({s['efficiency']:.0%} of {self.max_batch}), forward {s['forward_us']:.0f} us, "
+                f"latency p50 {s['latency_p50_ms']:.2f} / p90 {s['latency_p90_ms']:.2f} / "
+                f"p99 {s['latency_p99_ms']:.2f} ms")
+
+    def close(self):
+        """Close every connection and remove the socket"""
+        for connection in list(self.connections.values()):
+            self._drop(connection)
+        self.selector.close()
+        self.listener.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def _server_process(path, checkpoint, num_agents, precision, max_batch, max_delay_ms, ready, stop, results):
+    """Benchmark server process"""
+    server = InferenceServer(path, load_actors(checkpoint, num_agents, precision), max_batch, max_delay_ms)
+    ready.set()
+    try:
+        server.serve(stop)
+    finally:
+        results.put(server.stats())
+        server.close()
+
+
+def _game_process(path, checkpoint, num_agents, precision, steps, seed, results):
+    """Benchmark game worker: a headless world with policy-driven AI ships"""
+    from marl_environment import AsteroidsMARLEnv, policy_to_actions
+    policy = PolicyClient(path) if path else LocalPolicy(load_actors(checkpoint, num_agents, precision))
+    env = AsteroidsMARLEnv(num_agents)
+    observations, _ = env.reset(seed=seed)
+    policy_seconds = 0.0
+    start = time.perf_counter()
+    for _ in range(steps):
+        policy_start = time.perf_counter()
+        outputs = policy(observations)
+        policy_seconds += time.perf_counter() - policy_start
+        observations, _, terminated, truncated, _ = env.step(policy_to_actions(outputs))
+        if terminated or truncated:
+            observations, _ = env.reset()
+    results.put((steps, policy_seconds, time.perf_counter() - start))
+    env.close()
+    policy.close()
+
+
+def benchmark(workers=8, steps=500, num_agents=3, checkpoint=None, max_batch=64, max_delay_ms=2.0, served=True,
+              precision='float32'):
+    """Run game workers with served or per-process inference
+
+    Returns (steps per second over all workers, policy ms per call, server
+    stats or None).
+    """
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    server = None
+    path = None
+    if served:
+        path = os.path.join(tempfile.mkdtemp(prefix='marl-inference-'), 'policy.sock')
+        ready, stop = context.Event(), context.Event()
+        server = context.Process(target=_server_process, name='marl-inference', daemon=True,
+                                 args=(path, checkpoint, num_agents, precision, max_batch, max_delay_ms, ready,
+                                       stop, results))
+        server.start()
+        ready.wait()
+
+    start = time.perf_counter()
+    processes = [context.Process(target=_game_process, name=f"marl-game-{i}", daemon=True,
+                                 args=(path, checkpoint, num_agents, precision, steps, i, results))
+                 for i in range(workers)]
+    for process in processes:
+        process.start()
+    worker_results = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.join()
+
+    server_stats = None
+    if server is not None:
+        stop.set()
+        server_stats = results.get()
+        server.join()
+        os.rmdir(os.path.dirname(path))
+    total_steps = sum(r[0] for r in worker_results)
+    policy_ms = sum(r[1] for r in worker_results) / total_steps * 1000.0
+    return total_steps / elapsed, policy_ms, server_stats
+
+
+def main():
+    """Run the inference server, or benchmark it"""
+    parser = argparse.ArgumentParser(description="Batched MARL policy inference server")
+    parser.add_argument('--serve', metavar='SOCKET', help="Serve the policy on this Unix socket")
+    parser.add_argument('--benchmark', action='store_true', help="Compare served and per-process inference")
+    parser.add_argument('--checkpoint', help="Checkpoint directory with the actors (default: untrained)")
+    parser.add_argument('--agents', type=int, default=3, help="Agents of an untrained policy")
+    parser.add_argument('--precision', choices=('float32', 'float16', 'int8'), default='float32',
+                        help="Actor weight precision. Changes accuracy and checkpoint size only: the "
+                             "weights are dequantized at load and inference still runs float32 "
+                             "(see marl_quantize.py)")
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--max-delay-ms', type=float, default=2.0)
+    parser.add_argument('--report', type=float, default=10.0, help="Seconds between statistics lines")
+    parser.add_argument('--workers', type=int, default=8, help="Benchmark game processes")
+    parser.add_argument('--steps', type=int, default=500, help="Benchmark ticks per game process")
+    args = parser.parse_args()
+
+    if args.serve:
+        server = InferenceServer(args.serve, load_actors(args.checkpoint, args.agents, args.precision),
+                                 args.max_batch, args.max_delay_ms)
+        print(f"Serving {server.actors.num_agents} {args.precision} actors on {args.serve}")
+        try:
+            server.serve(report_every=args.report)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            print(server.report())
+            server.close()
+    elif args.benchmark:
+        for served in (False, True):
+            rate, policy_ms, stats = benchmark(args.workers, args.steps, args.agents, args.checkpoint,
+                                               args.max_batch, args.max_delay_ms, served, args.precision)
+            print(f"{'served' if served else 'per-process'}: {args.workers} workers, {rate:.0f} ticks/s, "
+                  f"policy {policy_ms:.3f} ms per call")
+            if stats:
+                print(f"  mean batch {stats['mean_batch']:.1f} ({stats['efficiency']:.0%} of {args.max_batch}), "
+                      f"forward {stats['forward_us']:.0f} us, latency p50 {stats['latency_p50_ms']:.2f} / "
+                      f"p90 {stats['latency_p90_ms']:.2f} / p99 {stats['latency_p99_ms']:.2f} ms")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -27,9 +27,13 @@ function initializeMARL(numAgents = 3, training = false) {
     
     console.log(`[MARL] System initialized with ${numAgents} agents, training=${training}`);
     
-    // Try to load existing model
+    // Try to load a trained checkpoint embedded by app.py, else the localStorage model
     if (!training) {
-        marlSystem.loadModel();
+        if (typeof MARL_CHECKPOINT !== 'undefined' && MARL_CHECKPOINT) {
+            marlSystem.loadCheckpoint(decodeEmbeddedCheckpoint(MARL_CHECKPOINT));
+        } else {
+            marlSystem.loadModel();
+        }
     }
 }
 
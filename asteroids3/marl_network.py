@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Neural Networks for Multi-Agent Reinforcement Learning
+NumPy actor/critic networks evaluated for all agents at once
+
+Same architecture as marl_system.js: dense layers with ReLU hidden units and
+a sigmoid output (critics can use a linear output for unbounded Q-values),
+Xavier-uniform weights and zero biases. Instead of one
+network per agent over nested arrays, each layer of a StackedMLP is a single
+contiguous float32 array with the agents stacked on the leading axis:
+
+    weights[l]  (agents, inputs, outputs)
+    biases[l]   (agents, 1, outputs)
+
+so forward() over (agents, batch, inputs) is one batched matmul per layer.
+
+Usage:
+    python3 marl_network.py --agents 10 --worlds 256    # inference benchmark
+"""
+
+import argparse
+import time
+import numpy as np
+
+# Layer sizes from marl_system.js
+OBSERVATION_SIZE = 21
+ACTION_SIZE = 4
+HIDDEN_SIZES = (64, 32)
+ACTOR_LAYERS = (OBSERVATION_SIZE,) + HIDDEN_SIZES + (ACTION_SIZE,)
+CRITIC_LAYERS = (OBSERVATION_SIZE + ACTION_SIZE,) + HIDDEN_SIZES + (1,)
+
+
+class StackedMLP:
+    """One MLP per agent, stored and evaluated as stacked float32 arrays"""
+    def __init__(self, num_agents, layer_sizes, rng=None, output='sigmoid'):
+        rng = rng or np.random.default_rng()
+        self.num_agents = num_agents
+        self.layer_sizes = tuple(layer_sizes)
+        self.output = output
+        self.weights = []
+        self.biases = []
+        for inputs, outputs in zip(self.layer_sizes[:-1], self.layer_sizes[1:]):
+            limit = np.sqrt(6.0 / (inputs + outputs))
+            self.weights.append(rng.uniform(-limit, limit, (num_agents, inputs, outputs)).astype(np.float32))
+            self.biases.append(np.zeros((num_agents, 1, outputs), dtype=np.float32))
+        # Activation buffers per batch size, reused across calls
+        self._buffers = {}
+
+    @classmethod
+    def from_parameters(cls, weights, biases, output='sigmoid'):
+        """Network over existing weight and bias arrays (not copied)"""
+        network = cls.__new__(cls)
+        network.num_agents = weights[0].shape[0]
+        network.layer_sizes = (weights[0].shape[1],) + tuple(w.shape[2] for w in weights)
+        network.output = output
+        network.weights = list(weights)
+        network.biases = list(biases)
+        network._buffers = {}
+        return network
+
+    @property
+    def parameters(self):
+        """All weight and bias arrays (updated in place by optimizers)"""
+        return self.weights + self.biases
+
+    def _activation_buffers(self, batch):
+        """Preallocated per-layer outputs for a batch size"""
+        buffers = self._buffers.get(batch)
+        if buffers is None:
+            buffers = [np.empty((self.num_agents, batch, size), dtype=np.float32)
+                       for size in self.layer_sizes[1:]]
+            self._buffers[batch] = buffers
+        return buffers
+
+    def forward(self, inputs, activations=False):
+        """Evaluate all agents' networks on inputs (agents, batch, inputs)
+
+        Returns the output (agents, batch, outputs), or the list of every
+        layer's output when activations is True (used for backpropagation).
+        The returned arrays are reused by the next call with the same batch
+        size; copy them to keep them.
+        """
+        h = np.asarray(inputs, dtype=np.float32)
+        buffers = self._activation_buffers(h.shape[1])
+        last = len(self.weights) - 1
+        for i, (w, b, out) in enumerate(zip(self.weights, self.biases, buffers)):
+            np.matmul(h, w, out=out)
+            out += b
+            if i < last:
+                np.maximum(out, 0.0, out=out)  # ReLU
+            elif self.output == 'sigmoid':
+                np.negative(out, out=out)  # Sigmoid
+                np.exp(out, out=out)
+                out += 1.0
+                np.reciprocal(out, out=out)
+            h = out
+        return buffers if activations else h
+
+    def backward(self, inputs, activations, grad_output, parameter_grads=True):
+        """Backpropagate d(loss)/d(output) through the layers of the last forward()
+
+        Returns (gradients in `parameters` order or None, d(loss)/d(inputs)).
+        """
+        weight_grads = []
+        bias_grads = []
+        grad = np.asarray(grad_output, dtype=np.float32)
+        last = len(self.weights) - 1
+        for i in range(last, -1, -1):
+            out = activations[i]
+            if i < last:
+                delta = grad * (out > 0)  # ReLU
+            elif self.output == 'sigmoid':
+                delta = grad * out * (1.0 - out)
+            else:
+                delta = grad
+            layer_input = inputs if i == 0 else activations[i - 1]
+            if parameter_grads:
+                weight_grads.append(np.matmul(layer_input.transpose(0, 2, 1), delta))
+                bias_grads.append(delta.sum(axis=1, keepdims=True))
+            grad = np.matmul(delta, self.weights[i].transpose(0, 2, 1))
+        if not parameter_grads:
+            return None, grad
+        return weight_grads[::-1] + bias_grads[::-1], grad
+
+    def copy_from(self, source):
+        """Copy all weights from another network of the same shape"""
+        for mine, theirs in zip(self.parameters, source.parameters):
+            mine[...] = theirs
+
+    def soft_update(self, source, tau):
+        """Move weights towards source: w = tau * source + (1 - tau) * w"""
+        for mine, theirs in zip(self.parameters, source.parameters):
+            mine *= (1.0 - tau)
+            mine += tau * theirs
+
+    def clone(self):
+        """Independent copy (e.g. a target network)"""
+        return StackedMLP.from_parameters([w.copy() for w in self.weights],
+                                          [b.copy() for b in self.biases], self.output)
+
+
+def create_actors(num_agents, rng=None):
+    """Policy networks: observation (21) -> action probabilities (4)"""
+    return StackedMLP(num_agents, ACTOR_LAYERS, rng)
+
+
+def create_critics(num_agents, rng=None, centralized=False):
+    """Value networks -> Q-value (linear output)
+
+    Per-agent critics see their own observation + action (25 inputs, as in
+    marl_system.js); centralized (MADDPG) critics see every agent's.
+    """
+    layers = CRITIC_LAYERS
+    if centralized:
+        layers = (num_agents * CRITIC_LAYERS[0],) + CRITIC_LAYERS[1:]
+    return StackedMLP(num_agents, layers, rng, output='linear')
+
+
+class Adam:
+    """Adam optimizer updating a list of parameter arrays in place"""
+    def __init__(self, parameters, learning_rate=0.001, beta1=0.9, beta2=0.999, epsilon=1e-8):
+        self.parameters = parameters
+        self.learning_rate = learning_rate
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+        self.steps = 0
+        self.m = [np.zeros_like(p) for p in parameters]
+        self.v = [np.zeros_like(p) for p in parameters]
+
+    def step(self, gradients):
+        """Apply one update"""
+        self.steps += 1
+        scale = self.learning_rate * np.sqrt(1 - self.beta2 ** self.steps) / (1 - self.beta1 ** self.steps)
+        for p, g, m, v in zip(self.parameters, gradients, self.m, self.v):
+            m *= self.beta1
+            m += (1 - self.beta1) * g
+            v *= self.beta2
+            v += (1 - self.beta2) * (g * g)
+            p -= scale * m / (np.sqrt(v) + self.epsilon)
+
+
+def benchmark(num_agents=10, worlds=256, iterations=200):
+    """Time batched actor inference, returns microseconds per call"""
+    actors = create_actors(num_agents, np.random.default_rng(0))
+    observations = np.random.default_rng(1).random((num_agents, worlds, OBSERVATION_SIZE), dtype=np.float32)
+    actors.forward(observations)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        actors.forward(observations)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    """Command line benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark batched MARL actor inference")
+    parser.add_argument('--agents', type=int, default=10)
+    parser.add_argument('--worlds', type=int, default=256)
+    args = parser.parse_args()
+    us = benchmark(args.agents, args.worlds)
+    print(f"Actor forward for {args.agents} agents x {args.worlds} worlds: {us:.0f} us "
+          f"({us / (args.agents * args.worlds) * 1000:.0f} ns per agent-world)")
+
+
+if __name__ == "__main__":
+    main()
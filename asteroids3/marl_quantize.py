@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Quantized Policies for Multi-Agent Reinforcement Learning
+Post-training int8 and float16 versions of the actor networks
+
+int8: weights are symmetric int8 with one scale per output channel (per
+agent). Layer inputs are quantized too, with scales calibrated on recorded
+observations: the observations are signed (-127..127), and the ReLU outputs
+feeding the hidden layers are non-negative, so they use 0..255. Without
+calibration the input scales are taken from each batch (dynamic
+quantization). Biases, accumulation rescaling and the sigmoid stay float32.
+
+float16: weights are rounded to float16, and so are the hidden activations
+when calibration shows their range fits float16 comfortably.
+
+Quantized networks are stored in the policy checkpoint next to the float32
+actors, as the 'actors_int8' and 'actors_float16' networks: 4x (2x)
+smaller weights to store and ship. That, and the accuracy cost, is all a
+precision changes here: inference is not faster, see below.
+
+NumPy has no int8 or float16 matrix multiply (integer and float16 matmul
+fall back to loops that are far slower than float32 BLAS), so inference
+(marl_inference.load_actors with a precision) dequantizes the stored
+weights to a float32 StackedMLP once at load: float32 speed with the
+accuracy of the quantized weights. QuantizedMLP.forward also quantizes
+the activations, with the integer arithmetic done exactly on float32 BLAS
+(every partial sum stays below 2 ** 24); it is slower than float32 and
+only measures the accuracy a runtime with real int8 kernels would get.
+
+Usage:
+    python3 marl_quantize.py policy.ckpt --calibration bc/       # quantize, save and report
+    python3 marl_quantize.py policy.ckpt --report-only           # report without saving
+    python3 marl_quantize.py --untrained                         # report on fresh actors
+"""
+
+import argparse
+import time
+import numpy as np
+from marl_network import StackedMLP
+
+PRECISIONS = ('float32', 'float16', 'int8')
+CALIBRATION_PERCENTILE = 99.99  # Of |layer input|, ignores rare outliers
+CALIBRATION_SAMPLES = 20000
+FLOAT16_SAFE = 1e4  # Largest calibrated activation kept in float16 (float16 max is 65504)
+
+
+def quantize_weights(weights):
+    """Symmetric per-output-channel int8 weights and their float32 scales (agents, 1, outputs)"""
+    scale = np.abs(weights).max(axis=1, keepdims=True) / 127.0
+    scale[scale == 0] = 1.0
+    return np.rint(weights / scale).astype(np.int8), scale.astype(np.float32)
+
+
+def input_ranges(network, observations, percentile=CALIBRATION_PERCENTILE):
+    """Calibrated |input| range of every layer, (agents, 1, 1) each
+
+    observations is (samples, 21) (every agent sees the same rows) or
+    (agents, samples, 21).
+    """
+    observations = np.asarray(observations, dtype=np.float32)
+    if observations.ndim == 2:
+        observations = np.broadcast_to(observations, (network.num_agents,) + observations.shape)
+    activations = network.forward(observations, activations=True)
+    inputs = [observations] + activations[:-1]
+    ranges = [np.percentile(np.abs(x), percentile, axis=(1, 2)).astype(np.float32).reshape(-1, 1, 1)
+              for x in inputs]
+    return [np.maximum(r, 1e-6) for r in ranges]
+
+
+def round_float16(x):
+    """Round a float32 array in place to float16 precision (10 mantissa bits, ties to even)
+
+    Same as a float16 round trip inside the float16 normal range, which
+    calibration checks, without NumPy's slow float16 conversion.
+    """
+    bits = x.view(np.uint32)
+    bits += np.uint32(0xFFF) + ((bits >> np.uint32(13)) & np.uint32(1))
+    bits &= np.uint32(0xFFFFE000)
+    return x
+
+
+class QuantizedMLP:
+    """int8 or float16 actors: stored form, dequantized inference network, and integer emulation"""
+    def __init__(self, layer_sizes, output, precision, weights, biases, weight_scales=None, input_ranges=None):
+        self.num_agents = weights[0].shape[0]
+        self.layer_sizes = tuple(layer_sizes)
+        self.output = output
+        self.precision = precision
+        self.weights = weights  # int8 or float16, as stored
+        self.biases = biases
+        self.weight_scales = weight_scales
+        self.input_ranges = input_ranges
+        # float32 BLAS operands holding the int8 / float16 values exactly
+        self._operands = [np.ascontiguousarray(w, dtype=np.float32) for w in weights]
+        # Signed observations, non-negative ReLU outputs
+        self._levels = [127.0] + [255.0] * (len(weights) - 1)
+        self._lows = [-127.0] + [0.0] * (len(weights) - 1)
+        self._round_hidden = (precision == 'float16' and input_ranges is not None and
+                              all(r.max() < FLOAT16_SAFE for r in input_ranges[1:]))
+        self._buffers = {}
+
+    @classmethod
+    def from_network(cls, network, precision, calibration=None):
+        """Quantize a StackedMLP; calibration is observations for the input ranges (optional)"""
+        ranges = input_ranges(network, calibration) if calibration is not None else None
+        if precision == 'int8':
+            pairs = [quantize_weights(w) for w in network.weights]
+            return cls(network.layer_sizes, network.output, precision, [q for q, _ in pairs],
+                       [np.asarray(b, dtype=np.float32) for b in network.biases],
+                       [scale for _, scale in pairs], ranges)
+        if precision == 'float16':
+            return cls(network.layer_sizes, network.output, precision,
+                       [np.asarray(w, dtype=np.float16) for w in network.weights],
+                       [np.asarray(b, dtype=np.float16) for b in network.biases], None, ranges)
+        raise ValueError(f"Unknown precision {precision!r} (one of {', '.join(PRECISIONS[1:])})")
+
+    def tensors(self, name):
+        """Checkpoint tensors of the network under name"""
+        tensors = {}
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            tensors[f"{name}.w{i}"] = w
+            tensors[f"{name}.b{i}"] = b
+            if self.weight_scales is not None:
+                tensors[f"{name}.w{i}_scale"] = self.weight_scales[i]
+            if self.input_ranges is not None:
+                tensors[f"{name}.x{i}_range"] = self.input_ranges[i]
+        return tensors
+
+    def info(self):
+        """Network entry of the checkpoint header"""
+        return {'layers': list(self.layer_sizes), 'output': self.output, 'precision': self.precision,
+                'calibrated': self.input_ranges is not None}
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint, name):
+        """Quantized network stored in a Checkpoint"""
+        info = checkpoint.networks[name]
+        count = len(info['layers']) - 1
+
+        def layers(suffix):
+            if f"{name}.{suffix}".format(0) not in checkpoint:
+                return None
+            return [np.asarray(checkpoint[f"{name}.{suffix}".format(i)]) for i in range(count)]
+        return cls(info['layers'], info['output'], info['precision'], layers('w{}'), layers('b{}'),
+                   layers('w{}_scale'), layers('x{}_range'))
+
+    def dequantize(self):
+        """float32 StackedMLP over the quantized weights (the inference path, at float32 cost)"""
+        weights = self._operands
+        if self.weight_scales is not None:
+            weights = [w * scale for w, scale in zip(weights, self.weight_scales)]
+        return StackedMLP.from_parameters(weights, [np.asarray(b, dtype=np.float32) for b in self.biases],
+                                          self.output)
+
+    @property
+    def nbytes(self):
+        """Bytes of the stored weights, biases and scales"""
+        arrays = self.weights + self.biases + (self.weight_scales or []) + (self.input_ranges or [])
+        return sum(a.nbytes for a in arrays)
+
+    def _activation_buffers(self, batch):
+        """Preallocated per-layer outputs for a batch size"""
+        if batch not in self._buffers:
+            outputs = [np.empty((self.num_agents, batch, size), dtype=np.float32) for size in self.layer_sizes[1:]]
+            quantized = np.empty((self.num_agents, batch, max(self.layer_sizes[:-1])), dtype=np.float32)
+            self._buffers[batch] = outputs, quantized
+        return self._buffers[batch]
+
+    def forward(self, inputs):
+        """Evaluate all agents' networks on inputs (agents, batch, inputs) with quantized activations"""
+        h = np.asarray(inputs, dtype=np.float32)
+        buffers, quantized = self._activation_buffers(h.shape[1])
+        last = len(self._operands) - 1
+        for i, (w, b, out) in enumerate(zip(self._operands, self.biases, buffers)):
+            if self.precision == 'int8':
+                levels = self._levels[i]
+                if self.input_ranges is not None:
+                    input_range = self.input_ranges[i]
+                else:
+                    input_range = np.maximum(np.abs(h).max(axis=(1, 2), keepdims=True), 1e-6)
+                x = quantized[:, :, :h.shape[2]]
+                np.multiply(h, levels / input_range, out=x)
+                np.rint(x, out=x)
+                np.clip(x, self._lows[i], levels, out=x)
+                np.matmul(x, w, out=out)
+                out *= self.weight_scales[i] * (input_range / levels)
+            else:
+                np.matmul(h, w, out=out)
+            out += b
+            if i < last:
+                np.maximum(out, 0.0, out=out)  # ReLU
+                if self._round_hidden:
+                    round_float16(out)
+            elif self.output == 'sigmoid':
+                np.negative(out, out=out)  # Sigmoid
+                np.exp(out, out=out)
+                out += 1.0
+                np.reciprocal(out, out=out)
+            h = out
+        return h
+
+
+def quantize_checkpoint(path, precisions=('int8', 'float16'), calibration=None):
+    """Add quantized actors to a checkpoint, returns {precision: QuantizedMLP}"""
+    from marl_checkpoint import Checkpoint, save_checkpoint
+    checkpoint = Checkpoint(path, mmap=False)
+    actors = checkpoint.network('actors')
+    tensors = {name: checkpoint[name] for name in checkpoint.names()}
+    networks = dict(checkpoint.networks)
+    quantized = {}
+    for precision in precisions:
+        network = QuantizedMLP.from_network(actors, precision, calibration)
+        name = f"actors_{precision}"
+        tensors = {key: value for key, value in tensors.items() if not key.startswith(name + '.')}
+        tensors.update(network.tensors(name))
+        networks[name] = network.info()
+        quantized[precision] = network
+    save_checkpoint(path, tensors, networks, checkpoint.metadata)
+    return quantized
+
+
+def calibration_observations(path=None, samples=CALIBRATION_SAMPLES, seed=0):
+    """Recorded observations: from a marl_dataset directory, or a fresh rule-based run"""
+    if path:
+        from marl_dataset import load_dataset
+        observations, _ = load_dataset(path)
+    else:
+        from marl_dataset import generate
+        observations, _, _ = generate(seed, samples)
+    rows = np.random.default_rng(seed).permutation(len(observations))[:samples]
+    return observations[np.sort(rows)]
+
+
+def _time_forward(network, inputs, seconds=0.5):
+    """Microseconds per forward call"""
+    network.forward(inputs)
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        network.forward(inputs)
+        calls += 1
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def report(actors, networks, observations, batches=(1, 256)):
+    """Accuracy and speed of networks {name: (network, stored bytes)} against the float32 actors, as text"""
+    from marl_environment import policy_to_actions
+    inputs = np.broadcast_to(observations, (actors.num_agents,) + observations.shape)
+    reference = actors.forward(inputs).copy()
+    reference_actions = policy_to_actions(reference)
+    rng = np.random.default_rng(0)
+    timing_inputs = {batch: observations[rng.integers(len(observations), size=(actors.num_agents, batch))]
+                     for batch in batches}
+    float32_bytes = sum(a.nbytes for a in actors.weights + actors.biases)
+    header = f"{'precision':<16} {'bytes':>8} {'max err':>9} {'mean err':>9} {'actions':>8} {'all 4':>7}"
+    lines = [header + ''.join(f" {f'us/call b={batch}':>14}" for batch in batches)]
+    for name, (network, nbytes) in [('float32', (actors, float32_bytes))] + list(networks.items()):
+        outputs = network.forward(inputs).copy()
+        error = np.abs(outputs - reference)
+        agree = policy_to_actions(outputs) == reference_actions
+        line = (f"{name:<16} {nbytes:>8} {error.max():>9.5f} {error.mean():>9.6f} "
+                f"{agree.mean():>8.2%} {agree.all(axis=-1).mean():>7.2%}")
+        line += ''.join(f" {_time_forward(network, timing_inputs[batch]):>14.1f}" for batch in batches)
+        lines.append(line)
+    lines.append(f"{len(observations)} calibration observations x {actors.num_agents} agents; "
+                 f"actions compares the discrete actions of policy_to_actions")
+    lines.append("int8/float16: dequantized to float32 at load, the inference path (same speed as float32, "
+                 "smaller checkpoint); *-emulated: quantized activations too (accuracy of real int8 kernels, "
+                 "slower here)")
+    return '\n'.join(lines)
+
+
+def main():
+    """Quantize a checkpoint's actors and report accuracy and speed"""
+    parser = argparse.ArgumentParser(description="Post-training quantization of MARL actors")
+    parser.add_argument('checkpoint', nargs='?', help="Checkpoint directory (written unless --report-only)")
+    parser.add_argument('--untrained', action='store_true', help="Use freshly initialized actors")
+    parser.add_argument('--agents', type=int, default=3, help="Agents of untrained actors")
+    parser.add_argument('--calibration', help="marl_dataset directory (default: record a short rule-based run)")
+    parser.add_argument('--samples', type=int, default=CALIBRATION_SAMPLES, help="Calibration observations")
+    parser.add_argument('--precision', nargs='+', choices=PRECISIONS[1:], default=['int8', 'float16'],
+                        help="Precisions to store; they shrink the checkpoint, not the inference cost")
+    parser.add_argument('--report-only', action='store_true', help="Do not write the checkpoint")
+    args = parser.parse_args()
+
+    if not args.checkpoint and not args.untrained:
+        parser.error("give a checkpoint or --untrained")
+    observations = calibration_observations(args.calibration, args.samples)
+    if args.checkpoint:
+        from marl_checkpoint import Checkpoint
+        actors = Checkpoint(args.checkpoint).network('actors')
+    else:
+        from marl_network import create_actors
+        actors = create_actors(args.agents, np.random.default_rng(0))
+
+    if args.checkpoint and not args.report_only:
+        quantized = quantize_checkpoint(args.checkpoint, args.precision, observations)
+        print(f"Saved {', '.join('actors_' + p for p in args.precision)} in {args.checkpoint}")
+    else:
+        quantized = {p: QuantizedMLP.from_network(actors, p, observations) for p in args.precision}
+    networks = {}
+    for precision, network in quantized.items():
+        networks[precision] = (network.dequantize(), network.nbytes)
+        networks[precision + '-emulated'] = (network, network.nbytes)
+    if 'int8' in quantized:
+        dynamic = QuantizedMLP.from_network(actors, 'int8')
+        networks['int8-dynamic'] = (dynamic, dynamic.nbytes)
+    print(report(actors, networks, observations))
+
+
+if __name__ == "__main__":
+    main()
@@ -161,13 +161,14 @@ class MARLSystem {
         // Get action probabilities from actor network
         const actionProbs = this.forward(this.actors[agentIndex], observation);
         
-        // Convert probabilities to discrete actions
+        // Convert the 4 outputs to discrete actions (same decoding as policy_to_actions
+        // in marl_environment.py, so checkpoints trained in Python behave the same)
         const action = {
-            rotation: this.sampleDiscrete([-1, 0, 1], [actionProbs[0], actionProbs[1], actionProbs[2]]),
-            thrust: actionProbs[3] > 0.5 ? 1 : 0,
-            fire: actionProbs[4] > 0.5 ? 1 : 0,
-            shield: actionProbs[5] > 0.5 ? 1 : 0,
-            communication: actionProbs[6] || 0 // Continuous communication signal
+            rotation: actionProbs[0] < 1 / 3 ? -1 : (actionProbs[0] < 2 / 3 ? 0 : 1),
+            thrust: actionProbs[1] > 0.5 ? 1 : 0,
+            fire: actionProbs[2] > 0.5 ? 1 : 0,
+            shield: actionProbs[3] > 0.5 ? 1 : 0,
+            communication: 0
         };
         
         return action;
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Multi-Agent Reinforcement Learning System
+MADDPG trainer with batched NumPy networks and hand-written gradients
+
+Python counterpart of marl_system.js, whose trainAgent() only logs. Each agent
+has a decentralized actor (its own observation -> action) and a centralized
+critic that scores the joint observations and actions of every agent. All
+agents' networks are StackedMLPs, so every forward/backward pass below is one
+batched matmul per layer for all agents together.
+
+Actions are the four actor outputs in [0, 1]: rotation (< 1/3 left, > 2/3
+right), thrust, fire and shield (> 0.5 on).
+
+Usage:
+    python3 marl_system.py --train 20000 --store experience/   # train against the game world
+    python3 marl_system.py --train 20000 --checkpoint policy.ckpt   # resume and save a checkpoint
+    python3 marl_system.py --benchmark                    # gradient steps/s at batch 64-1024
+    python3 marl_system.py --benchmark --agents 10 --batch 256
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from marl_checkpoint import Checkpoint, network_info, network_tensors, save_checkpoint
+from marl_network import ACTION_SIZE, OBSERVATION_SIZE, Adam, create_actors, create_critics
+from marl_trajectory_store import TrajectoryStore
+
+
+class MARLSystem:
+    """MADDPG learner for a team of agents
+
+    Experience lives in a TrajectoryStore (memory-mapped, shareable with
+    collector processes); train_step() samples a minibatch from it.
+    """
+    def __init__(self, num_agents=3, store_path=None, learning_rate=0.001, gamma=0.99, tau=0.01,
+                 batch_size=64, buffer_size=10000, training=True, seed=None):
+        self.num_agents = num_agents
+        self.learning_rate = learning_rate
+        self.gamma = gamma
+        self.tau = tau
+        self.batch_size = batch_size
+        self.training = training
+        self.rng = np.random.default_rng(seed)
+
+        self.actors = create_actors(num_agents, self.rng)
+        self.critics = create_critics(num_agents, self.rng, centralized=True)
+        self.target_actors = self.actors.clone()
+        self.target_critics = self.critics.clone()
+        self.actor_optimizer = Adam(self.actors.parameters, learning_rate)
+        self.critic_optimizer = Adam(self.critics.parameters, learning_rate)
+
+        if store_path is None:
+            self._store_dir = tempfile.TemporaryDirectory(prefix="marl-experience-")
+            store_path = self._store_dir.name
+        self.store = TrajectoryStore(store_path, buffer_size, num_agents)
+
+        self.train_steps = 0
+        self.training_history = []
+
+    def get_actions(self, observations, epsilon=0.1, noise=0.1):
+        """Actions (agents, 4) for observations (agents, 21)
+
+        While training, each agent acts randomly with probability epsilon
+        (like getRandomAction() in marl_system.js) and otherwise adds
+        Gaussian exploration noise to its policy output.
+        """
+        observations = np.asarray(observations, dtype=np.float32)
+        actions = self.actors.forward(observations[:, None, :])[:, 0, :].copy()
+        if not self.training:
+            return actions
+        if noise:
+            actions += self.rng.normal(0.0, noise, actions.shape).astype(np.float32)
+            np.clip(actions, 0.0, 1.0, out=actions)
+        explore = self.rng.random(self.num_agents) < epsilon
+        if explore.any():
+            actions[explore] = self.random_actions(int(explore.sum()))
+        return actions
+
+    def random_actions(self, count):
+        """Random actions: any rotation, thrust half the time, fire often, shield rarely"""
+        actions = np.empty((count, ACTION_SIZE), dtype=np.float32)
+        actions[:, 0] = self.rng.random(count)
+        actions[:, 1] = self.rng.random(count) > 0.5
+        actions[:, 2] = self.rng.random(count) > 0.1
+        actions[:, 3] = self.rng.random(count) > 0.95
+        return actions
+
+    def store_experience(self, observations, actions, rewards, next_observations, done):
+        """Append one transition (or a batch) to the trajectory store"""
+        self.store.append(observations, actions, rewards, next_observations, done)
+
+    def train_step(self, batch=None):
+        """One MADDPG update of every critic, actor and target network
+
+        Samples batch_size transitions from the store unless a batch (dict of
+        store columns) is given. Returns (critic loss, actor objective) or
+        None when there is not enough experience yet.
+        """
+        if batch is None:
+            if len(self.store) < self.batch_size:
+                return None
+            batch = self.store.sample(self.batch_size, self.rng)
+
+        A = self.num_agents
+        obs = np.asarray(batch['observations'], dtype=np.float32)             # (B, A, 21)
+        actions = np.asarray(batch['actions'], dtype=np.float32)              # (B, A, 4)
+        rewards = np.asarray(batch['rewards'], dtype=np.float32).T            # (A, B)
+        next_obs = np.asarray(batch['next_observations'], dtype=np.float32)   # (B, A, 21)
+        not_done = 1.0 - np.asarray(batch['dones'], dtype=np.float32)         # (B,)
+        B = len(obs)
+        action_offset = A * OBSERVATION_SIZE
+
+        # Critic targets: y = r + gamma * Q'(o', mu'(o')) for every agent
+        next_actions = self.target_actors.forward(next_obs.transpose(1, 0, 2))  # (A, B, 4)
+        next_joint = np.concatenate([next_obs.reshape(B, -1),
+                                     next_actions.transpose(1, 0, 2).reshape(B, -1)], axis=1)
+        next_q = self.target_critics.forward(np.broadcast_to(next_joint, (A,) + next_joint.shape))
+        targets = rewards + self.gamma * not_done * next_q[:, :, 0]
+
+        # Critic update: minimise mean squared TD error
+        joint = np.concatenate([obs.reshape(B, -1), actions.reshape(B, -1)], axis=1)
+        critic_inputs = np.broadcast_to(joint, (A,) + joint.shape)
+        q_layers = self.critics.forward(critic_inputs, activations=True)
+        td_error = q_layers[-1] - targets[:, :, None]
+        critic_loss = float(np.mean(td_error ** 2))
+        gradients, _ = self.critics.backward(critic_inputs, q_layers, td_error * (2.0 / B))
+        self.critic_optimizer.step(gradients)
+
+        # Actor update: ascend Q_i with agent i's stored action replaced by mu_i(o_i)
+        agent_obs = np.ascontiguousarray(obs.transpose(1, 0, 2))
+        policy_layers = self.actors.forward(agent_obs, activations=True)
+        policy_actions = policy_layers[-1]
+        actor_inputs = np.repeat(joint[None], A, axis=0)
+        for i in range(A):
+            start = action_offset + i * ACTION_SIZE
+            actor_inputs[i, :, start:start + ACTION_SIZE] = policy_actions[i]
+        q_layers = self.critics.forward(actor_inputs, activations=True)
+        actor_objective = float(np.mean(q_layers[-1]))
+        grad_q = np.full((A, B, 1), -1.0 / B, dtype=np.float32)
+        _, grad_inputs = self.critics.backward(actor_inputs, q_layers, grad_q, parameter_grads=False)
+        grad_actions = np.empty((A, B, ACTION_SIZE), dtype=np.float32)
+        for i in range(A):
+            start = action_offset + i * ACTION_SIZE
+            grad_actions[i] = grad_inputs[i, :, start:start + ACTION_SIZE]
+        gradients, _ = self.actors.backward(agent_obs, policy_layers, grad_actions)
+        self.actor_optimizer.step(gradients)
+
+        self.target_actors.soft_update(self.actors, self.tau)
+        self.target_critics.soft_update(self.critics, self.tau)
+        self.train_steps += 1
+        return critic_loss, actor_objective
+
+    def networks(self):
+        """(name, network, optimizer or None) of every network in checkpoints"""
+        return [('actors', self.actors, self.actor_optimizer), ('critics', self.critics, self.critic_optimizer),
+                ('target_actors', self.target_actors, None), ('target_critics', self.target_critics, None)]
+
+    def save(self, path, metadata=None):
+        """Save networks, optimizer state and training history as a checkpoint
+
+        Only tensors that changed since the last save to `path` are written.
+        Returns the names of the written tensors.
+        """
+        tensors = {}
+        networks = {}
+        optimizer_steps = {}
+        for name, network, optimizer in self.networks():
+            tensors.update(network_tensors(name, network))
+            networks[name] = network_info(network)
+            if optimizer is not None:
+                for i, (m, v) in enumerate(zip(optimizer.m, optimizer.v)):
+                    tensors[f"{name}.adam.m{i}"] = m
+                    tensors[f"{name}.adam.v{i}"] = v
+                optimizer_steps[name] = optimizer.steps
+        tensors['training_history'] = np.asarray(self.training_history, dtype=np.float64)
+        info = {'num_agents': self.num_agents, 'train_steps': self.train_steps,
+                'episodes': len(self.training_history), 'optimizer_steps': optimizer_steps,
+                'learning_rate': self.learning_rate, 'gamma': self.gamma, 'tau': self.tau,
+                'batch_size': self.batch_size}
+        info.update(metadata or {})
+        return save_checkpoint(path, tensors, networks, info)
+
+    def load(self, path):
+        """Restore a checkpoint written by save() (optimizer state if present)"""
+        checkpoint = Checkpoint(path)
+        if checkpoint.metadata.get('num_agents') != self.num_agents:
+            raise ValueError(f"{path} was saved for {checkpoint.metadata.get('num_agents')} agents, "
+                             f"not {self.num_agents}")
+        for name, network, optimizer in self.networks():
+            for key, array in network_tensors(name, network).items():
+                array[...] = checkpoint[key]
+            if optimizer is not None and f"{name}.adam.m0" in checkpoint:
+                for i, (m, v) in enumerate(zip(optimizer.m, optimizer.v)):
+                    m[...] = checkpoint[f"{name}.adam.m{i}"]
+                    v[...] = checkpoint[f"{name}.adam.v{i}"]
+                optimizer.steps = checkpoint.metadata['optimizer_steps'][name]
+        self.train_steps = checkpoint.metadata.get('train_steps', 0)
+        self.training_history = checkpoint['training_history'].tolist() if 'training_history' in checkpoint else []
+        return checkpoint.metadata
+
+    def close(self):
+        """Release the trajectory store"""
+        self.store.close()
+        if getattr(self, '_store_dir', None):
+            self._store_dir.cleanup()
+
+
+def train(system, env, steps, log=print):
+    """Collect experience from env and train for `steps` environment steps
+
+    Exploration decays per episode as in marl_system.js. Returns the total
+    team reward of every finished episode.
+    """
+    from marl_environment import policy_to_actions
+
+    episode_rewards = []
+    episode = 0
+    total = 0.0
+    observations, _ = env.reset()
+    for _ in range(steps):
+        epsilon = max(0.01, 0.1 * (1 - episode / 1000))
+        actions = system.get_actions(observations, epsilon)
+        next_observations, rewards, terminated, truncated, _ = env.step(policy_to_actions(actions))
+        system.store_experience(observations, actions, rewards, next_observations, terminated)
+        system.train_step()
+        total += float(rewards.sum())
+        observations = next_observations
+        if terminated or truncated:
+            episode += 1
+            episode_rewards.append(total)
+            log(f"Episode {episode}: reward {total:.1f}, {system.train_steps} gradient steps")
+            total = 0.0
+            observations, _ = env.reset()
+    system.training_history.extend(episode_rewards)
+    return episode_rewards
+
+
+def benchmark(num_agents=3, batch_sizes=(64, 256, 1024), seconds=2.0):
+    """Learner throughput in gradient steps per second for each batch size"""
+    rng = np.random.default_rng(0)
+    results = {}
+    for batch_size in batch_sizes:
+        system = MARLSystem(num_agents, batch_size=batch_size, buffer_size=max(10000, batch_size), seed=0)
+        count = system.store.capacity
+        system.store_experience(
+            rng.random((count, num_agents, OBSERVATION_SIZE), dtype=np.float32),
+            rng.random((count, num_agents, ACTION_SIZE), dtype=np.float32),
+            rng.standard_normal((count, num_agents), dtype=np.float32),
+            rng.random((count, num_agents, OBSERVATION_SIZE), dtype=np.float32),
+            rng.random(count) < 0.01)
+        system.train_step()
+        steps = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            system.train_step()
+            steps += 1
+        results[batch_size] = steps / (time.perf_counter() - start)
+        system.close()
+    return results
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="MADDPG learner for the Asteroids MARL agents")
+    parser.add_argument('--train', type=int, metavar='STEPS', help="Train for this many environment steps")
+    parser.add_argument('--store', help="Trajectory store directory (default: temporary)")
+    parser.add_argument('--checkpoint', help="Checkpoint directory to resume from and save to")
+    parser.add_argument('--benchmark', action='store_true', help="Measure gradient steps per second")
+    parser.add_argument('--agents', type=int, default=3)
+    parser.add_argument('--batch', type=int, nargs='+', default=[64, 256, 1024])
+    parser.add_argument('--seconds', type=float, default=2.0, help="Benchmark time per batch size")
+    args = parser.parse_args()
+
+    if args.train:
+        from marl_environment import AsteroidsMARLEnv
+        env = AsteroidsMARLEnv(args.agents)
+        system = MARLSystem(args.agents, args.store)
+        if args.checkpoint and os.path.exists(os.path.join(args.checkpoint, 'header.json')):
+            system.load(args.checkpoint)
+        try:
+            train(system, env, args.train)
+            if args.checkpoint:
+                system.save(args.checkpoint)
+        finally:
+            system.close()
+            env.close()
+        return
+    if not args.benchmark:
+        parser.print_help()
+        return
+    for batch_size, rate in benchmark(args.agents, args.batch, args.seconds).items():
+        print(f"{args.agents} agents, batch {batch_size:5d}: {rate:8.1f} gradient steps/s "
+              f"({rate * batch_size:,.0f} samples/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Trajectory Store for Multi-Agent Reinforcement Learning
+Fixed-capacity ring buffer of experience in memory-mapped column files
+
+Replaces the replay buffer array of marl_system.js (trimmed with shift() and
+lost on reload). Each experience field is one np.memmap column:
+
+    observations       (capacity, agents, 21)  float32
+    actions            (capacity, agents, 4)   float32  rotation, thrust, fire, shield
+    rewards            (capacity, agents)      float32
+    next_observations  (capacity, agents, 21)  float32
+    dones              (capacity,)             uint8
+
+A small int64 header file holds the shape and the total number of appended
+transitions. Any number of processes can open the same directory: appends
+take an exclusive file lock and publish the new total only after the data is
+written, and sampling takes a shared lock. Data survives restarts.
+
+Usage:
+    python3 marl_trajectory_store.py experience/      # print store statistics
+"""
+
+import argparse
+import os
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no inter-process locking, single writer only
+    fcntl = None
+
+# Header slots (int64)
+MAGIC = 0x41535452414A3031  # 'ASTRAJ01'
+HEADER_MAGIC, HEADER_CAPACITY, HEADER_AGENTS, HEADER_OBS_DIM, HEADER_ACTION_DIM, HEADER_TOTAL = range(6)
+HEADER_SIZE = 8
+
+# Dimensions from marl_environment.js / marl_system.js
+OBSERVATION_SIZE = 21
+ACTION_SIZE = 4
+
+COLUMNS = ('observations', 'actions', 'rewards', 'next_observations', 'dones')
+
+
+class TrajectoryStore:
+    """Memory-mapped experience ring buffer shared between processes"""
+    def __init__(self, path, capacity=10000, num_agents=3, obs_dim=OBSERVATION_SIZE,
+                 action_dim=ACTION_SIZE):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        header_path = os.path.join(path, 'header.i64')
+        self.lock_file = open(os.path.join(path, 'lock'), 'a+b')
+
+        with self._locked(exclusive=True):
+            if os.path.exists(header_path):
+                self.header = np.memmap(header_path, dtype=np.int64, mode='r+')
+                if self.header[HEADER_MAGIC] != MAGIC:
+                    raise ValueError(f"{path} is not a trajectory store")
+            else:
+                self.header = np.memmap(header_path, dtype=np.int64, mode='w+', shape=(HEADER_SIZE,))
+                self.header[:HEADER_TOTAL + 1] = [MAGIC, capacity, num_agents, obs_dim, action_dim, 0]
+                self.header.flush()
+
+            # An existing store keeps its own shape
+            self.capacity = int(self.header[HEADER_CAPACITY])
+            self.num_agents = int(self.header[HEADER_AGENTS])
+            self.obs_dim = int(self.header[HEADER_OBS_DIM])
+            self.action_dim = int(self.header[HEADER_ACTION_DIM])
+
+            shapes = {
+                'observations': ((self.num_agents, self.obs_dim), np.float32),
+                'actions': ((self.num_agents, self.action_dim), np.float32),
+                'rewards': ((self.num_agents,), np.float32),
+                'next_observations': ((self.num_agents, self.obs_dim), np.float32),
+                'dones': ((), np.uint8),
+            }
+            self.columns = {}
+            for name in COLUMNS:
+                shape, dtype = shapes[name]
+                filename = os.path.join(path, f"{name}.{np.dtype(dtype).str[1:]}")
+                mode = 'r+' if os.path.exists(filename) else 'w+'
+                self.columns[name] = np.memmap(filename, dtype=dtype, mode=mode,
+                                               shape=(self.capacity,) + shape)
+
+    def _locked(self, exclusive):
+        """Context manager holding the store's file lock"""
+        return _FileLock(self.lock_file, exclusive)
+
+    @property
+    def total(self):
+        """Transitions appended over the store's lifetime"""
+        return int(self.header[HEADER_TOTAL])
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def append(self, observations, actions, rewards, next_observations, dones):
+        """Append one transition, or a batch with a leading batch axis"""
+        observations = np.asarray(observations, dtype=np.float32)
+        batched = observations.ndim == 3
+        if not batched:
+            observations = observations[None]
+            actions, rewards, next_observations = ([value] for value in (actions, rewards, next_observations))
+            dones = [dones]
+        count = len(observations)
+        values = {
+            'observations': observations,
+            'actions': np.asarray(actions, dtype=np.float32),
+            'rewards': np.asarray(rewards, dtype=np.float32),
+            'next_observations': np.asarray(next_observations, dtype=np.float32),
+            'dones': np.asarray(dones, dtype=np.uint8),
+        }
+        if count > self.capacity:
+            values = {name: value[-self.capacity:] for name, value in values.items()}
+            count = self.capacity
+
+        with self._locked(exclusive=True):
+            start = self.total % self.capacity
+            first = min(count, self.capacity - start)
+            for name, value in values.items():
+                column = self.columns[name]
+                column[start:start + first] = value[:first]
+                column[:count - first] = value[first:]
+            # Publish after the data is in place
+            self.header[HEADER_TOTAL] += count
+
+    def sample(self, batch_size, rng=None):
+        """Uniform random minibatch as a dict of arrays (one gather per column)"""
+        rng = rng or np.random.default_rng()
+        with self._locked(exclusive=False):
+            size = len(self)
+            if size == 0:
+                raise ValueError("Trajectory store is empty")
+            indices = rng.integers(0, size, batch_size)
+            return {name: column[indices] for name, column in self.columns.items()}
+
+    def latest(self, count):
+        """Zero-copy views of the most recent transitions (oldest first, may be two chunks)"""
+        count = min(count, len(self))
+        end = self.total % self.capacity
+        if count <= end:
+            return [{name: column[end - count:end] for name, column in self.columns.items()}]
+        return [{name: column[self.capacity - (count - end):] for name, column in self.columns.items()},
+                {name: column[:end] for name, column in self.columns.items()}]
+
+    def flush(self):
+        """Write dirty pages to disk"""
+        for column in self.columns.values():
+            column.flush()
+        self.header.flush()
+
+    def close(self):
+        """Flush and release the store"""
+        self.flush()
+        self.lock_file.close()
+
+
+class _FileLock:
+    """flock() based shared/exclusive lock (no-op without fcntl)"""
+    def __init__(self, file, exclusive):
+        self.file = file
+        self.exclusive = exclusive
+
+    def __enter__(self):
+        if fcntl:
+            fcntl.flock(self.file, fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+
+
+def main():
+    """Print statistics of a store"""
+    parser = argparse.ArgumentParser(description="Inspect a MARL trajectory store")
+    parser.add_argument('path')
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.path, 'header.i64')):
+        raise SystemExit(f"{args.path}: no trajectory store")
+    store = TrajectoryStore(args.path)
+    print(f"{args.path}: {len(store)}/{store.capacity} transitions ({store.total} appended), "
+          f"{store.num_agents} agents, observation {store.obs_dim}, action {store.action_dim}")
+    if len(store):
+        chunks = store.latest(len(store))
+        rewards = np.concatenate([chunk['rewards'] for chunk in chunks])
+        dones = sum(int(chunk['dones'].sum()) for chunk in chunks)
+        print(f"Mean reward {rewards.mean():.3f}, {dones} episode ends")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
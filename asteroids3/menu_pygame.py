@@ -166,6 +166,10 @@ class Menu:
             # Screen Size Control
             'canvas_width': 1200,
             'canvas_height': 600,
+            # World Size Control
+            'world_width': 1200,
+            'world_height': 600,
+            'camera_mode': 'fixed',
             # Player Ship Control
             'player_ship_active': True,
             'anchor_player_ship': False,
@@ -190,6 +194,12 @@ class Menu:
             'marl_training': False,
             # 3D Mode
             'use_3d': False,
+            # Performance
+            'threaded_simulation': False,
+            'render_quality': 'adaptive',
+            'render_resolution': 'native',
+            'ai_lod': False,
+            'ai_budget_ms': 4,
         }
     
     def _create_menu_items(self):
@@ -216,6 +226,16 @@ class Menu:
         self.items.append(SliderItem("Canvas Height", self.settings['canvas_height'],
                                     600, 2000, lambda v: self._update_setting('canvas_height', v), 100))
         
+        # World Size Control
+        self.sections.append(("World Size Control", len(self.items)))
+        self.items.append(SliderItem("World Width", self.settings['world_width'],
+                                    400, 8000, lambda v: self._update_setting('world_width', v), 200))
+        self.items.append(SliderItem("World Height", self.settings['world_height'],
+                                    400, 8000, lambda v: self._update_setting('world_height', v), 200))
+        self.items.append(SelectItem("Camera", self.settings['camera_mode'],
+                                    ['fixed', 'player', 'alpha'],
+                                    lambda v: self._update_setting('camera_mode', v)))
+        
         # Player Ship Control
         self.sections.append(("Player Ship Control", len(self.items)))
         self.items.append(ToggleItem("Player Ship Active", self.settings['player_ship_active'],
@@ -274,6 +294,21 @@ class Menu:
         self.sections.append(("3D Mode (Experimental)", len(self.items)))
         self.items.append(ToggleItem("Enable 3D Rendering", self.settings['use_3d'],
                                     lambda v: self._update_setting('use_3d', v)))
+        
+        # Performance
+        self.sections.append(("Performance", len(self.items)))
+        self.items.append(ToggleItem("Threaded Simulation", self.settings['threaded_simulation'],
+                                    lambda v: self._update_setting('threaded_simulation', v)))
+        self.items.append(SelectItem("Render Quality", self.settings['render_quality'],
+                                    ['adaptive', 'full', 'minimal'],
+                                    lambda v: self._update_setting('render_quality', v)))
+        self.items.append(SelectItem("Render Resolution", self.settings['render_resolution'],
+                                    ['native', '1200x600', 'half'],
+                                    lambda v: self._update_setting('render_resolution', v)))
+        self.items.append(ToggleItem("AI Level of Detail", self.settings['ai_lod'],
+                                    lambda v: self._update_setting('ai_lod', v)))
+        self.items.append(SliderItem("AI Budget (ms, 0 = none)", self.settings['ai_budget_ms'],
+                                    0, 16, lambda v: self._update_setting('ai_budget_ms', v)))
     
     def _update_setting(self, key: str, value: Any):
         """Update setting"""
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Batched ML Tuning for AI Ships
+Phase 5.1 parameters and 5.2 priority weights for every AI ship in one NumPy pass
+
+Python counterpart of extractFeatures, calculateThreatLevel,
+getMLParameters and getMLPriorityWeights in game.js. Instead of each ship scanning the asteroids and
+enemies on its own, the AI ships' state is gathered into columns and a
+single ship x entity distance matrix serves every ship.
+
+Parameters are the rule-based "model" of getMLParameters (there is no
+trained model yet), clamped to the same safety bounds. MLParameterTuner
+refreshes them every ML_INFERENCE_INTERVAL ticks, or on the tick a ship's
+threat level crosses one of the thresholds the rules use.
+
+Priority weights only depend on which of five situations apply (many
+enemies, high threat, dense flock, low health, enemies nearby), so each
+ship caches a 5-bit rule code and its weights are a row of PRIORITY_TABLE.
+Every tick the candidate behaviours are scored from the cached weights and
+the nearest asteroid and enemy, as in the weighted decision making of
+makeDecision, and each ship's best behaviour is handed to AIShip.think.
+
+Usage:
+    tuner = MLParameterTuner()
+    tuner.update(tick, ai_ships, asteroids, enemy_ships)   # once per tick
+"""
+
+import numpy as np
+
+# Parameters in PARAMETER_NAMES order: detection radius, firing range, flock weight,
+# thrust frequency, enemy firing range
+BASE_PARAMETERS = (100.0, 200.0, 0.3, 0.02, 250.0)
+PARAMETER_MIN = np.array([50.0, 100.0, 0.1, 0.01, 150.0])
+PARAMETER_MAX = np.array([200.0, 400.0, 0.8, 0.1, 400.0])
+
+# Threat levels where the parameter rules change (threat band boundaries)
+THREAT_THRESHOLDS = (0.3, 0.6, 0.7)
+NO_THREAT_BAND = -1  # Ship parameters not set by the tuner
+
+ML_INFERENCE_INTERVAL = 5  # Ticks between refreshes (mlInferenceInterval in game.js)
+
+# Priority weights (basePriorityWeights in game.js) and their safety bounds
+PRIORITY_NAMES = ('avoid_ships', 'fire_at_enemies', 'protect_allies', 'fire_at_asteroids',
+                  'avoid_asteroids', 'random_nav')
+BASE_PRIORITY_WEIGHTS = {'avoid_ships': 1.0, 'fire_at_enemies': 0.8, 'protect_allies': 0.6,
+                         'fire_at_asteroids': 0.4, 'avoid_asteroids': 0.3, 'random_nav': 0.1}
+PRIORITY_MIN = np.array([1.0, 0.5, 0.3, 0.2, 0.2, 0.05])
+PRIORITY_MAX = np.array([1.0, 1.0, 0.8, 0.6, 0.5, 0.2])
+
+# Weight overrides of getMLPriorityWeights, applied in order; rule i is bit i of a rule code
+PRIORITY_RULES = (
+    # Many enemies: combat
+    {'fire_at_enemies': 0.9, 'protect_allies': 0.7, 'fire_at_asteroids': 0.3, 'avoid_asteroids': 0.25},
+    # High threat: survival
+    {'avoid_asteroids': 0.4, 'fire_at_asteroids': 0.35, 'random_nav': 0.05},
+    # Dense flock: coordination
+    {'protect_allies': 0.65, 'fire_at_enemies': 0.75},
+    # Low health: survival over combat
+    {'avoid_asteroids': 0.45, 'fire_at_enemies': 0.65, 'protect_allies': 0.5},
+    # Enemies nearby: combat and protection
+    {'fire_at_enemies': 0.85, 'protect_allies': 0.7, 'fire_at_asteroids': 0.3},
+)
+NO_PRIORITY_RULES = -1  # Ship not using ML priority weights
+
+
+def _priority_table():
+    """Weights of every rule code, (2 ** len(PRIORITY_RULES), len(PRIORITY_NAMES))"""
+    table = np.empty((1 << len(PRIORITY_RULES), len(PRIORITY_NAMES)))
+    for code in range(len(table)):
+        weights = dict(BASE_PRIORITY_WEIGHTS)
+        for bit, overrides in enumerate(PRIORITY_RULES):
+            if code >> bit & 1:
+                weights.update(overrides)
+        table[code] = [weights[name] for name in PRIORITY_NAMES]
+    return np.clip(table, PRIORITY_MIN, PRIORITY_MAX)
+
+
+PRIORITY_TABLE = _priority_table()
+
+# Candidate behaviours of AIShip.think, scored per ship (ties go to the first)
+BEHAVIORS = ('random_nav', 'avoid_asteroids', 'fire_at_enemies', 'fire_at_asteroids')
+
+# Ship state columns gathered once per pass
+SHIP_COLUMNS = ('x', 'y', 'angle', 'velocity_x', 'velocity_y', 'health', 'max_health', 'shield_active',
+                'detection_radius', 'enemy_detection_radius', 'flock_radius', 'firing_range',
+                'enemy_firing_range')
+
+
+def ship_columns(ships):
+    """(ships, len(SHIP_COLUMNS)) state array"""
+    return np.array([(s.x, s.y, s.angle, s.velocity_x, s.velocity_y, s.health, s.max_health, s.shield_active,
+                      s.detection_radius, s.enemy_detection_radius, s.flock_radius, s.firing_range,
+                      s.enemy_firing_range) for s in ships],
+                    dtype=np.float64).reshape(-1, len(SHIP_COLUMNS))
+
+
+def nearest_distances(columns, asteroids, enemies):
+    """Distances to the nearest asteroid ahead and the nearest enemy (inf if none)
+
+    Same targets as AIShip.find_nearest_asteroid (within detection_radius
+    and less than 90 degrees off the nose) and find_nearest_enemy (within
+    enemy_detection_radius).
+    """
+    # One ship x entity matrix for asteroids and enemies together
+    positions = np.array([(a.x, a.y) for a in asteroids] + [(e.x, e.y) for e in enemies],
+                         dtype=np.float64).reshape(-1, 2)
+    dx = positions[:, 0] - columns[:, 0, None]
+    dy = positions[:, 1] - columns[:, 1, None]
+    distance = np.sqrt(dx * dx + dy * dy)
+    split = len(asteroids)
+
+    # Less than 90 degrees off the nose <=> positive projection on the heading
+    ahead = dx[:, :split] * np.cos(columns[:, 2, None]) + dy[:, :split] * np.sin(columns[:, 2, None]) > 0
+    radius = np.where(ahead, columns[:, 8, None], 0.0)
+    distance[:, split:][distance[:, split:] >= columns[:, 9, None]] = np.inf
+    distance[:, :split][distance[:, :split] >= radius] = np.inf
+    asteroid_distance = distance[:, :split].min(axis=1, initial=np.inf)
+    enemy_distance = distance[:, split:].min(axis=1, initial=np.inf)
+    return asteroid_distance, enemy_distance
+
+
+def threat_levels(asteroid_distance, enemy_distance):
+    """Threat level (0-1) per ship (calculateThreatLevel)"""
+    threat = np.where(asteroid_distance < 150, 0.3 * (1 - asteroid_distance / 150), 0.0)
+    threat += np.where(enemy_distance < 300, 0.4 * (1 - enemy_distance / 300), 0.0)
+    return np.minimum(threat, 1.0)
+
+
+def threat_bands(threat):
+    """Index of the threat band of each ship (see THREAT_THRESHOLDS)"""
+    return np.digitize(threat, THREAT_THRESHOLDS)
+
+
+def extract_features(ships, asteroids, enemies, columns=None, nearest=None):
+    """(ships, 12) features in FEATURE_NAMES order for all ships at once
+
+    columns and nearest (from ship_columns and nearest_distances) can be
+    passed in when already computed this tick.
+    """
+    if columns is None:
+        columns = ship_columns(ships)
+    asteroid_distance, enemy_distance = nearest or nearest_distances(columns, asteroids, enemies)
+    count = len(columns)
+
+    # Allies within each ship's flock radius (not counting itself)
+    dx = columns[:, 0] - columns[:, 0, None]
+    dy = columns[:, 1] - columns[:, 1, None]
+    near = np.sqrt(dx * dx + dy * dy) < columns[:, 10, None]
+    np.fill_diagonal(near, False)
+    allies = np.minimum(near.sum(axis=1) / 9.0, 1.0)
+
+    health = columns[:, 5] / columns[:, 6]
+    health_percent = np.clip(health, 0.0, 1.0)
+    phase = np.where(health_percent > 0.66, 1, np.where(health_percent > 0.33, 2, 3))
+
+    features = np.empty((count, 12))
+    features[:, 0] = health
+    features[:, 1] = phase / 3.0
+    features[:, 2] = columns[:, 7]
+    features[:, 3] = np.minimum(np.hypot(columns[:, 3], columns[:, 4]) / 5.0, 1.0)
+    features[:, 4] = min(1.0, len(asteroids) / 10.0)
+    features[:, 5] = np.minimum(asteroid_distance / 200.0, 1.0)
+    features[:, 6] = min(1.0, len(enemies) / 10.0)
+    features[:, 7] = np.minimum(enemy_distance / 400.0, 1.0)
+    features[:, 8] = allies
+    features[:, 9] = threat_levels(asteroid_distance, enemy_distance)
+    features[:, 10] = allies
+    features[:, 11] = np.isfinite(enemy_distance)  # An enemy within detection range
+    return features
+
+
+def suggest_parameters(features):
+    """(ships, 5) parameters from features, within the safety bounds (getMLParameters)"""
+    threat = features[:, 9]
+    enemy_count = features[:, 6]
+    parameters = np.empty((len(features), 5))
+    parameters[:, 0] = np.where(threat > 0.7, 150.0, np.where(threat < 0.3, 80.0, BASE_PARAMETERS[0]))
+    parameters[:, 1] = np.where(enemy_count > 0.5, 250.0,
+                                np.where(features[:, 4] > 0.5, 180.0, BASE_PARAMETERS[1]))
+    parameters[:, 2] = np.where(features[:, 11] > 0, 0.6, np.where(features[:, 10] > 0.5, 0.4, 0.2))
+    parameters[:, 3] = np.where(threat > 0.6, 0.04, 0.015)
+    parameters[:, 4] = np.where(enemy_count > 0.5, 300.0, BASE_PARAMETERS[4])
+    return np.clip(parameters, PARAMETER_MIN, PARAMETER_MAX, out=parameters)
+
+
+def priority_rules(features):
+    """Rule code of each ship: bit i set when PRIORITY_RULES[i] applies"""
+    conditions = np.stack((features[:, 6] > 0.5,   # Many enemies
+                           features[:, 9] > 0.7,   # High threat
+                           features[:, 10] > 0.5,  # Dense flock
+                           features[:, 0] < 0.5,   # Low health
+                           features[:, 11] > 0),   # Enemies nearby
+                          axis=1)
+    return conditions @ (1 << np.arange(len(PRIORITY_RULES)))
+
+
+def priority_weights(features):
+    """(ships, 6) priority weights in PRIORITY_NAMES order (getMLPriorityWeights)"""
+    return PRIORITY_TABLE[priority_rules(features)]
+
+
+def choose_behaviors(weights, columns, nearest):
+    """Index into BEHAVIORS of each ship's highest weighted score"""
+    asteroid_distance, enemy_distance = nearest
+    scores = np.zeros((len(weights), len(BEHAVIORS)))
+    scores[:, 0] = weights[:, 5] * 0.1
+    found = np.isfinite(asteroid_distance)
+    # Asteroid centres come within about 2/3 of detection_radius at contact, so
+    # avoidance ramps up steeply to beat shooting the asteroid up close
+    scores[found, 1] = weights[found, 4] * 4.0 * (1.0 - np.minimum(asteroid_distance[found] / columns[found, 8], 1.0))
+    found = enemy_distance < columns[:, 12]
+    scores[found, 2] = weights[found, 1] * (1.0 - 0.5 * enemy_distance[found] / columns[found, 12])
+    found = asteroid_distance < columns[:, 11]
+    scores[found, 3] = weights[found, 3] * (1.0 - 0.5 * asteroid_distance[found] / columns[found, 11])
+    return scores.argmax(axis=1)
+
+
+def apply_parameters(ships, parameters):
+    """Write parameter rows into the ships' parameter attributes"""
+    for ship, (detection_radius, firing_range, flock_weight, thrust_frequency, enemy_firing_range) in \
+            zip(ships, parameters):
+        ship.detection_radius = detection_radius
+        ship.firing_range = firing_range
+        ship.flock_weight = flock_weight
+        ship.thrust_frequency = thrust_frequency
+        ship.enemy_firing_range = enemy_firing_range
+
+
+class MLParameterTuner:
+    """Keeps the Phase 5.1 parameters and 5.2 behaviours of all AI ships up to date
+
+    Each tick only the threat levels (and, with priorities on, behaviour
+    scores) are computed. Features, parameters and priority rule codes are
+    recomputed every `interval` ticks, or when any ship's threat band has
+    changed. Bands and rule codes are stored on the ships, so they survive
+    snapshots. The last features, parameters and weights stay available as
+    (ships, n) columns.
+    """
+    def __init__(self, interval=ML_INFERENCE_INTERVAL):
+        self.interval = interval
+        self.use_parameters = False
+        self.use_priorities = False
+        self.features = None
+        self.parameters = None
+        self.weights = None
+        self.recomputes = 0
+
+    def configure(self, ships, use_parameters, use_priorities):
+        """Switch parameter tuning and priority weights on or off"""
+        if self.use_parameters and not use_parameters:
+            # Back to the base parameters
+            apply_parameters(ships, [BASE_PARAMETERS] * len(ships))
+            self.parameters = None
+        if self.use_priorities and not use_priorities:
+            # Back to the fixed priority cascade
+            for ship in ships:
+                ship.ml_priority_rules = NO_PRIORITY_RULES
+                ship.ml_behavior = None
+            self.weights = None
+        if (self.use_parameters or self.use_priorities) and not (use_parameters or use_priorities):
+            for ship in ships:
+                ship.ml_threat_band = NO_THREAT_BAND
+            self.features = None
+        if (use_parameters and not self.use_parameters) or (use_priorities and not self.use_priorities):
+            # Recompute on the next update
+            for ship in ships:
+                ship.ml_threat_band = NO_THREAT_BAND
+        self.use_parameters = use_parameters
+        self.use_priorities = use_priorities
+
+    def update(self, tick, ships, asteroids, enemies):
+        """Refresh the ships' parameters if due and pick their behaviours, returns True when recomputed"""
+        if not ships or not (self.use_parameters or self.use_priorities):
+            return False
+        columns = ship_columns(ships)
+        nearest = nearest_distances(columns, asteroids, enemies)
+        bands = threat_bands(threat_levels(*nearest)).tolist()
+        due = tick % self.interval == 0 or any(band != ship.ml_threat_band for ship, band in zip(ships, bands))
+
+        if due:
+            self.features = extract_features(ships, asteroids, enemies, columns, nearest)
+            if self.use_parameters:
+                self.parameters = suggest_parameters(self.features)
+                apply_parameters(ships, self.parameters.tolist())
+            if self.use_priorities:
+                for ship, code in zip(ships, priority_rules(self.features).tolist()):
+                    ship.ml_priority_rules = code
+            for ship, band in zip(ships, bands):
+                ship.ml_threat_band = band
+            self.recomputes += 1
+
+        if self.use_priorities:
+            # Cached weights of each ship's rule code
+            self.weights = PRIORITY_TABLE[[ship.ml_priority_rules for ship in ships]]
+            for ship, behavior in zip(ships, choose_behaviors(self.weights, columns, nearest).tolist()):
+                ship.ml_behavior = BEHAVIORS[behavior]
+        return due
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+Batched Render Pass for Asteroids Game
+Computes every ship outline for a frame in one NumPy operation
+"""
+
+import math
+from collections import deque
+from typing import NamedTuple, Optional, Tuple
+import pygame
+import numpy as np
+
+# Colors
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+GREEN = (0, 255, 0)
+YELLOW = (255, 255, 0)
+RED = (255, 0, 0)
+ORANGE = (255, 165, 0)
+
+# Ship outline templates: one (angle offset, radius scale) pair per vertex.
+# Every ship outline in the game is generated from this table.
+SHIP_TEMPLATES = {
+    # Nose, left and right corners of the ship triangle
+    'triangle': np.array([[0.0, 1.0],
+                          [math.pi - 2.5, 0.6],
+                          [math.pi + 2.5, 0.6]]),
+    # Boss hexagon
+    'hexagon': np.array([[(i * math.pi) / 3, 1.0] for i in range(6)]),
+}
+
+# Enemy ship colors by type (EnemyShip.get_color)
+ENEMY_COLORS = {
+    'basic': (255, 68, 68),  # Red
+    'advanced': (170, 68, 255),  # Purple
+    'boss': (255, 0, 0),  # Bright red
+}
+
+# Ship kinds and their render styles
+SHIP_KINDS = ('player', 'ai', 'basic', 'advanced', 'boss')
+SHIP_STYLES = {
+    # kind: (template, fill, outline, shield color, shield width, warn on low health)
+    'player': ('triangle', GREEN, WHITE, GREEN, 2, False),
+    'ai': ('triangle', YELLOW, ORANGE, YELLOW, 2, False),
+    'basic': ('triangle', ENEMY_COLORS['basic'], WHITE, RED, 2, True),
+    'advanced': ('triangle', ENEMY_COLORS['advanced'], WHITE, RED, 2, True),
+    'boss': ('hexagon', ENEMY_COLORS['boss'], WHITE, YELLOW, 3, True),
+}
+
+# Bullet styles
+BULLET_RADIUS = 3
+
+# Viewport culling: grid cell size and how far past the screen edge
+# an entity's center can be while still drawing something on screen
+GRID_CELL_SIZE = 200
+SHIP_MARGIN = 80
+ASTEROID_MARGIN = 40
+
+# Health bar dimensions
+HEALTH_BAR_WIDTH = 30
+HEALTH_BAR_HEIGHT = 4
+
+# Render quality levels: each level also sheds everything shed by the levels below it
+QUALITY_FULL = 0
+QUALITY_NO_GLOW = 1  # No enemy bullet glow
+QUALITY_NO_OUTLINES = 2  # No polygon outlines
+QUALITY_NO_HEALTH_BARS = 3  # No health bars
+QUALITY_NO_SHIELDS = 4  # No shield or phase transition rings
+QUALITY_NAMES = ('full', 'no bullet glow', 'no outlines', 'no health bars', 'no shields')
+QUALITY_POLICIES = ('adaptive', 'full', 'minimal')
+
+# Render resolution modes (see Presenter)
+RESOLUTION_MODES = ('native', '1200x600', 'half')
+
+
+def ship_polygons(x, y, angle, size, template='triangle'):
+    """Compute outlines for many ships at once, returns an (N, vertices, 2) array"""
+    table = SHIP_TEMPLATES[template]
+    theta = angle[:, None] + table[None, :, 0]
+    radius = size[:, None] * table[None, :, 1]
+    points = np.empty(theta.shape + (2,))
+    points[..., 0] = x[:, None] + np.cos(theta) * radius
+    points[..., 1] = y[:, None] + np.sin(theta) * radius
+    return points
+
+
+def ship_columns(ships):
+    """Pack the render fields of a list of ships into columns"""
+    kinds = np.array([SHIP_KINDS.index(s.render_kind) for s in ships], dtype=np.int8)
+    columns = np.array([(s.x, s.y, s.angle, s.size,
+                         getattr(s, 'health', 1), getattr(s, 'max_health', 1),
+                         s.shield_radius if s.render_kind != 'boss' else s.size + 10,
+                         1.0 if s.shield_active else 0.0,
+                         getattr(s, 'phase_transition_timer', 0))
+                        for s in ships], dtype=np.float64).reshape(len(ships), 9)
+    return kinds, columns
+
+
+def draw_ships(screen, ships):
+    """Draw a list of ships from batched geometry"""
+    if ships:
+        draw_ship_columns(screen, *ship_columns(ships))
+
+
+def draw_ship_columns(screen, kinds, columns, quality=QUALITY_FULL):
+    """Draw ships from packed render columns"""
+    x, y, angle, size = columns[:, 0], columns[:, 1], columns[:, 2], columns[:, 3]
+    health, max_health = columns[:, 4], columns[:, 5]
+    shield_radius, shield_active = columns[:, 6], columns[:, 7]
+    phase_timer = columns[:, 8]
+
+    # Outlines for the whole frame, one array operation per template
+    boss = kinds == SHIP_KINDS.index('boss')
+    polygons = [None] * len(kinds)
+    for template, mask in (('triangle', ~boss), ('hexagon', boss)):
+        indices = np.flatnonzero(mask)
+        if len(indices):
+            points = ship_polygons(x[indices], y[indices], angle[indices],
+                                   size[indices], template).tolist()
+            for index, ship_points in zip(indices.tolist(), points):
+                polygons[index] = ship_points
+
+    # Health bar rectangles for damaged ships
+    damaged = np.flatnonzero(health < max_health)
+    bar_x = x[damaged] - HEALTH_BAR_WIDTH / 2
+    bar_y = y[damaged] - size[damaged] - 10
+    bar_fill = HEALTH_BAR_WIDTH * (health[damaged] / max_health[damaged])
+    low_health = health[damaged] <= max_health[damaged] * 0.5
+
+    centers = np.stack((x, y), axis=1).astype(int).tolist()
+    kind_names = [SHIP_KINDS[k] for k in kinds.tolist()]
+
+    draw_shields = quality < QUALITY_NO_SHIELDS
+    draw_outlines = quality < QUALITY_NO_OUTLINES
+    for i, kind in enumerate(kind_names):
+        template, fill, outline, shield_color, shield_width, _ = SHIP_STYLES[kind]
+        if draw_shields and shield_active[i]:
+            pygame.draw.circle(screen, shield_color, centers[i], int(shield_radius[i]), shield_width)
+        if draw_shields and phase_timer[i] > 0:
+            # Phase transition effect for boss
+            pygame.draw.circle(screen, WHITE, centers[i], int(size[i] + 15), 4)
+        pygame.draw.polygon(screen, fill, polygons[i])
+        if draw_outlines:
+            pygame.draw.polygon(screen, outline, polygons[i], 2)
+
+    if quality >= QUALITY_NO_HEALTH_BARS:
+        return
+    for j, i in enumerate(damaged.tolist()):
+        warn = SHIP_STYLES[kind_names[i]][5]
+        health_color = YELLOW if warn and low_health[j] else GREEN
+        screen.fill(RED, (bar_x[j], bar_y[j], HEALTH_BAR_WIDTH, HEALTH_BAR_HEIGHT))
+        screen.fill(health_color, (bar_x[j], bar_y[j], bar_fill[j], HEALTH_BAR_HEIGHT))
+
+
+class FrameSnapshot(NamedTuple):
+    """Immutable, compact render state of one simulation tick"""
+    tick: int
+    score: int
+    world_size: Tuple[int, int]
+    player_position: Optional[Tuple[float, float]]  # camera targets
+    alpha_position: Optional[Tuple[float, float]]
+    ship_kinds: np.ndarray  # (S,) index into SHIP_KINDS
+    ship_columns: np.ndarray  # (S, 9) see ship_columns
+    asteroid_centers: np.ndarray  # (A, 2) asteroid positions
+    asteroid_points: np.ndarray  # (V, 2) world-space vertices of all asteroids
+    asteroid_offsets: np.ndarray  # (A + 1,) first vertex of each asteroid
+    bullets: np.ndarray  # (B, 2) player and AI bullet positions
+    enemy_bullets: np.ndarray  # (E, 2) enemy bullet positions
+
+
+def _frozen(array):
+    """Mark an array read-only so a published snapshot cannot change"""
+    array.setflags(write=False)
+    return array
+
+
+def capture_frame(tick, score, ships, asteroids, bullets, enemy_bullets,
+                  world_size, player_position=None, alpha_position=None):
+    """Pack the world into a FrameSnapshot"""
+    kinds, columns = ship_columns(ships)
+
+    # Rotate every asteroid vertex in one pass
+    counts = [len(a.vertices) for a in asteroids]
+    offsets = np.zeros(len(asteroids) + 1, dtype=np.int32)
+    np.cumsum(counts, out=offsets[1:])
+    local = np.array([v for a in asteroids for v in a.vertices], dtype=np.float64).reshape(-1, 2)
+    placement = np.array([(a.x, a.y, a.rotation) for a in asteroids], dtype=np.float64).reshape(-1, 3)
+    centers = placement[:, :2].copy()
+    placement = np.repeat(placement, counts, axis=0)
+    cos_r, sin_r = np.cos(placement[:, 2]), np.sin(placement[:, 2])
+    points = np.empty_like(local)
+    points[:, 0] = placement[:, 0] + local[:, 0] * cos_r - local[:, 1] * sin_r
+    points[:, 1] = placement[:, 1] + local[:, 0] * sin_r + local[:, 1] * cos_r
+
+    bullet_points = np.array([(b.x, b.y) for b in bullets], dtype=np.float64).reshape(-1, 2)
+    enemy_points = np.array([(b.x, b.y) for b in enemy_bullets], dtype=np.float64).reshape(-1, 2)
+
+    return FrameSnapshot(tick, score, tuple(world_size), player_position, alpha_position,
+                         _frozen(kinds), _frozen(columns), _frozen(centers),
+                         _frozen(points), _frozen(offsets),
+                         _frozen(bullet_points), _frozen(enemy_points))
+
+
+class SpatialGrid:
+    """Uniform grid index over points in the world
+
+    Points are bucketed by cell and sorted by cell id once, so a
+    rectangle query is one contiguous slice per grid row.
+    """
+    def __init__(self, points, world_width, world_height, cell_size=GRID_CELL_SIZE):
+        self.cell_size = cell_size
+        self.world_width = world_width
+        self.world_height = world_height
+        self.nx = max(1, int(math.ceil(world_width / cell_size)))
+        self.ny = max(1, int(math.ceil(world_height / cell_size)))
+        ix = np.clip((points[:, 0] // cell_size).astype(np.int64), 0, self.nx - 1)
+        iy = np.clip((points[:, 1] // cell_size).astype(np.int64), 0, self.ny - 1)
+        cells = iy * self.nx + ix
+        self.order = np.argsort(cells, kind='stable')
+        self.starts = np.searchsorted(cells[self.order], np.arange(self.nx * self.ny + 1))
+
+    def query(self, left, top, right, bottom):
+        """Indices of the points in every cell overlapping the rectangle"""
+        if right < 0 or bottom < 0 or left > self.world_width or top > self.world_height:
+            return np.empty(0, dtype=np.int64)
+        x0 = min(max(int(left // self.cell_size), 0), self.nx - 1)
+        x1 = min(max(int(right // self.cell_size), 0), self.nx - 1)
+        y0 = min(max(int(top // self.cell_size), 0), self.ny - 1)
+        y1 = min(max(int(bottom // self.cell_size), 0), self.ny - 1)
+        rows = [self.order[self.starts[row * self.nx + x0]:self.starts[row * self.nx + x1 + 1]]
+                for row in range(y0, y1 + 1)]
+        return np.concatenate(rows)
+
+
+class Viewport(NamedTuple):
+    """Part of the world shown on screen (world coordinates)"""
+    left: float
+    top: float
+    width: int
+    height: int
+    world_width: int
+    world_height: int
+    wrap: bool  # Show wrapped copies of the world past its edges
+
+    def world_copies(self):
+        """Offsets of every wrapped copy of the world the viewport overlaps"""
+        if not self.wrap:
+            return [(0, 0)]
+        copies = []
+        for shift_y in (-self.world_height, 0, self.world_height):
+            if self.top + self.height <= shift_y or self.top >= shift_y + self.world_height:
+                continue
+            for shift_x in (-self.world_width, 0, self.world_width):
+                if self.left + self.width <= shift_x or self.left >= shift_x + self.world_width:
+                    continue
+                copies.append((shift_x, shift_y))
+        return copies
+
+
+class Camera:
+    """Chooses the viewport: fixed on the world center, or following a ship"""
+    def __init__(self, mode='fixed'):
+        self.mode = mode
+
+    def viewport(self, frame, width, height):
+        """Viewport of the given size for a snapshot"""
+        world_width, world_height = frame.world_size
+        target = None
+        if self.mode == 'player':
+            target = frame.player_position
+        elif self.mode == 'alpha':
+            target = frame.alpha_position
+        if target is None:
+            return Viewport((world_width - width) / 2, (world_height - height) / 2,
+                            width, height, world_width, world_height, False)
+        return Viewport(target[0] - width / 2, target[1] - height / 2,
+                        width, height, world_width, world_height, True)
+
+
+def _visible(points, view, margin):
+    """Yield (indices, dx, dy) for the points inside the viewport and their screen offset"""
+    if view is None:
+        yield np.arange(len(points)), 0.0, 0.0
+        return
+    if not len(points):
+        return
+    grid = SpatialGrid(points, view.world_width, view.world_height)
+    for shift_x, shift_y in view.world_copies():
+        left = view.left - shift_x
+        top = view.top - shift_y
+        indices = grid.query(left - margin, top - margin,
+                             left + view.width + margin, top + view.height + margin)
+        if len(indices):
+            yield np.sort(indices), shift_x - view.left, shift_y - view.top
+
+
+def draw_frame(screen, frame, governor=None, view=None):
+    """Draw a FrameSnapshot (everything except the HUD), culled to the viewport"""
+    quality = governor.level if governor else QUALITY_FULL
+    screen.fill(BLACK)
+
+    # Draw asteroids
+    offsets = frame.asteroid_offsets
+    for indices, dx, dy in _visible(frame.asteroid_centers, view, ASTEROID_MARGIN):
+        # Gather only the vertices of the visible asteroids
+        starts = offsets[indices]
+        counts = offsets[indices + 1] - starts
+        local_offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(counts, out=local_offsets[1:])
+        vertices = np.repeat(starts - local_offsets[:-1], counts) + np.arange(local_offsets[-1])
+        points = (frame.asteroid_points[vertices] + (dx, dy)).tolist()
+        local_offsets = local_offsets.tolist()
+        for start, end in zip(local_offsets, local_offsets[1:]):
+            if end - start > 2:
+                polygon = points[start:end]
+                pygame.draw.polygon(screen, GREEN, polygon)
+                if quality < QUALITY_NO_OUTLINES:
+                    pygame.draw.polygon(screen, WHITE, polygon, 1)
+
+    # Draw bullets
+    for indices, dx, dy in _visible(frame.bullets, view, BULLET_RADIUS):
+        for center in (frame.bullets[indices] + (dx, dy)).astype(int).tolist():
+            pygame.draw.circle(screen, YELLOW, center, BULLET_RADIUS)
+
+    # Draw enemy bullets (with glow)
+    for indices, dx, dy in _visible(frame.enemy_bullets, view, BULLET_RADIUS):
+        for center in (frame.enemy_bullets[indices] + (dx, dy)).astype(int).tolist():
+            pygame.draw.circle(screen, RED, center, BULLET_RADIUS)
+            if quality < QUALITY_NO_GLOW:
+                pygame.draw.circle(screen, ORANGE, center, BULLET_RADIUS - 1)
+
+    # Draw enemy ships, AI ships and player ship
+    kinds, columns = [], []
+    for indices, dx, dy in _visible(frame.ship_columns[:, :2], view, SHIP_MARGIN):
+        placed = frame.ship_columns[indices]
+        placed[:, 0] += dx
+        placed[:, 1] += dy
+        kinds.append(frame.ship_kinds[indices])
+        columns.append(placed)
+    if kinds:
+        draw_ship_columns(screen, np.concatenate(kinds), np.concatenate(columns), quality)
+
+
+class Presenter:
+    """Renders to a logical surface and scales it to the window
+
+    Modes: 'native' draws straight into the window, '1200x600' draws
+    into a fixed-size surface and 'half' into one at half the window
+    size. In the scaled modes, draw cost no longer depends on the window
+    size, and resizing the window only changes the final scale.
+    """
+    def __init__(self, window, mode='native'):
+        self.window = window
+        self.mode = mode
+        self.logical = None
+        self._layout()
+
+    @property
+    def surface(self):
+        """Surface to draw the frame on"""
+        return self.logical if self.logical is not None else self.window
+
+    def set_mode(self, mode):
+        """Switch render resolution mode"""
+        if mode != self.mode:
+            self.mode = mode
+            self._layout()
+
+    def resize(self, window):
+        """The window surface changed size"""
+        self.window = window
+        self._layout()
+
+    def _layout(self):
+        """(Re)create the logical surface for the current mode"""
+        if self.mode == 'native':
+            self.logical = None
+            return
+        if self.mode == 'half':
+            width, height = self.window.get_size()
+            size = (max(1, width // 2), max(1, height // 2))
+        else:
+            size = tuple(int(v) for v in self.mode.split('x'))
+        if self.logical is None or self.logical.get_size() != size:
+            self.logical = pygame.Surface(size).convert()
+
+    def present(self):
+        """Scale the logical surface to the window and flip"""
+        if self.logical is not None:
+            pygame.transform.scale(self.logical, self.window.get_size(), self.window)
+        pygame.display.flip()
+
+
+class SnapshotBuffer:
+    """Triple buffer of published FrameSnapshots
+
+    The simulation publishes a new snapshot each tick and the renderer
+    takes the latest one. Snapshots are immutable, so publishing is a
+    single reference append and neither side ever waits on the other.
+    """
+    def __init__(self, slots=3):
+        self.slots = deque(maxlen=slots)
+
+    def publish(self, frame):
+        """Publish a new snapshot"""
+        self.slots.append(frame)
+
+    def latest(self):
+        """Get the most recent snapshot (None before the first publish)"""
+        return self.slots[-1] if self.slots else None
+
+
+class QualityGovernor:
+    """Sheds optional visual work when frames run over budget
+
+    Policies: 'adaptive' steps the level up when the average frame time
+    over a window exceeds the budget, and back down once it drops below
+    the headroom fraction of the budget. 'full' and 'minimal' pin the
+    level to the lowest or highest quality level.
+    """
+    def __init__(self, budget_ms=1000.0 / 60, policy='adaptive', window=30, headroom=0.6):
+        self.budget_ms = budget_ms
+        self.policy = policy
+        self.headroom = headroom
+        self.level = QUALITY_FULL
+        self.frame_times = deque(maxlen=window)
+
+    @property
+    def name(self):
+        """Human readable name of the current level"""
+        return QUALITY_NAMES[self.level]
+
+    def record(self, frame_ms):
+        """Record the work time of a frame and adjust the level"""
+        if self.policy == 'full':
+            self.level = QUALITY_FULL
+            return
+        if self.policy == 'minimal':
+            self.level = QUALITY_NO_SHIELDS
+            return
+
+        self.frame_times.append(frame_ms)
+        if len(self.frame_times) < self.frame_times.maxlen:
+            return
+        average = sum(self.frame_times) / len(self.frame_times)
+        if average > self.budget_ms and self.level < QUALITY_NO_SHIELDS:
+            self.level += 1
+            self.frame_times.clear()
+        elif average < self.budget_ms * self.headroom and self.level > QUALITY_FULL:
+            self.level -= 1
+            self.frame_times.clear()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Replay Recorder and Player for Asteroids Game
+Records seed, settings, player input bits and keyframes; plays back deterministically
+
+File layout (all integers are unsigned LEB128 varints):
+    header:  MAGIC, version byte, seed, max keyframe interval, settings JSON (length-prefixed)
+    records: INPUT     run length, input bits       -- bits held for `run` consecutive ticks
+             KEYFRAME  tick delta, snapshot bytes   -- game_pygame.snapshot() before that tick
+             SETTINGS  tick, settings JSON          -- menu change applied before that tick
+
+Input is run-length encoded, so an idle hour costs a handful of bytes. A file cut
+short by a crash still plays up to its last complete record.
+
+Keyframes follow simulation cost (SEEK_BUDGET), so a seek re-simulates about
+20 ms of game: measured 25 ms worst case in the default scene and 40-80 ms in a
+crowded one (6 AI ships, 6 enemies, ML on), where MIN_KEYFRAME_INTERVAL applies.
+
+Usage:
+    python3 replay_pygame.py battle.replay              # watch (SPACE pause, LEFT/RIGHT seek)
+    python3 replay_pygame.py battle.replay --verify     # re-simulate and check every keyframe
+"""
+
+import argparse
+import bisect
+import json
+import os
+import time
+
+MAGIC = b'ASRP'
+VERSION = 5
+
+# Record tags
+TAG_INPUT = 1
+TAG_KEYFRAME = 2
+TAG_SETTINGS = 3
+
+# Keyframe spacing: one is written once the ticks since the last keyframe took
+# SEEK_BUDGET seconds to simulate, so seeking re-simulates about that long
+# whatever the scene; MIN/KEYFRAME_INTERVAL bound the spacing in ticks
+SEEK_BUDGET = 0.02
+MIN_KEYFRAME_INTERVAL = 30
+KEYFRAME_INTERVAL = 300  # 5 seconds of game time at 60 ticks/s
+
+
+def encode_varint(value):
+    """Encode a non-negative integer as LEB128"""
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def decode_varint(data, pos):
+    """Decode a LEB128 integer at pos, returns (value, new_pos)"""
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class ReplayRecorder:
+    """Streams a session to a replay file
+
+    step_world calls record() once per tick and adds the time it spent on the
+    step to sim_time; the main loop calls settings() whenever the menu changes
+    the game settings.
+    """
+    def __init__(self, path, seed, settings, keyframe_interval=KEYFRAME_INTERVAL,
+                 seek_budget=SEEK_BUDGET):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.seek_budget = seek_budget
+        self.sim_time = 0.0
+        self.file = open(path, 'wb')
+        self.run_bits = 0
+        self.run_length = 0
+        self.last_keyframe = None
+        self.last_settings = json.dumps(settings, sort_keys=True)
+
+        config = self.last_settings.encode('utf-8')
+        self.file.write(MAGIC + bytes([VERSION]) + encode_varint(seed) +
+                        encode_varint(keyframe_interval) + encode_varint(len(config)) + config)
+
+    def record(self, tick, player_input, snapshot):
+        """Record the input for the step after `tick` (keyframing first when due)"""
+        if self.last_keyframe is None:
+            due = True
+        else:
+            gap = tick - self.last_keyframe
+            due = gap >= self.keyframe_interval or (
+                gap >= MIN_KEYFRAME_INTERVAL and self.sim_time >= self.seek_budget)
+        if due:
+            self._flush_run()
+            state = snapshot()
+            self.file.write(bytes([TAG_KEYFRAME]) + encode_varint(tick - (self.last_keyframe or 0)) +
+                            encode_varint(len(state)) + state)
+            self.file.flush()
+            self.last_keyframe = tick
+            self.sim_time = 0.0
+        if player_input != self.run_bits:
+            self._flush_run()
+            self.run_bits = player_input
+        self.run_length += 1
+
+    def settings(self, tick, settings):
+        """Record a settings change taking effect before the step after `tick`"""
+        encoded = json.dumps(settings, sort_keys=True)
+        if encoded == self.last_settings:
+            return
+        self._flush_run()
+        data = encoded.encode('utf-8')
+        self.file.write(bytes([TAG_SETTINGS]) + encode_varint(tick) + encode_varint(len(data)) + data)
+        self.last_settings = encoded
+
+    def close(self):
+        """Flush the pending input run and close the file"""
+        if self.file.closed:
+            return
+        self._flush_run()
+        self.file.close()
+
+    def _flush_run(self):
+        """Write the current input run"""
+        if self.run_length:
+            self.file.write(bytes([TAG_INPUT]) + encode_varint(self.run_length) +
+                            encode_varint(self.run_bits))
+            self.run_length = 0
+
+
+class ReplayPlayer:
+    """Deterministic playback of a replay file with keyframe seeking
+
+    Seeking restores the nearest keyframe at or before the target tick and
+    re-simulates the remaining ticks: at most keyframe_interval of them and,
+    past MIN_KEYFRAME_INTERVAL, about SEEK_BUDGET seconds of recording-time
+    simulation.
+    """
+    def __init__(self, path, game):
+        self.game = game
+        with open(path, 'rb') as f:
+            self.data = f.read()
+
+        data = self.data
+        if data[:4] != MAGIC or data[4] != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} replay file")
+        self.seed, pos = decode_varint(data, 5)
+        self.keyframe_interval, pos = decode_varint(data, pos)
+        length, pos = decode_varint(data, pos)
+        self.settings = json.loads(data[pos:pos + length])
+        pos += length
+
+        # Index the body: per-tick inputs, keyframe blob spans, settings events
+        self.inputs = bytearray()
+        self.keyframe_ticks = []
+        self.keyframe_spans = []
+        self.settings_ticks = []
+        self.settings_events = []
+        keyframe_tick = 0
+        try:
+            while pos < len(data):
+                tag = data[pos]
+                if tag == TAG_INPUT:
+                    run, p = decode_varint(data, pos + 1)
+                    bits, p = decode_varint(data, p)
+                    self.inputs.extend(bytes([bits]) * run)
+                elif tag == TAG_KEYFRAME:
+                    delta, p = decode_varint(data, pos + 1)
+                    length, p = decode_varint(data, p)
+                    if p + length > len(data):
+                        break
+                    keyframe_tick += delta
+                    self.keyframe_ticks.append(keyframe_tick)
+                    self.keyframe_spans.append((p, p + length))
+                    p += length
+                elif tag == TAG_SETTINGS:
+                    tick, p = decode_varint(data, pos + 1)
+                    length, p = decode_varint(data, p)
+                    if p + length > len(data):
+                        break
+                    self.settings_ticks.append(tick)
+                    self.settings_events.append(json.loads(data[p:p + length]))
+                    p += length
+                else:
+                    raise ValueError(f"Corrupt replay record at byte {pos}")
+                pos = p
+        except IndexError:
+            pass  # Truncated final record
+
+        if not self.keyframe_ticks:
+            raise ValueError(f"{path} has no keyframes")
+
+    @property
+    def length(self):
+        """Number of recorded ticks"""
+        return len(self.inputs)
+
+    @property
+    def tick(self):
+        """Current playback tick"""
+        return self.game.tick
+
+    def settings_at(self, tick):
+        """Settings in effect before the step after `tick`"""
+        i = bisect.bisect_right(self.settings_ticks, tick)
+        return self.settings_events[i - 1] if i else self.settings
+
+    def keyframe(self, index):
+        """Raw snapshot bytes of keyframe `index`"""
+        start, end = self.keyframe_spans[index]
+        return self.data[start:end]
+
+    def seek(self, tick):
+        """Jump to `tick`: restore the nearest keyframe, then re-simulate"""
+        tick = max(0, min(tick, self.length))
+        i = bisect.bisect_right(self.keyframe_ticks, tick) - 1
+        self.game.apply_settings(self.settings_at(self.keyframe_ticks[i]))
+        self.game.restore(self.keyframe(i))
+        while self.game.tick < tick:
+            self.step()
+
+    def step(self):
+        """Advance one tick, returns False at the end of the replay"""
+        tick = self.game.tick
+        if tick >= self.length:
+            return False
+        i = bisect.bisect_left(self.settings_ticks, tick)
+        while i < len(self.settings_ticks) and self.settings_ticks[i] == tick:
+            self.game.apply_settings(self.settings_events[i])
+            i += 1
+        self.game.step_world(self.inputs[tick])
+        return True
+
+    def verify(self):
+        """Play from tick 0 and compare the state at every keyframe
+
+        Returns the first tick whose state differs from the recording, or
+        None when playback reproduces the whole session.
+        """
+        self.seek(0)
+        for i, keyframe_tick in enumerate(self.keyframe_ticks):
+            while self.game.tick < keyframe_tick:
+                self.step()
+            if self.game.snapshot() != self.keyframe(i):
+                return keyframe_tick
+        return None
+
+
+def watch(player):
+    """Play a replay in a window"""
+    import pygame
+    from render_pygame import Camera, draw_frame
+
+    game = player.game
+    fps = game.FPS
+    screen = pygame.display.set_mode((game.SCREEN_WIDTH, game.SCREEN_HEIGHT))
+    pygame.display.set_caption("ASTEROIDS - Replay | SPACE pause, LEFT/RIGHT seek 5s, UP/DOWN speed")
+    clock = pygame.time.Clock()
+    camera = Camera(player.settings.get('camera_mode', 'fixed'))
+    font = pygame.font.Font(None, 28)
+    paused = False
+    speed = 1
+
+    player.seek(0)
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_LEFT:
+                    player.seek(player.tick - 5 * fps)
+                elif event.key == pygame.K_RIGHT:
+                    player.seek(player.tick + 5 * fps)
+                elif event.key == pygame.K_UP:
+                    speed = min(speed * 2, 16)
+                elif event.key == pygame.K_DOWN:
+                    speed = max(speed // 2, 1)
+
+        if not paused:
+            for _ in range(speed):
+                player.step()
+
+        frame = game.capture_world()
+        draw_frame(screen, frame, None, camera.viewport(frame, *screen.get_size()))
+        status = "paused" if paused else f"x{speed}"
+        text = font.render(f"Score: {frame.score}  {player.tick / fps:7.1f}s / {player.length / fps:.1f}s  {status}",
+                           True, game.YELLOW)
+        screen.blit(text, (10, 10))
+        pygame.display.flip()
+        clock.tick(fps)
+
+    pygame.quit()
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Play back an Asteroids replay")
+    parser.add_argument('replay')
+    parser.add_argument('--verify', action='store_true', help="Re-simulate headlessly and check every keyframe")
+    parser.add_argument('--seek', type=float, help="Seek to this time (seconds) and report how long it took")
+    args = parser.parse_args()
+
+    if args.verify or args.seek is not None:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import game_pygame as game
+
+    player = ReplayPlayer(args.replay, game)
+    print(f"{args.replay}: {player.length} ticks ({player.length / game.FPS:.1f}s), "
+          f"{len(player.keyframe_ticks)} keyframes, {len(player.data)} bytes")
+
+    if args.seek is not None:
+        start = time.perf_counter()
+        player.seek(int(args.seek * game.FPS))
+        print(f"Seek to tick {player.tick}: {(time.perf_counter() - start) * 1000:.1f} ms")
+    if args.verify:
+        start = time.perf_counter()
+        desync = player.verify()
+        elapsed = time.perf_counter() - start
+        if desync is None:
+            print(f"Playback matches every keyframe ({elapsed:.1f}s)")
+        else:
+            print(f"Playback diverges before keyframe at tick {desync}")
+            raise SystemExit(1)
+    if not (args.verify or args.seek is not None):
+        watch(player)
+
+
+if __name__ == "__main__":
+    main()
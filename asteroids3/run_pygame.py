@@ -3,6 +3,7 @@
 Launcher script for Pygame version of Asteroids
 """
 
+import argparse
 import sys
 import subprocess
 
@@ -21,6 +22,17 @@ def check_dependencies():
 
 def main():
     """Launch the game"""
+    parser = argparse.ArgumentParser(description="Asteroids (Pygame Edition)")
+    parser.add_argument('--record', metavar='FILE', help="Record a replay (play it with replay_pygame.py)")
+    parser.add_argument('--telemetry', metavar='DIR', help="Write game events to this directory")
+    parser.add_argument('--telemetry-format', choices=['jsonl', 'npz'], default='jsonl')
+    parser.add_argument('--training-data', metavar='DIR', help="Collect AI ship ML training samples")
+    parser.add_argument('--policy-server', metavar='SOCKET',
+                        help="Drive the AI ships with a policy served by marl_inference.py")
+    args = parser.parse_args()
+    if args.record and args.policy_server:
+        parser.error("--record cannot be combined with --policy-server (replays do not hold policy actions)")
+    
     if not check_dependencies():
         sys.exit(1)
     
@@ -35,7 +47,9 @@ def main():
     
     try:
         from game_pygame import main as game_main
-        game_main()
+        game_main(record_path=args.record, telemetry_path=args.telemetry,
+                  telemetry_format=args.telemetry_format, training_data_path=args.training_data,
+                  policy_server=args.policy_server)
     except KeyboardInterrupt:
         print("\nGame interrupted by user")
     except Exception as e:
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+AI Parameter Sweeps for Asteroids Game
+Grid, random and successive-halving search over AIShip constants, cached on disk
+
+Each configuration overrides some AIShip attributes (SWEEP_FIELDS) and is
+played on the same seeds as every other configuration, with the headless
+battle of league_pygame.run_episode, on a process pool. The default
+configuration (no overrides) is always included as the baseline.
+
+Every episode result is memoized in a JSON-lines cache keyed by (overrides,
+seed, scenario, code version). The code version is a hash of the engine
+sources, so results are reused across runs and sweeps until the game code
+changes, and an interrupted sweep resumes without replaying anything.
+
+Successive halving plays all configurations on min_seeds seeds, keeps the
+best 1/eta by the objective, plays those on eta times as many seeds
+(reusing the seeds already played), and so on up to max_seeds.
+
+Usage:
+    python3 sweep_pygame.py --grid detection_radius=60,100,140 firing_range=150,200,300
+    python3 sweep_pygame.py --random 40 --seeds 20 --workers 8
+    python3 sweep_pygame.py --halving 81 --eta 3 --min-seeds 4 --max-seeds 108
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import time
+import numpy as np
+from league_pygame import DEFAULT_SCENARIO, run_episode
+
+# Tunable AIShip attributes: (low, high, type) of the random search range.
+# The flocking separation, alignment and cohesion radii are not read by the
+# Python AI and are left out; flock_radius feeds the ML features.
+SWEEP_FIELDS = {
+    'detection_radius': (40, 250, int),
+    'firing_range': (100, 400, int),
+    'imminent_threat_distance': (30, 200, int),
+    'collision_angle_threshold': (0.1, 1.6, float),
+    'rapid_fire_cooldown': (1, 12, int),
+    'enemy_detection_radius': (150, 600, int),
+    'enemy_firing_range': (100, 450, int),
+    'min_asteroid_size': (5, 40, int),
+    'thrust_frequency': (0.0, 0.2, float),
+    'flock_radius': (50, 300, int),
+}
+
+OBJECTIVES = ('score', 'survivors', 'ticks')
+CACHE = 'sweep_cache.jsonl'
+
+# Sources whose code decides an episode's outcome
+ENGINE_SOURCES = ('game_pygame.py', 'ml_pygame.py', 'menu_pygame.py', 'league_pygame.py')
+
+
+def code_version():
+    """Hash of the engine sources"""
+    digest = hashlib.sha1()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in ENGINE_SOURCES:
+        with open(os.path.join(directory, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def cache_key(params, seed, scenario, version):
+    """Key of one episode result"""
+    text = json.dumps([params, seed, scenario, version], sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def grid_configs(values):
+    """Cartesian product of {field: [values]}"""
+    fields = list(values)
+    return [dict(zip(fields, combination)) for combination in itertools.product(*(values[f] for f in fields))]
+
+
+def random_configs(count, fields=None, seed=0):
+    """count configurations drawn uniformly from the SWEEP_FIELDS ranges"""
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(count):
+        config = {}
+        for field in fields or SWEEP_FIELDS:
+            low, high, kind = SWEEP_FIELDS[field]
+            config[field] = int(rng.integers(low, high + 1)) if kind is int else round(float(rng.uniform(low, high)), 4)
+        configs.append(config)
+    return configs
+
+
+class ResultCache:
+    """Episode results by cache key, appended to a JSON-lines file"""
+    def __init__(self, path):
+        self.path = path
+        self.results = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Line cut short by an interrupted run
+                    self.results[entry['key']] = entry['result']
+        self._file = open(path, 'a', buffering=1)
+
+    def __contains__(self, key):
+        return key in self.results
+
+    def __getitem__(self, key):
+        return self.results[key]
+
+    def put(self, key, params, seed, result):
+        """Store and append one result"""
+        self.results[key] = result
+        self._file.write(json.dumps({'key': key, 'params': params, 'seed': seed, 'result': result}) + '\n')
+
+    def close(self):
+        """Close the cache file"""
+        self._file.close()
+
+
+def _evaluate(task):
+    """Pool task: (key, params, seed, scenario) -> (key, params, seed, result)"""
+    key, params, seed, scenario = task
+    return key, params, seed, run_episode({'ship': params}, seed, scenario)
+
+
+class Sweep:
+    """Evaluates configurations on seeds, playing only uncached episodes"""
+    def __init__(self, cache, scenario=DEFAULT_SCENARIO, workers=None, objective='score'):
+        self.cache = cache
+        self.scenario = scenario
+        self.workers = workers or os.cpu_count()
+        self.objective = objective
+        self.version = code_version()
+        self.played = 0
+        self._pool = None
+
+    def evaluate(self, configs, seeds):
+        """Results of every config on every seed: list (per config) of result lists"""
+        keys = [[cache_key(config, seed, self.scenario, self.version) for seed in seeds] for config in configs]
+        tasks = {}
+        for config, config_keys in zip(configs, keys):
+            for seed, key in zip(seeds, config_keys):
+                if key not in self.cache and key not in tasks:
+                    tasks[key] = (key, config, seed, self.scenario)
+        if tasks:
+            if self._pool is None:
+                self._pool = multiprocessing.get_context('spawn').Pool(self.workers)
+            start = time.perf_counter()
+            print(f"Playing {len(tasks)} episodes ({sum(map(len, keys)) - len(tasks)} cached)", flush=True)
+            for key, params, seed, result in self._pool.imap_unordered(_evaluate, tasks.values()):
+                self.cache.put(key, params, seed, result)
+                self.played += 1
+            print(f"  {len(tasks) / (time.perf_counter() - start):.1f} episodes/s", flush=True)
+        return [[self.cache[key] for key in config_keys] for config_keys in keys]
+
+    def summarize(self, configs, results):
+        """Rows sorted best first: config, seeds, mean and standard error of each objective"""
+        rows = []
+        for config, config_results in zip(configs, results):
+            row = {'config': config, 'seeds': len(config_results)}
+            for name in OBJECTIVES:
+                values = np.array([result[name] for result in config_results], dtype=np.float64)
+                row[name] = values.mean()
+                row[name + '_sem'] = values.std(ddof=1) / math.sqrt(len(values)) if len(values) > 1 else 0.0
+            rows.append(row)
+        return sorted(rows, key=lambda row: -row[self.objective])
+
+    def run(self, configs, seeds):
+        """Evaluate configs (plus the baseline) on seeds, returns summary rows"""
+        configs = with_baseline(configs)
+        return self.summarize(configs, self.evaluate(configs, seeds))
+
+    def successive_halving(self, configs, seeds, eta=3, min_seeds=4):
+        """Keep the best 1/eta of the configs on eta times the seeds each rung, returns the last rung's rows"""
+        configs = with_baseline(configs)
+        count = min_seeds
+        while True:
+            rung_seeds = seeds[:count]
+            rows = self.summarize(configs, self.evaluate(configs, rung_seeds))
+            print(f"Rung: {len(configs)} configs on {len(rung_seeds)} seeds, best {self.objective} "
+                  f"{rows[0][self.objective]:.1f}", flush=True)
+            if len(configs) <= 2 or count >= len(seeds):
+                return rows
+            # The baseline rides along to the end, for comparison
+            configs = with_baseline(row['config'] for row in rows[:max(1, len(configs) // eta)])
+            count = min(count * eta, len(seeds))
+
+    def close(self):
+        """Stop the workers"""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+
+def with_baseline(configs):
+    """configs with the default configuration ({}) first, without duplicates"""
+    unique = [{}]
+    for config in configs:
+        if config not in unique:
+            unique.append(config)
+    return unique
+
+
+def format_rows(rows, limit=20):
+    """Summary rows as text"""
+    lines = [f"{'score':>14} {'survivors':>12} {'ticks':>14} {'seeds':>5}  overrides"]
+    for row in rows[:limit]:
+        overrides = ', '.join(f"{field}={value}" for field, value in row['config'].items()) or '(defaults)'
+        lines.append(f"{row['score']:>8.0f} ±{row['score_sem']:<5.0f}{row['survivors']:>6.2f} ±{row['survivors_sem']:<4.2f}"
+                     f"{row['ticks']:>8.0f} ±{row['ticks_sem']:<5.0f}{row['seeds']:>5}  {overrides}")
+    return '\n'.join(lines)
+
+
+def parse_grid(specs):
+    """['field=v1,v2', ...] -> {field: [values]}"""
+    values = {}
+    for spec in specs:
+        field, _, text = spec.partition('=')
+        if field not in SWEEP_FIELDS:
+            raise SystemExit(f"Unknown field {field!r} (fields: {', '.join(SWEEP_FIELDS)})")
+        kind = SWEEP_FIELDS[field][2]
+        values[field] = [kind(value) for value in text.split(',')]
+    return values
+
+
+def main():
+    """Command line sweep runner"""
+    parser = argparse.ArgumentParser(description="Sweep AIShip constants over headless battles")
+    search = parser.add_mutually_exclusive_group(required=True)
+    search.add_argument('--grid', nargs='+', metavar='FIELD=V1,V2', help="Grid search")
+    search.add_argument('--random', type=int, metavar='N', help="Random search over N configs")
+    search.add_argument('--halving', type=int, metavar='N', help="Successive halving from N random configs")
+    parser.add_argument('--fields', nargs='+', choices=list(SWEEP_FIELDS), help="Fields of random configs")
+    parser.add_argument('--seeds', type=int, default=10, help="Seeds per config (grid, random)")
+    parser.add_argument('--eta', type=int, default=3)
+    parser.add_argument('--min-seeds', type=int, default=4)
+    parser.add_argument('--max-seeds', type=int, default=108)
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--objective', choices=OBJECTIVES, default='score')
+    parser.add_argument('--ticks', type=int, default=DEFAULT_SCENARIO['ticks'])
+    parser.add_argument('--ai-ships', type=int, default=DEFAULT_SCENARIO['ai_ships'])
+    parser.add_argument('--enemies', type=int, default=DEFAULT_SCENARIO['enemies'])
+    parser.add_argument('--bosses', type=int, default=DEFAULT_SCENARIO['bosses'])
+    parser.add_argument('--workers', type=int, default=None, help="Processes (default: one per CPU)")
+    parser.add_argument('--cache', default=CACHE, help="Result cache file")
+    parser.add_argument('--random-seed', type=int, default=0, help="Seed of the random configs")
+    parser.add_argument('--output', help="Write the ranked configs as JSON")
+    parser.add_argument('--top', type=int, default=20, help="Rows to print")
+    args = parser.parse_args()
+
+    scenario = dict(DEFAULT_SCENARIO, ticks=args.ticks, ai_ships=args.ai_ships, enemies=args.enemies,
+                    bosses=args.bosses)
+    cache = ResultCache(args.cache)
+    sweep = Sweep(cache, scenario, args.workers, args.objective)
+    print(f"Code version {sweep.version}, {len(cache.results)} cached results", flush=True)
+    try:
+        if args.grid:
+            rows = sweep.run(grid_configs(parse_grid(args.grid)), range(args.first_seed, args.first_seed + args.seeds))
+        elif args.random:
+            configs = random_configs(args.random, args.fields, args.random_seed)
+            rows = sweep.run(configs, range(args.first_seed, args.first_seed + args.seeds))
+        else:
+            configs = random_configs(args.halving, args.fields, args.random_seed)
+            rows = sweep.successive_halving(configs, range(args.first_seed, args.first_seed + args.max_seeds),
+                                            args.eta, args.min_seeds)
+    except KeyboardInterrupt:
+        raise SystemExit("\nInterrupted: results so far are cached, run again to resume")
+    finally:
+        sweep.close()
+        cache.close()
+
+    print(f"\n{sweep.played} episodes played\n{format_rows(rows, args.top)}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(rows, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Telemetry for Asteroids Game
+Typed game events queued in memory and written in batches by a background thread
+
+The game appends plain tuples to TelemetryWriter.events (a deque: append and
+popleft are atomic, so the game never takes a lock or waits on the disk):
+
+    (event, tick, actor, target, x, y, value)
+
+event is one of the EVENT_* codes, actor/target are ENTITY_* codes (-1 when
+unknown) and value is event specific: points for kills, remaining health for
+hits, duration for shields, the new phase for boss phases, the formation index
+for formation changes and the final score for game over.
+
+Output is rotating JSONL (events-000000.jsonl, ...) or columnar .npz batches.
+"""
+
+import json
+import os
+import threading
+from collections import deque
+import numpy as np
+
+# Event codes
+EVENT_KILL = 0
+EVENT_HIT = 1
+EVENT_BLOCK = 2
+EVENT_SHIELD = 3
+EVENT_BOSS_PHASE = 4
+EVENT_TELEPORT = 5
+EVENT_ALPHA = 6
+EVENT_FORMATION = 7
+EVENT_GAME_OVER = 8
+EVENT_NAMES = ('kill', 'hit', 'block', 'shield', 'boss_phase', 'teleport', 'alpha', 'formation',
+               'game_over')
+
+# Entity codes
+ENTITY_NONE = -1
+ENTITY_PLAYER = 0
+ENTITY_AI = 1
+ENTITY_BASIC = 2
+ENTITY_ADVANCED = 3
+ENTITY_BOSS = 4
+ENTITY_ASTEROID = 5
+ENTITY_BULLET = 6
+ENTITY_ENEMY_BULLET = 7
+ENTITY_NAMES = ('player', 'ai', 'basic', 'advanced', 'boss', 'asteroid', 'bullet', 'enemy_bullet')
+ENEMY_ENTITIES = {'basic': ENTITY_BASIC, 'advanced': ENTITY_ADVANCED, 'boss': ENTITY_BOSS}
+
+FORMATS = ('jsonl', 'npz')
+
+
+class TelemetryWriter(threading.Thread):
+    """Drains the event queue to disk every `interval` seconds
+
+    The queue is bounded (max_events); if the writer ever falls that far
+    behind, the oldest events are dropped rather than stalling the game.
+    """
+    def __init__(self, path, fmt='jsonl', interval=0.5, max_bytes=16 * 1024 * 1024,
+                 npz_batch=65536, max_events=1000000, echo=True):
+        super().__init__(name="telemetry", daemon=True)
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown telemetry format {fmt!r}, expected one of {FORMATS}")
+        self.path = path
+        self.format = fmt
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.npz_batch = npz_batch
+        self.echo = echo
+        self.events = deque(maxlen=max_events)
+        self.written = 0
+        self.file = None
+        self.pending = []
+        self._stopped = threading.Event()
+        os.makedirs(path, exist_ok=True)
+        # Number the files after those of earlier sessions
+        self.file_index = max([file_index(name) for name in os.listdir(path)], default=-1) + 1
+
+    def run(self):
+        """Writer loop"""
+        while not self._stopped.wait(self.interval):
+            self.flush()
+        self.flush()
+        self._write_npz()
+        if self.file:
+            self.file.close()
+
+    def stop(self):
+        """Write everything still queued and stop the thread"""
+        self._stopped.set()
+        self.join()
+
+    def flush(self):
+        """Write all queued events"""
+        events = self.events
+        batch = [events.popleft() for _ in range(len(events))]
+        if not batch:
+            return
+        if self.echo:
+            for event in batch:
+                if event[0] == EVENT_GAME_OVER:
+                    print(f"Game Over! Final Score: {event[6]}")
+        if self.format == 'jsonl':
+            self._write_jsonl(batch)
+        else:
+            self.pending.extend(batch)
+            if len(self.pending) >= self.npz_batch:
+                self._write_npz()
+        self.written += len(batch)
+
+    def _write_jsonl(self, batch):
+        """Append events to the current JSONL file, rotating by size"""
+        if self.file is None or self.file.tell() >= self.max_bytes:
+            if self.file:
+                self.file.close()
+            self.file = open(os.path.join(self.path, f"events-{self.file_index:06d}.jsonl"), 'a')
+            self.file_index += 1
+        lines = []
+        for event, tick, actor, target, x, y, value in batch:
+            lines.append(json.dumps({
+                'event': EVENT_NAMES[event], 'tick': tick,
+                'actor': ENTITY_NAMES[actor] if actor >= 0 else None,
+                'target': ENTITY_NAMES[target] if target >= 0 else None,
+                'x': round(x, 2), 'y': round(y, 2), 'value': value}))
+        self.file.write('\n'.join(lines) + '\n')
+        self.file.flush()
+
+    def _write_npz(self):
+        """Write pending events as one compressed columnar batch"""
+        if not self.pending:
+            return
+        event, tick, actor, target, x, y, value = zip(*self.pending)
+        np.savez_compressed(
+            os.path.join(self.path, f"events-{self.file_index:06d}.npz"),
+            event=np.array(event, dtype=np.int8), tick=np.array(tick, dtype=np.int64),
+            actor=np.array(actor, dtype=np.int8), target=np.array(target, dtype=np.int8),
+            x=np.array(x, dtype=np.float32), y=np.array(y, dtype=np.float32),
+            value=np.array(value, dtype=np.float64),
+            event_names=np.array(EVENT_NAMES), entity_names=np.array(ENTITY_NAMES))
+        self.file_index += 1
+        self.pending = []
+
+
+def file_index(name):
+    """Index of an events-N.jsonl / events-N.npz file (-1 for other files)"""
+    stem, _, extension = name.partition('.')
+    if extension in FORMATS and stem.startswith('events-') and stem[7:].isdigit():
+        return int(stem[7:])
+    return -1
+
+
+def load_events(path):
+    """Load all telemetry in a directory as columns (dict of arrays), in file index order"""
+    names = sorted(os.listdir(path), key=lambda name: (file_index(name), name))
+    columns = {key: [] for key in ('event', 'tick', 'actor', 'target', 'x', 'y', 'value')}
+    for name in names:
+        full = os.path.join(path, name)
+        if name.endswith('.npz'):
+            with np.load(full) as data:
+                for key in columns:
+                    columns[key].append(data[key])
+        elif name.endswith('.jsonl'):
+            with open(full) as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+            columns['event'].append(np.array([EVENT_NAMES.index(r['event']) for r in rows], dtype=np.int8))
+            for key in ('actor', 'target'):
+                columns[key].append(np.array([ENTITY_NAMES.index(r[key]) if r[key] else ENTITY_NONE
+                                              for r in rows], dtype=np.int8))
+            for key, dtype in (('tick', np.int64), ('x', np.float32), ('y', np.float32),
+                               ('value', np.float64)):
+                columns[key].append(np.array([r[key] for r in rows], dtype=dtype))
+    return {key: np.concatenate(parts) if parts else np.zeros(0) for key, parts in columns.items()}